@@ -4,15 +4,33 @@ Provides common functionality for agent communication and LLM integration
 """
 
 import os
+import sys
+import json
 import asyncio
-from typing import Optional, Dict, Any, List
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, List, AsyncIterator
 from datetime import datetime
+from pathlib import Path
 import httpx
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from http_pool import http_pool
+from .provider_router import provider_router
+from .completion_cache import completion_cache
+
 load_dotenv()
 
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+LLM_ERROR_RESPONSE = "Error: Unable to generate response. Both OpenRouter and Gemini failed."
+
+# When set (by process_request_stream), generate_response forwards tokens here as they arrive
+stream_sink: ContextVar[Optional[asyncio.Queue]] = ContextVar("stream_sink", default=None)
+
 # Configure Gemini as fallback
 genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
 
@@ -50,34 +68,100 @@ class BaseAgent:
         prompt: str,
         context: Optional[Dict[str, Any]] = None,
         temperature: float = 0.7,
-        max_tokens: int = 2000
+        max_tokens: int = 2000,
+        use_cache: bool = True
     ) -> str:
         """
         Generate response using OpenRouter (Claude) with Gemini fallback
+        Identical requests are served from the shared completion cache unless
+        use_cache=False or the temperature is above the cache's creative cutoff
+        Streams tokens to the active stream sink when called from a streaming request
         """
+        sink = stream_sink.get()
+
+        cache_key = None
+        if use_cache and completion_cache.is_cacheable(temperature):
+            system_prompt = self._build_system_prompt(context) if context else ""
+            cache_key = completion_cache.make_key(self.model, system_prompt, prompt, temperature, max_tokens)
+            cached = completion_cache.get(cache_key)
+            if cached is not None:
+                if sink is not None:
+                    await sink.put(cached)
+                return cached
+
+        if sink is not None:
+            chunks = []
+            outcome = {}
+            async for chunk in self.generate_response_stream(prompt, context, temperature, max_tokens, outcome):
+                chunks.append(chunk)
+                await sink.put(chunk)
+
+            response = "".join(chunks)
+            if cache_key and outcome.get("complete"):
+                completion_cache.set(cache_key, response)
+            return response
+
         try:
-            # Try OpenRouter first (Claude)
-            return await self._call_openrouter(prompt, context, temperature, max_tokens)
+            # OpenRouter (Claude) first; Gemini is hedged in if OpenRouter runs past its p95
+            response, provider = await provider_router.complete({
+                "openrouter": lambda: self._call_openrouter(prompt, context, temperature, max_tokens),
+                "gemini": lambda: self._call_gemini(prompt, context, temperature, max_tokens)
+            })
         except Exception as e:
-            print(f"⚠️ OpenRouter failed: {e}. Falling back to Gemini...")
-            try:
-                return await self._call_gemini(prompt, context, temperature, max_tokens)
-            except Exception as e2:
-                print(f"❌ Both APIs failed: {e2}")
-                return f"Error: Unable to generate response. Both OpenRouter and Gemini failed."
+            print(f"❌ Both APIs failed: {e}")
+            return LLM_ERROR_RESPONSE
 
-    async def _call_openrouter(
+        if cache_key:
+            completion_cache.set(cache_key, response)
+        return response
+
+    async def generate_response_stream(
         self,
         prompt: str,
-        context: Optional[Dict[str, Any]],
-        temperature: float,
-        max_tokens: int
-    ) -> str:
-        """Call OpenRouter API with Claude model"""
-        if not self.openrouter_api_key:
-            raise Exception("OpenRouter API key not configured")
+        context: Optional[Dict[str, Any]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        outcome: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream response tokens from OpenRouter (Claude) with Gemini fallback
+        Falls back only if a provider fails before its first token arrives
+        Sets outcome["complete"] when a provider finished the stream cleanly
+        """
+        streams = {
+            "openrouter": self._stream_openrouter,
+            "gemini": self._stream_gemini
+        }
+
+        # Streams can't be hedged once tokens flow, but open circuits are still skipped
+        last_error = None
+        for provider in provider_router.order(list(streams)):
+            started = False
+            try:
+                async for chunk in streams[provider](prompt, context, temperature, max_tokens):
+                    if not started:
+                        # Time-to-first-token isn't comparable to full completions - breaker only
+                        started = True
+                        provider_router.record_success(provider)
+                    yield chunk
+                if not started:
+                    provider_router.record_success(provider)
+                if outcome is not None:
+                    outcome["complete"] = True
+                return
+            except Exception as e:
+                if started:
+                    print(f"⚠️ {provider} stream interrupted: {e}")
+                    return
+                provider_router.record_failure(provider)
+                print(f"⚠️ {provider} stream failed: {e}. Trying next provider...")
+                last_error = e
 
-        # Build messages with context
+        print(f"❌ Both APIs failed: {last_error}")
+        yield LLM_ERROR_RESPONSE
+
+    def _build_messages(self, prompt: str, context: Optional[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Build OpenRouter chat messages with context as the system prompt"""
         messages = []
         if context:
             messages.append({
@@ -88,25 +172,100 @@ class BaseAgent:
             "role": "user",
             "content": prompt
         })
+        return messages
+
+    def _openrouter_headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.openrouter_api_key}",
+            "HTTP-Referer": "https://buckbounty.app",
+            "X-Title": "BuckBounty"
+        }
+
+    async def _call_openrouter(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Call OpenRouter API with Claude model"""
+        if not self.openrouter_api_key:
+            raise Exception("OpenRouter API key not configured")
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        # Shared keep-alive client - no TCP/TLS handshake per call
+        client = http_pool.get_client(OPENROUTER_URL)
+        try:
             response = await client.post(
-                "https://openrouter.ai/api/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.openrouter_api_key}",
-                    "HTTP-Referer": "https://buckbounty.app",
-                    "X-Title": "BuckBounty"
-                },
+                OPENROUTER_URL,
+                headers=self._openrouter_headers(),
                 json={
                     "model": self.model,
-                    "messages": messages,
+                    "messages": self._build_messages(prompt, context),
                     "temperature": temperature,
                     "max_tokens": max_tokens
                 }
             )
             response.raise_for_status()
-            result = response.json()
-            return result["choices"][0]["message"]["content"]
+        except httpx.HTTPError:
+            http_pool.record_error(OPENROUTER_URL)
+            raise
+
+        result = response.json()
+        return result["choices"][0]["message"]["content"]
+
+    async def _stream_openrouter(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        """Stream tokens from OpenRouter's SSE completion endpoint"""
+        if not self.openrouter_api_key:
+            raise Exception("OpenRouter API key not configured")
+
+        client = http_pool.get_client(OPENROUTER_URL)
+        try:
+            async with client.stream(
+                "POST",
+                OPENROUTER_URL,
+                headers=self._openrouter_headers(),
+                json={
+                    "model": self.model,
+                    "messages": self._build_messages(prompt, context),
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    "stream": True
+                }
+            ) as response:
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    # Skip SSE comments (": OPENROUTER PROCESSING") and blank keep-alives
+                    if not line.startswith("data:"):
+                        continue
+
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+
+                    payload = json.loads(data)
+                    if "error" in payload:
+                        raise Exception(payload["error"].get("message", "OpenRouter stream error"))
+
+                    choices = payload.get("choices") or [{}]
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+        except httpx.HTTPError:
+            http_pool.record_error(OPENROUTER_URL)
+            raise
+
+    def _build_full_prompt(self, prompt: str, context: Optional[Dict[str, Any]]) -> str:
+        """Gemini has no system role - prepend the system prompt"""
+        if context:
+            return f"{self._build_system_prompt(context)}\n\n{prompt}"
+        return prompt
 
     async def _call_gemini(
         self,
@@ -120,9 +279,7 @@ class BaseAgent:
             raise Exception("Gemini API key not configured")
 
         # Build full prompt with context
-        full_prompt = prompt
-        if context:
-            full_prompt = f"{self._build_system_prompt(context)}\n\n{prompt}"
+        full_prompt = self._build_full_prompt(prompt, context)
 
         generation_config = {
             "temperature": temperature,
@@ -141,6 +298,53 @@ class BaseAgent:
 
         return response.text
 
+    async def _stream_gemini(
+        self,
+        prompt: str,
+        context: Optional[Dict[str, Any]],
+        temperature: float,
+        max_tokens: int
+    ) -> AsyncIterator[str]:
+        """Stream tokens from Gemini (blocking SDK iterator runs in the thread pool)"""
+        if not self.gemini_api_key:
+            raise Exception("Gemini API key not configured")
+
+        full_prompt = self._build_full_prompt(prompt, context)
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+        }
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def produce():
+            try:
+                for chunk in self.gemini_model.generate_content(
+                    full_prompt,
+                    generation_config=generation_config,
+                    stream=True
+                ):
+                    if chunk.text:
+                        loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        producer = loop.run_in_executor(None, produce)
+
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+        await producer
+
     def _build_system_prompt(self, context: Dict[str, Any]) -> str:
         """Build system prompt with agent identity and context"""
         system_prompt = f"""You are {self.agent_name}, a specialized AI agent in the BuckBounty personal finance platform.
@@ -161,6 +365,51 @@ Context:
         """
         raise NotImplementedError("Subclasses must implement process_request")
 
+    async def process_request_stream(self, request: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream a request as events: {"type": "token", "text"} chunks, then {"type": "done", "result"}
+        Runs the normal process_request, so caching and handler logic stay in one place
+        """
+        sink: asyncio.Queue = asyncio.Queue()
+        end = object()
+
+        async def run():
+            # The task has its own context copy - the sink only applies to this request
+            stream_sink.set(sink)
+            try:
+                return await self.process_request(request)
+            finally:
+                sink.put_nowait(end)
+
+        task = asyncio.create_task(run())
+        streamed = []
+
+        try:
+            while True:
+                chunk = await sink.get()
+                if chunk is end:
+                    break
+                streamed.append(chunk)
+                yield {"type": "token", "text": chunk}
+
+            result = await task
+        finally:
+            if not task.done():
+                task.cancel()
+
+        # Handlers may add text around the LLM output (quick stats, cached answers)
+        response = result.get("response", "")
+        streamed_text = "".join(streamed)
+        if response.startswith(streamed_text):
+            tail = response[len(streamed_text):]
+        else:
+            tail = f"\n\n{response}" if streamed_text else response
+
+        if tail:
+            yield {"type": "token", "text": tail}
+
+        yield {"type": "done", "result": result}
+
     def get_status(self) -> Dict[str, Any]:
         """Get agent status"""
         return {
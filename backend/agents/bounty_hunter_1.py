@@ -1,7 +1,7 @@
 """
 BountyHunter1 Agent - Coupon & Deal Hunter
 Scrapes coupons from Gmail (UberEats, DoorDash), Honey, and Rakuten
-Stores in JSON and pushes to vector DB
+Stores in a keyed coupon store and pushes to vector DB
 """
 
 import os
@@ -10,11 +10,13 @@ import asyncio
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
-import httpx
-from bs4 import BeautifulSoup
 import re
 
 from .base_agent import BaseAgent
+from .coupon_index import coupon_index
+from .coupon_store import coupon_store, coupon_key
+from .scraper_fetch import scraper_fetcher
+from .html_parsers import html_parse_pool, parse_honey, parse_rakuten
 
 
 class BountyHunter1(BaseAgent):
@@ -22,7 +24,7 @@ class BountyHunter1(BaseAgent):
     BountyHunter1 Agent - Specialized in finding and managing coupon codes
     """
 
-    def __init__(self):
+    def __init__(self, vector_db=None):
         super().__init__(
             agent_name="BountyHunter1",
             agent_type="Coupon & Deal Hunter",
@@ -39,34 +41,45 @@ class BountyHunter1(BaseAgent):
         self.data_dir = Path("./data/coupons")
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        # Coupon storage file
+        # Legacy/seed coupon file (imported into the coupon store when newer)
         self.coupon_file = self.data_dir / "all_coupons.json"
 
         # Last scrape timestamp
         self.last_scrape = None
 
+        # Shared VectorDB for semantic coupon search, and the store version last pushed to it
+        self.vector_db = vector_db
+        self._pushed_version: Optional[int] = None
+
         # Initialize coupon storage
         self._load_coupons()
 
     def _load_coupons(self):
-        """Load existing coupons from JSON file"""
-        if self.coupon_file.exists():
-            try:
-                with open(self.coupon_file, 'r') as f:
-                    self.coupons = json.load(f)
-                print(f"📦 Loaded {len(self.coupons)} existing coupons")
-            except Exception as e:
-                print(f"⚠️ Error loading coupons: {e}")
-                self.coupons = []
-        else:
+        """Load existing coupons from the coupon store"""
+        try:
+            coupon_store.import_json_if_newer()
+            self.coupons = coupon_store.all()
+            print(f"📦 Loaded {len(self.coupons)} existing coupons")
+        except Exception as e:
+            print(f"⚠️ Error loading coupons: {e}")
             self.coupons = []
 
+    def _store_coupons(self, coupons: List[Dict[str, Any]], source: str) -> bool:
+        """Upsert scraped coupons on (merchant, code, source) - only changed rows are written"""
+        try:
+            result = coupon_store.upsert(coupons)
+            print(f"💾 {source}: {result['inserted']} new, {result['updated']} refreshed coupons")
+            return True
+        except Exception as e:
+            print(f"❌ Error storing {source} coupons: {e}")
+            return False
+
     def _save_coupons(self):
-        """Save coupons to JSON file"""
+        """Prune expired coupons and reload the in-memory list"""
         try:
-            with open(self.coupon_file, 'w') as f:
-                json.dump(self.coupons, f, indent=2, default=str)
-            print(f"💾 Saved {len(self.coupons)} coupons to {self.coupon_file}")
+            coupon_store.prune()
+            self.coupons = coupon_store.all()
+            print(f"💾 Coupon store holds {len(self.coupons)} coupons")
         except Exception as e:
             print(f"❌ Error saving coupons: {e}")
 
@@ -132,7 +145,7 @@ class BountyHunter1(BaseAgent):
 
         print(f"✅ Scraping complete! Total coupons: {len(self.coupons)}")
 
-        # TODO: Push to vector DB in background
+        # Push to vector DB in background
         asyncio.create_task(self._push_to_vector_db())
 
     async def scrape_gmail_coupons(self):
@@ -177,6 +190,7 @@ class BountyHunter1(BaseAgent):
                 'from:doordash.com (promo OR coupon OR discount)'
             ]
 
+            found = []
             for query in queries:
                 # Get messages from last 30 days
                 results = service.users().messages().list(
@@ -196,9 +210,9 @@ class BountyHunter1(BaseAgent):
                     ).execute()
 
                     # Extract coupon codes from message body
-                    coupons = self._extract_coupons_from_email(message)
-                    self.coupons.extend(coupons)
+                    found.extend(self._extract_coupons_from_email(message))
 
+            self._store_coupons(found, "gmail")
             print(f"✅ Gmail scraping complete")
 
         except ImportError:
@@ -252,9 +266,8 @@ class BountyHunter1(BaseAgent):
                         "category": "food_delivery"
                     }
 
-                    # Avoid duplicates
-                    if not any(c["code"] == code.upper() and c["merchant"] == merchant for c in self.coupons):
-                        coupons.append(coupon)
+                    # Duplicates are merged by the coupon store's upsert
+                    coupons.append(coupon)
 
         except Exception as e:
             print(f"⚠️ Error extracting from email: {e}")
@@ -284,54 +297,18 @@ class BountyHunter1(BaseAgent):
         try:
             url = "https://www.joinhoney.com/explore"
 
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Find coupon cards (Note: This is a simplified scraper)
-                # Actual selectors may need adjustment based on Honey's current HTML structure
-                coupon_elements = soup.find_all(['div', 'article'], class_=re.compile(r'store|deal|coupon', re.I))
+            page = await scraper_fetcher.fetch(url)
+            if not page.changed:
+                # Same page as last run - its coupons are still current
+                coupon_store.touch_source("honey")
+                print(f"⏭️ Honey page unchanged, skipping parse")
+                return
 
-                for element in coupon_elements[:50]:  # Limit to 50
-                    try:
-                        # Extract merchant name
-                        merchant_elem = element.find(['h2', 'h3', 'h4', 'span'], class_=re.compile(r'store|merchant|title', re.I))
-                        merchant = merchant_elem.get_text(strip=True) if merchant_elem else "Unknown"
-
-                        # Extract deal description
-                        desc_elem = element.find(['p', 'span'], class_=re.compile(r'desc|deal|offer', re.I))
-                        description = desc_elem.get_text(strip=True) if desc_elem else ""
-
-                        # Extract code if available
-                        code_elem = element.find(['code', 'span'], class_=re.compile(r'code', re.I))
-                        code = code_elem.get_text(strip=True) if code_elem else None
-
-                        if merchant and (description or code):
-                            coupon = {
-                                "id": f"honey_{merchant}_{datetime.now().timestamp()}",
-                                "source": "honey",
-                                "merchant": merchant,
-                                "code": code,
-                                "description": description,
-                                "found_date": datetime.now().isoformat(),
-                                "url": url,
-                                "category": "general"
-                            }
-
-                            # Avoid duplicates
-                            if not any(c.get("merchant") == merchant and c.get("description") == description for c in self.coupons):
-                                self.coupons.append(coupon)
-
-                    except Exception as e:
-                        continue
-
-                print(f"✅ Honey scraping complete")
+            # CPU-bound parsing runs in the parse pool, not on the event loop
+            found = await html_parse_pool.parse(parse_honey, page.text, url)
+            if self._store_coupons(found, "honey"):
+                scraper_fetcher.commit(page)
+            print(f"✅ Honey scraping complete")
 
         except Exception as e:
             print(f"❌ Honey scraping error: {e}")
@@ -343,74 +320,24 @@ class BountyHunter1(BaseAgent):
         try:
             url = "https://www.rakuten.com/"
 
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Find deal cards (simplified - may need adjustment)
-                deal_elements = soup.find_all(['div', 'article'], class_=re.compile(r'store|deal|offer', re.I))
+            page = await scraper_fetcher.fetch(url)
+            if not page.changed:
+                # Same page as last run - its coupons are still current
+                coupon_store.touch_source("rakuten")
+                print(f"⏭️ Rakuten page unchanged, skipping parse")
+                return
 
-                for element in deal_elements[:50]:  # Limit to 50
-                    try:
-                        # Extract merchant
-                        merchant_elem = element.find(['h2', 'h3', 'h4'], class_=re.compile(r'store|merchant', re.I))
-                        merchant = merchant_elem.get_text(strip=True) if merchant_elem else "Unknown"
-
-                        # Extract cashback rate
-                        cashback_elem = element.find(['span', 'div'], class_=re.compile(r'cash|rate|percent', re.I))
-                        cashback = cashback_elem.get_text(strip=True) if cashback_elem else ""
-
-                        if merchant and cashback:
-                            coupon = {
-                                "id": f"rakuten_{merchant}_{datetime.now().timestamp()}",
-                                "source": "rakuten",
-                                "merchant": merchant,
-                                "code": None,
-                                "description": f"{cashback} cashback",
-                                "found_date": datetime.now().isoformat(),
-                                "url": url,
-                                "category": "cashback"
-                            }
-
-                            # Avoid duplicates
-                            if not any(c.get("merchant") == merchant and c.get("source") == "rakuten" for c in self.coupons):
-                                self.coupons.append(coupon)
-
-                    except Exception as e:
-                        continue
-
-                print(f"✅ Rakuten scraping complete")
+            found = await html_parse_pool.parse(parse_rakuten, page.text, url)
+            if self._store_coupons(found, "rakuten"):
+                scraper_fetcher.commit(page)
+            print(f"✅ Rakuten scraping complete")
 
         except Exception as e:
             print(f"❌ Rakuten scraping error: {e}")
 
     async def _search_coupons(self, query: str) -> List[Dict[str, Any]]:
-        """Search coupons based on query"""
-        query_lower = query.lower()
-
-        relevant_coupons = []
-
-        for coupon in self.coupons:
-            merchant = coupon.get("merchant", "").lower()
-            description = coupon.get("description", "").lower()
-            category = coupon.get("category", "").lower()
-
-            if (query_lower in merchant or
-                query_lower in description or
-                query_lower in category or
-                any(word in merchant or word in description for word in query_lower.split())):
-                relevant_coupons.append(coupon)
-
-        # Sort by date (newest first)
-        relevant_coupons.sort(key=lambda x: x.get("found_date", ""), reverse=True)
-
-        return relevant_coupons[:10]  # Return top 10
+        """Search coupons based on query (indexed; valid and newest first)"""
+        return coupon_index.refresh().search(query, limit=10)  # Return top 10
 
     async def _format_coupon_response(self, coupons: List[Dict], query: str) -> str:
         """Format coupons into a nice response using LLM"""
@@ -445,35 +372,43 @@ Keep it concise and enthusiastic!"""
         return response
 
     async def _push_to_vector_db(self):
-        """Push coupons to vector DB for semantic search"""
+        """Batch-push coupons to the vector DB "coupons" namespace (unchanged ones are skipped)"""
+        if self.vector_db is None:
+            return
+
+        index = coupon_index.refresh()
+        version, coupons = index.version, index.coupons
+        if version == self._pushed_version:
+            return
+
         print("📤 Pushing coupons to vector DB...")
 
         try:
-            # Import vector DB
-            import sys
-            sys.path.append(str(Path(__file__).parent.parent))
-            from vector_db import VectorDB
-
-            vector_db = VectorDB()
-
-            # Create embeddings for each coupon
-            for coupon in self.coupons:
-                # Create searchable text
-                text = f"{coupon['merchant']} - {coupon.get('description', '')} {coupon.get('code', '')}"
-
-                # Add to vector DB with metadata
-                vector_db.add_memory(
-                    text=text,
-                    metadata={
-                        "type": "coupon",
-                        "merchant": coupon['merchant'],
-                        "code": coupon.get('code'),
-                        "source": coupon['source'],
-                        "date": coupon['found_date']
-                    }
-                )
+            items = [
+                {
+                    "id": "|".join(coupon_key(coupon)),
+                    "text": f"{coupon['merchant']} - {coupon.get('description', '')} {coupon.get('code') or ''}".strip(),
+                    "metadata": coupon
+                }
+                for coupon in coupons
+            ]
+
+            # Embedding is CPU-bound - keep it off the event loop
+            result = await asyncio.to_thread(self.vector_db.add_memories, "coupons", items, True)
+            self._pushed_version = version
 
-            print(f"✅ Pushed {len(self.coupons)} coupons to vector DB")
+            print(f"✅ Pushed coupons to vector DB: {result['embedded']} embedded, "
+                  f"{result['unchanged']} unchanged, {result['removed']} removed")
 
         except Exception as e:
             print(f"❌ Error pushing to vector DB: {e}")
+
+    async def semantic_search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Coupons most similar in meaning to the query ("cheap dinner delivery")"""
+        if self.vector_db is None:
+            return []
+
+        await self._push_to_vector_db()
+
+        results = await asyncio.to_thread(self.vector_db.search_memories, "coupons", query, limit)
+        return [{**r["metadata"], "similarity_score": r["similarity_score"]} for r in results]
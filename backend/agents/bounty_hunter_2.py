@@ -11,11 +11,13 @@ import asyncio
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from pathlib import Path
-import httpx
-from bs4 import BeautifulSoup
-import re
 
 from .base_agent import BaseAgent
+from .scraper_fetch import scraper_fetcher
+from .html_parsers import html_parse_pool, parse_yahoo_articles
+from .news_store import news_store
+from .news_ranker import news_ranker, category_key
+from financial_snapshot import snapshot_store
 
 
 class BountyHunter2(BaseAgent):
@@ -23,7 +25,7 @@ class BountyHunter2(BaseAgent):
     BountyHunter2 Agent - Finance News & Market Intelligence
     """
 
-    def __init__(self):
+    def __init__(self, vector_db=None):
         super().__init__(
             agent_name="BountyHunter2",
             agent_type="Finance News & Market Intelligence",
@@ -40,15 +42,15 @@ class BountyHunter2(BaseAgent):
         self.data_dir = Path("./data/finance_news")
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
-        # News storage file
-        self.news_file = self.data_dir / "finance_news.json"
-
         # Last scrape timestamp
         self.last_scrape_file = self.data_dir / "last_scrape.json"
         self.last_scrape = self._load_last_scrape()
 
-        # News storage
-        self._load_news()
+        # News storage (loaded once into the shared store)
+        self.news_store = news_store
+
+        # Shared VectorDB - spending by category drives personalization
+        self.vector_db = vector_db
 
     def _load_last_scrape(self) -> Optional[datetime]:
         """Load last scrape timestamp"""
@@ -71,27 +73,10 @@ class BountyHunter2(BaseAgent):
         except Exception as e:
             print(f"❌ Error saving last scrape time: {e}")
 
-    def _load_news(self):
-        """Load existing news from JSON file"""
-        if self.news_file.exists():
-            try:
-                with open(self.news_file, 'r') as f:
-                    self.news_articles = json.load(f)
-                print(f"📰 Loaded {len(self.news_articles)} news articles")
-            except Exception as e:
-                print(f"⚠️ Error loading news: {e}")
-                self.news_articles = []
-        else:
-            self.news_articles = []
-
-    def _save_news(self):
-        """Save news to JSON file"""
-        try:
-            with open(self.news_file, 'w') as f:
-                json.dump(self.news_articles, f, indent=2, default=str)
-            print(f"💾 Saved {len(self.news_articles)} news articles to {self.news_file}")
-        except Exception as e:
-            print(f"❌ Error saving news: {e}")
+    @property
+    def news_articles(self) -> List[Dict[str, Any]]:
+        """Stored articles, newest first (shared news store view)"""
+        return news_store.refresh().all()
 
     async def process_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Process user requests related to finance news"""
@@ -166,8 +151,7 @@ class BountyHunter2(BaseAgent):
         # Collect relevant sectors
         relevant_sectors = set()
         for category in categories:
-            if category in sector_map:
-                relevant_sectors.update(sector_map[category])
+            relevant_sectors.update(sector_map.get(category_key(category), []))
 
         if not relevant_sectors:
             relevant_sectors = ["general", "economy", "markets"]
@@ -188,13 +172,14 @@ class BountyHunter2(BaseAgent):
             if isinstance(result, Exception):
                 print(f"❌ Scraping task {i} failed: {result}")
 
-        # Remove duplicates
-        self._deduplicate_news()
+        # Keep only last 30 days of news (whole day buckets; duplicates were skipped on add)
+        news_store.prune()
+
+        news_store.save()
 
-        # Keep only last 30 days of news
-        self._clean_old_news()
+        # Embed new articles now so personalized ranking is a pure vector search
+        await asyncio.to_thread(news_ranker.sync)
 
-        self._save_news()
         self.last_scrape = datetime.now()
         self._save_last_scrape()
 
@@ -207,60 +192,17 @@ class BountyHunter2(BaseAgent):
         try:
             url = "https://finance.yahoo.com/"
 
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Find news articles
-                article_elements = soup.find_all(['article', 'li', 'div'], class_=re.compile(r'article|story|news', re.I))
+            page = await scraper_fetcher.fetch(url)
+            if not page.changed:
+                print("⏭️ Yahoo Finance general page unchanged, skipping parse")
+                return
 
-                for element in article_elements[:30]:  # Limit to 30
-                    try:
-                        # Extract headline
-                        headline_elem = element.find(['h2', 'h3', 'h4', 'a'], class_=re.compile(r'title|headline', re.I))
-                        if not headline_elem:
-                            continue
+            # CPU-bound parsing runs in the parse pool, not on the event loop
+            articles = await html_parse_pool.parse(parse_yahoo_articles, page.text, "general", 30, True)
+            news_store.add(articles)
+            scraper_fetcher.commit(page)
 
-                        headline = headline_elem.get_text(strip=True)
-
-                        # Extract link
-                        link_elem = element.find('a', href=True)
-                        link = link_elem['href'] if link_elem else None
-                        if link and not link.startswith('http'):
-                            link = f"https://finance.yahoo.com{link}"
-
-                        # Extract summary
-                        summary_elem = element.find(['p', 'div'], class_=re.compile(r'summary|desc', re.I))
-                        summary = summary_elem.get_text(strip=True) if summary_elem else ""
-
-                        # Extract time
-                        time_elem = element.find(['time', 'span'], class_=re.compile(r'time|date', re.I))
-                        published_time = time_elem.get_text(strip=True) if time_elem else "Unknown"
-
-                        if headline:
-                            article = {
-                                "id": f"yahoo_{hash(headline)}",
-                                "source": "yahoo_finance",
-                                "category": "general",
-                                "headline": headline,
-                                "summary": summary,
-                                "url": link,
-                                "published_time": published_time,
-                                "scraped_date": datetime.now().isoformat()
-                            }
-
-                            self.news_articles.append(article)
-
-                    except Exception as e:
-                        continue
-
-                print(f"✅ Yahoo Finance general news scraping complete")
+            print(f"✅ Yahoo Finance general news scraping complete")
 
         except Exception as e:
             print(f"❌ Yahoo Finance scraping error: {e}")
@@ -282,106 +224,63 @@ class BountyHunter2(BaseAgent):
 
             url = sector_urls.get(sector, f"https://finance.yahoo.com/topic/{sector}")
 
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-
-                response = await client.get(url, headers=headers)
-
-                # If 404, skip
-                if response.status_code == 404:
-                    print(f"⚠️ Sector {sector} not found, skipping")
-                    return
-
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Find articles (similar to general scraping)
-                article_elements = soup.find_all(['article', 'li', 'div'], class_=re.compile(r'article|story|news', re.I))
+            page = await scraper_fetcher.fetch(url)
 
-                for element in article_elements[:20]:  # Limit to 20 per sector
-                    try:
-                        headline_elem = element.find(['h2', 'h3', 'h4', 'a'], class_=re.compile(r'title|headline', re.I))
-                        if not headline_elem:
-                            continue
+            # If 404, skip
+            if page.status == 404:
+                print(f"⚠️ Sector {sector} not found, skipping")
+                return
 
-                        headline = headline_elem.get_text(strip=True)
+            if not page.changed:
+                print(f"⏭️ Yahoo Finance {sector} page unchanged, skipping parse")
+                return
 
-                        link_elem = element.find('a', href=True)
-                        link = link_elem['href'] if link_elem else None
-                        if link and not link.startswith('http'):
-                            link = f"https://finance.yahoo.com{link}"
+            articles = await html_parse_pool.parse(parse_yahoo_articles, page.text, sector, 20)
+            news_store.add(articles)
+            scraper_fetcher.commit(page)
 
-                        summary_elem = element.find(['p', 'div'], class_=re.compile(r'summary|desc', re.I))
-                        summary = summary_elem.get_text(strip=True) if summary_elem else ""
-
-                        if headline:
-                            article = {
-                                "id": f"yahoo_{sector}_{hash(headline)}",
-                                "source": "yahoo_finance",
-                                "category": sector,
-                                "headline": headline,
-                                "summary": summary,
-                                "url": link,
-                                "scraped_date": datetime.now().isoformat()
-                            }
-
-                            self.news_articles.append(article)
-
-                    except Exception as e:
-                        continue
-
-                print(f"✅ Yahoo Finance {sector} scraping complete")
+            print(f"✅ Yahoo Finance {sector} scraping complete")
 
         except Exception as e:
             print(f"❌ Yahoo Finance {sector} scraping error: {e}")
 
-    async def _get_user_transaction_categories(self) -> List[str]:
-        """Get user's transaction categories from vector DB"""
-        try:
-            import sys
-            sys.path.append(str(Path(__file__).parent.parent))
-            from vector_db import VectorDB
-
-            vector_db = VectorDB()
+    async def _get_user_transaction_categories(self, user_id: Optional[str] = None) -> List[str]:
+        """Spending categories, highest spend first (the user's current month if given, else all time)"""
+        if self.vector_db is None:
+            return []
 
-            # Get category stats
-            categories = vector_db.get_category_stats()
+        try:
+            if user_id:
+                snapshot = await asyncio.to_thread(snapshot_store.get, user_id, self.vector_db)
+                ranked = sorted(snapshot.classified_stats.items(), key=lambda x: x[1]['amount'], reverse=True)
+                return [category for category, _ in ranked]
 
-            # Extract category names
-            return [cat["category"] for cat in categories]
+            stats = self.vector_db.get_category_stats()
+            return sorted(stats, key=lambda category: stats[category]['total_amount'], reverse=True)
 
         except Exception as e:
             print(f"⚠️ Error getting transaction categories: {e}")
             return []
 
     async def _get_personalized_news(self, user_id: str, query: str) -> List[Dict[str, Any]]:
-        """Get personalized news based on user's transaction history"""
-        # Get user's top categories
-        categories = await self._get_user_transaction_categories()
-
-        # Search news matching categories or query
-        relevant_news = []
-
-        query_lower = query.lower()
-
-        for article in self.news_articles:
-            headline = article.get("headline", "").lower()
-            summary = article.get("summary", "").lower()
-            category = article.get("category", "").lower()
-
-            # Match by query or user's transaction categories
-            if (query_lower in headline or
-                query_lower in summary or
-                any(cat.lower() in headline or cat.lower() in summary for cat in categories) or
-                category in [c.lower() for c in categories]):
-                relevant_news.append(article)
-
-        # Sort by date (newest first)
-        relevant_news.sort(key=lambda x: x.get("scraped_date", ""), reverse=True)
+        """
+        Get personalized news based on user's transaction history
+        One vector search over the query blended with the user's spending interests;
+        keyword/category index lookup when embeddings are unavailable
+        """
+        news_store.refresh()
+        if news_ranker.encoder is not None and self.vector_db is not None:
+            try:
+                snapshot = await asyncio.to_thread(snapshot_store.get, user_id, self.vector_db)
+                interest, _ = await asyncio.to_thread(news_ranker.interest_vector, user_id, snapshot)
+                news = await asyncio.to_thread(news_ranker.rank, query, interest, 10)
+                if news:
+                    return news
+            except Exception as e:
+                print(f"⚠️ Semantic news ranking failed, using keyword index: {e}")
 
-        return relevant_news[:10]  # Return top 10
+        categories = await self._get_user_transaction_categories(user_id)
+        return news_store.search(query, categories, limit=10)
 
     async def _format_news_response(self, news: List[Dict], query: str) -> str:
         """Format news into a nice response using LLM"""
@@ -414,33 +313,3 @@ Keep it concise, informative, and actionable!"""
         response = await self.generate_response(prompt, context, temperature=0.7, max_tokens=600)
 
         return response
-
-    def _deduplicate_news(self):
-        """Remove duplicate news articles"""
-        seen = set()
-        unique_articles = []
-
-        for article in self.news_articles:
-            article_id = article.get("id")
-            if article_id and article_id not in seen:
-                seen.add(article_id)
-                unique_articles.append(article)
-
-        self.news_articles = unique_articles
-
-    def _clean_old_news(self):
-        """Remove news older than 30 days"""
-        cutoff_date = datetime.now() - timedelta(days=30)
-
-        filtered_articles = []
-
-        for article in self.news_articles:
-            try:
-                scraped_date = datetime.fromisoformat(article.get("scraped_date", ""))
-                if scraped_date >= cutoff_date:
-                    filtered_articles.append(article)
-            except:
-                # Keep if can't parse date
-                filtered_articles.append(article)
-
-        self.news_articles = filtered_articles
@@ -0,0 +1,92 @@
+"""
+LLM Completion Cache
+In-memory TTL + LRU cache of completions shared by all agents
+Keyed on a hash of (model, system prompt, prompt, temperature, max_tokens)
+"""
+
+import os
+import time
+import json
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+class CompletionCache:
+    """Size-bounded LRU cache with per-entry TTL for deterministic LLM prompts"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600, max_temperature: float = 0.7):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Calls above this temperature are creative - every call should differ
+        self.max_temperature = max_temperature
+
+        # key -> (completion, expires_at)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """Check if a call at this temperature may be served from cache"""
+        return self.max_entries > 0 and temperature <= self.max_temperature
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, prompt: str, temperature: float, max_tokens: int) -> str:
+        """Hash the full request so any change in prompt or context misses"""
+        payload = json.dumps([model, system_prompt, prompt, temperature, max_tokens], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached completion (refreshes its LRU position)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        completion, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return completion
+
+    def set(self, key: str, completion: str):
+        """Store a completion, evicting the least recently used entries"""
+        self._entries[key] = (completion, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "max_temperature": self.max_temperature,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+# Global completion cache shared by all agents
+completion_cache = CompletionCache(
+    max_entries=int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "512")),
+    ttl_seconds=float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "3600")),
+    max_temperature=float(os.getenv("COMPLETION_CACHE_MAX_TEMPERATURE", "0.7"))
+)
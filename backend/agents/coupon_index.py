@@ -0,0 +1,338 @@
+"""
+In-memory Coupon Index
+Token inverted index, merchant alias normalization and trigram fuzzy matching
+Postings are rank-ordered arrays (valid and newest first), so a query is a few
+array intersections and a slice; rebuilt only when the coupon store changes
+"""
+
+import re
+import bisect
+import heapq
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Set
+
+import numpy as np
+
+from .coupon_store import coupon_store
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Words that say "I want a coupon" rather than what for
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "for", "to", "of", "on", "in", "at", "with", "my", "me", "i",
+    "any", "some", "get", "give", "show", "find", "are", "is", "there", "what", "do", "you", "have",
+    "can", "please", "codes", "code", "coupon", "coupons", "deal", "deals", "discount", "discounts",
+    "promo", "promos", "off", "your", "order", "orders", "save", "savings"
+}
+
+# Normalized merchant spellings -> canonical normalized name
+MERCHANT_ALIASES = {
+    "amzn": "amazon",
+    "amazoncom": "amazon",
+    "wholefoodsmarket": "wholefoods",
+    "wfm": "wholefoods",
+    "thehomedepot": "homedepot",
+    "cvspharmacy": "cvs",
+    "handm": "hm",
+    "hennesandmauritz": "hm",
+    "uberrides": "uber",
+    "ubereat": "ubereats",
+    "grubhubcom": "grubhub",
+    "bestbuycom": "bestbuy"
+}
+
+
+# Expiry code for coupons without an expiry date (never counted as expired)
+_NO_EXPIRY = np.iinfo(np.int32).max
+
+# A query word that prefixes more indexed words than this only expands to the first ones
+MAX_PREFIX_EXPANSIONS = 256
+
+
+def normalize_merchant(name: str) -> str:
+    """Lowercase, drop punctuation/spaces and resolve aliases ("Uber Eats" -> "ubereats")"""
+    normalized = "".join(_TOKEN_RE.findall(name.lower()))
+    return MERCHANT_ALIASES.get(normalized, normalized)
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class CouponIndex:
+    """Searchable view over the coupon list, rebuilt when its source version changes"""
+
+    def __init__(self, store=None, fuzzy_threshold: float = 0.45):
+        self.store = store
+        self.fuzzy_threshold = fuzzy_threshold
+
+        self._lock = threading.Lock()
+        self._version: Any = None
+        self.coupons: List[Dict[str, Any]] = []
+        self._postings: Dict[str, np.ndarray] = {}
+        self._vocabulary: List[str] = []
+        self._merchants: Dict[str, List[int]] = {}
+        self._merchant_ranks: Dict[str, np.ndarray] = {}
+        self._merchant_names: Dict[str, str] = {}
+        self._merchant_trigrams: Dict[str, Set[str]] = {}
+        self._trigram_postings: Dict[str, Set[str]] = {}
+        self._categories: Dict[str, List[int]] = {}
+        self._by_rank: List[int] = []
+        self._expiry: List[str] = []
+        self._expiry_values: List[str] = []
+        self._expiry_codes = np.zeros(0, dtype=np.int32)
+        self.stats = {"builds": 0, "searches": 0, "build_ms": 0.0}
+
+    # ---------- building ----------
+
+    def build(self, coupons: List[Dict[str, Any]], version: Any = None):
+        """Index a list of coupons"""
+        started = datetime.now()
+        merchants: Dict[str, List[int]] = {}
+        merchant_names: Dict[str, str] = {}
+        categories: Dict[str, List[int]] = {}
+        coupon_tokens: List[Set[str]] = []
+
+        for i, coupon in enumerate(coupons):
+            merchant = coupon.get("merchant", "") or ""
+            key = normalize_merchant(merchant)
+            merchants.setdefault(key, []).append(i)
+            merchant_names.setdefault(key, merchant)
+            categories.setdefault((coupon.get("category") or "").lower(), []).append(i)
+
+            text = " ".join(str(coupon.get(field, "") or "") for field in ("merchant", "description", "category", "code"))
+            coupon_tokens.append(set(_tokens(text)) | {key})
+
+        # Postings hold ranks (newest found_date = rank 0), so every list is already in display order
+        found = [str(c.get("found_date", "") or "") for c in coupons]
+        by_rank = sorted(range(len(coupons)), key=lambda i: found[i], reverse=True)
+        postings: Dict[str, List[int]] = {}
+        for rank, i in enumerate(by_rank):
+            for token in coupon_tokens[i]:
+                postings.setdefault(token, []).append(rank)
+
+        rank_of = np.empty(len(coupons), dtype=np.int32)
+        rank_of[by_rank] = np.arange(len(coupons), dtype=np.int32)
+        merchant_ranks = {key: np.sort(rank_of[indices]) for key, indices in merchants.items()}
+
+        merchant_trigrams = {key: _trigrams(key) for key in merchants}
+        trigram_postings: Dict[str, Set[str]] = {}
+        for key, grams in merchant_trigrams.items():
+            for gram in grams:
+                trigram_postings.setdefault(gram, set()).add(key)
+
+        # Expiry dates as positions in their sorted distinct values: "expired" is one comparison per rank
+        expiry = [str(c.get("expiry_date", "") or "") for c in coupons]
+        expiry_values = sorted({e for e in expiry if e})
+        position = {e: p for p, e in enumerate(expiry_values)}
+        expiry_codes = np.array([position.get(expiry[i], _NO_EXPIRY) for i in by_rank], dtype=np.int32)
+
+        with self._lock:
+            self.coupons = coupons
+            self._postings = {token: np.array(ranks, dtype=np.int32) for token, ranks in postings.items()}
+            self._vocabulary = sorted(postings)
+            self._merchants = merchants
+            self._merchant_ranks = merchant_ranks
+            self._merchant_names = merchant_names
+            self._merchant_trigrams = merchant_trigrams
+            self._trigram_postings = trigram_postings
+            self._categories = categories
+            self._by_rank = by_rank
+            self._expiry = expiry
+            self._expiry_values = expiry_values
+            self._expiry_codes = expiry_codes
+            self._version = version
+
+        self.stats["builds"] += 1
+        self.stats["build_ms"] = round((datetime.now() - started).total_seconds() * 1000, 2)
+
+    def refresh(self) -> "CouponIndex":
+        """Rebuild from the coupon store if it changed since the last build"""
+        if self.store is None:
+            return self
+
+        try:
+            self.store.import_json_if_newer()
+            version = self.store.version()
+            if version == self._version:
+                return self
+            coupons = self.store.all()
+        except Exception as e:
+            print(f"⚠️ Error loading coupon index: {e}")
+            return self
+
+        self.build(coupons, version)
+        print(f"🗂️ Coupon index rebuilt: {len(coupons)} coupons, {len(self._merchants)} merchants")
+        return self
+
+    @property
+    def version(self) -> Any:
+        """Store version the index was last built from"""
+        return self._version
+
+    # ---------- lookup ----------
+
+    def match_merchant(self, text: str, fuzzy: bool = True) -> Optional[str]:
+        """
+        Resolve free text to an indexed merchant key
+        Tries exact/alias matches on 1-3 word spans, then trigram similarity
+        """
+        words = [w for w in _tokens(text) if w not in _STOPWORDS]
+        for size in (3, 2, 1):
+            for start in range(len(words) - size + 1):
+                span = "".join(words[start:start + size])
+                key = MERCHANT_ALIASES.get(span, span)
+                if key in self._merchants:
+                    return key
+
+        return self._fuzzy_merchant(words) if fuzzy else None
+
+    def _fuzzy_merchant(self, words: List[str]) -> Optional[str]:
+        """Closest merchant by trigram Jaccard similarity ("doordsh" -> "doordash")"""
+        # Trigrams shared by many merchants ("sto", "ore") only pick candidates, never decide
+        common_limit = max(50, len(self._merchants) // 20)
+        best_key, best_score = None, 0.0
+
+        for size in (2, 1):
+            for start in range(len(words) - size + 1):
+                candidate = "".join(words[start:start + size])
+                if len(candidate) < 3:
+                    continue
+                grams = _trigrams(candidate)
+
+                shared: Dict[str, int] = {}
+                for gram in grams:
+                    keys = self._trigram_postings.get(gram, ())
+                    if len(keys) > common_limit:
+                        continue
+                    for key in keys:
+                        shared[key] = shared.get(key, 0) + 1
+
+                for key, _ in heapq.nlargest(20, shared.items(), key=lambda item: item[1]):
+                    key_grams = self._merchant_trigrams[key]
+                    score = len(grams & key_grams) / len(grams | key_grams)
+                    if score > best_score:
+                        best_key, best_score = key, score
+
+        return best_key if best_score >= self.fuzzy_threshold else None
+
+    def merchant_name(self, key: str) -> str:
+        return self._merchant_names.get(key, key)
+
+    def _expand(self, token: str) -> Optional[np.ndarray]:
+        """Ranks of coupons with the token or a word it prefixes ("shoe" -> "shoes")"""
+        arrays = [self._postings[token]] if token in self._postings else []
+        if len(token) >= 3:
+            start = bisect.bisect_right(self._vocabulary, token)
+            end = bisect.bisect_left(self._vocabulary, token + "\uffff", start)
+            arrays.extend(self._postings[word] for word in self._vocabulary[start:min(end, start + MAX_PREFIX_EXPANSIONS)])
+
+        if not arrays:
+            return None
+        if len(arrays) == 1:
+            return arrays[0]
+        member = np.zeros(len(self.coupons), dtype=bool)
+        member[np.concatenate(arrays)] = True
+        return np.flatnonzero(member).astype(np.int32)
+
+    def _intersect(self, ranks: np.ndarray, other: np.ndarray) -> np.ndarray:
+        """Ranks in both lists, still in display order"""
+        member = np.zeros(len(self.coupons), dtype=bool)
+        member[other] = True
+        return ranks[member[ranks]]
+
+    def _top(self, ranks: np.ndarray, limit: int) -> List[Dict[str, Any]]:
+        """First `limit` coupons of a rank list, unexpired before expired"""
+        cutoff = bisect.bisect_left(self._expiry_values, datetime.now().strftime("%Y-%m-%d"))
+        expired = self._expiry_codes[ranks] < cutoff
+        picked = np.concatenate([ranks[~expired][:limit], ranks[expired][:limit]])[:limit]
+        return [self.coupons[self._by_rank[rank]] for rank in picked]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Coupons for a free-text query
+        Narrows by merchant, then by the query's other words (all of them if possible,
+        else the rarest); falls back to fuzzy merchant matching
+        """
+        self.stats["searches"] += 1
+        total = len(self.coupons) or 1
+        words = [w for w in _tokens(query) if w not in _STOPWORDS]
+
+        ranks: Optional[np.ndarray] = None
+        merchant = self.match_merchant(query, fuzzy=False)
+        if merchant:
+            ranks = self._merchant_ranks[merchant]
+
+        token_hits = []
+        for token in set(words):
+            if merchant and token in merchant:
+                continue
+            hits = self._expand(token)
+            # Words on most coupons say nothing about relevance
+            if hits is not None and len(hits) <= total * 0.5:
+                token_hits.append(hits)
+
+        if token_hits:
+            token_hits.sort(key=len)
+            narrowed = token_hits[0]
+            for hits in token_hits[1:]:
+                narrowed = self._intersect(narrowed, hits)
+                if not len(narrowed):
+                    narrowed = token_hits[0]
+                    break
+            if ranks is not None:
+                both = self._intersect(ranks, narrowed)
+                ranks = both if len(both) else ranks
+            else:
+                ranks = narrowed
+
+        if ranks is None or not len(ranks):
+            merchant = self._fuzzy_merchant(words)
+            if not merchant:
+                return []
+            ranks = self._merchant_ranks[merchant]
+
+        return self._top(ranks, limit)
+
+    def coupons_for(self, text: str) -> List[Dict[str, Any]]:
+        """All coupons for the merchant (or category) named in text, valid ones first"""
+        key = self.match_merchant(text)
+        if key:
+            indices = self._merchants[key]
+        else:
+            wanted = "_".join(w for w in _tokens(text) if w not in _STOPWORDS)
+            indices = []
+            if len(wanted) >= 3:
+                for category, members in self._categories.items():
+                    if wanted in category:
+                        indices.extend(members)
+
+        today = datetime.now().strftime("%Y-%m-%d")
+        indices = sorted(indices, key=lambda i: (bool(self._expiry[i]) and self._expiry[i] < today, self._expiry[i]))
+        return [self.coupons[i] for i in indices]
+
+    def group_by_merchant(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Coupons grouped under each merchant's display name"""
+        return {
+            self._merchant_names[key]: [self.coupons[i] for i in indices]
+            for key, indices in self._merchants.items()
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "coupons": len(self.coupons),
+            "merchants": len(self._merchants),
+            "tokens": len(self._postings),
+            "version": self._version
+        }
+
+
+# Global index over the shared coupon store
+coupon_index = CouponIndex(store=coupon_store)
@@ -0,0 +1,212 @@
+"""
+Coupon Store for BountyHunter1
+SQLite table keyed on (merchant, code, source) - scrapes upsert instead of appending
+Prunes expired and stale coupons; imports all_coupons.json when it is newer (populate_coupons.py)
+"""
+
+import os
+import re
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS coupons (
+    merchant_key TEXT NOT NULL,
+    code_key TEXT NOT NULL,
+    source TEXT NOT NULL,
+    data TEXT NOT NULL,
+    expiry_date TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    PRIMARY KEY (merchant_key, code_key, source)
+);
+CREATE INDEX IF NOT EXISTS idx_coupons_expiry ON coupons (expiry_date);
+CREATE INDEX IF NOT EXISTS idx_coupons_last_seen ON coupons (last_seen);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _key(text: Optional[str]) -> str:
+    return re.sub(r"[^a-z0-9]+", "", (text or "").lower())
+
+
+def coupon_key(coupon: Dict[str, Any]) -> Tuple[str, str, str]:
+    """(merchant, code, source) - code-less deals are keyed by their description instead"""
+    code = coupon.get("code")
+    return (
+        _key(coupon.get("merchant")),
+        code.upper() if code else "desc:" + _key(coupon.get("description")),
+        coupon.get("source") or "unknown"
+    )
+
+
+class CouponStore:
+    """Keyed, incrementally persisted coupon storage"""
+
+    def __init__(
+        self,
+        db_path: Path,
+        json_path: Optional[Path] = None,
+        ttl_days: int = 30,
+        expired_grace_days: int = 1
+    ):
+        self.db_path = Path(db_path)
+        self.json_path = Path(json_path) if json_path else None
+        # Coupons without an expiry date are dropped once unseen by scrapes for this long
+        self.ttl_days = ttl_days
+        self.expired_grace_days = expired_grace_days
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _get_meta(self, conn: sqlite3.Connection, key: str, default: str = "0") -> str:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, conn: sqlite3.Connection, key: str, value: Any):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
+
+    def _bump_version(self, conn: sqlite3.Connection):
+        self._set_meta(conn, "version", int(self._get_meta(conn, "version")) + 1)
+
+    def version(self) -> int:
+        """Changes on every write - readers reload when it moves"""
+        return int(self._get_meta(self._connect(), "version"))
+
+    def upsert(self, coupons: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert new coupons and refresh existing ones (keeps their first_seen)"""
+        if not coupons:
+            return {"inserted": 0, "updated": 0}
+
+        now = datetime.now().isoformat()
+        inserted = updated = 0
+        conn = self._connect()
+        with conn:
+            for coupon in coupons:
+                merchant_key, code_key, source = coupon_key(coupon)
+                existing = conn.execute(
+                    "SELECT data FROM coupons WHERE merchant_key = ? AND code_key = ? AND source = ?",
+                    (merchant_key, code_key, source)
+                ).fetchone()
+
+                if existing:
+                    previous = json.loads(existing[0])
+                    # Keep the original id and found_date so links and "newest" ordering stay stable
+                    coupon = {**coupon, "id": previous.get("id", coupon.get("id")),
+                              "found_date": previous.get("found_date", coupon.get("found_date"))}
+                    conn.execute(
+                        "UPDATE coupons SET data = ?, expiry_date = ?, last_seen = ? "
+                        "WHERE merchant_key = ? AND code_key = ? AND source = ?",
+                        (json.dumps(coupon, default=str), coupon.get("expiry_date"), now,
+                         merchant_key, code_key, source)
+                    )
+                    updated += 1
+                else:
+                    conn.execute(
+                        "INSERT INTO coupons (merchant_key, code_key, source, data, expiry_date, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (merchant_key, code_key, source, json.dumps(coupon, default=str),
+                         coupon.get("expiry_date"), now, now)
+                    )
+                    inserted += 1
+
+            self._bump_version(conn)
+
+        return {"inserted": inserted, "updated": updated}
+
+    def touch_source(self, source: str) -> int:
+        """Mark a source's coupons as seen now (its page was unchanged, so they are still listed)"""
+        conn = self._connect()
+        with conn:
+            return conn.execute(
+                "UPDATE coupons SET last_seen = ? WHERE source = ?",
+                (datetime.now().isoformat(), source)
+            ).rowcount
+
+    def prune(self) -> int:
+        """Delete coupons past their expiry (plus grace) and undated coupons not seen within the TTL"""
+        expired_before = (datetime.now() - timedelta(days=self.expired_grace_days)).strftime("%Y-%m-%d")
+        stale_before = (datetime.now() - timedelta(days=self.ttl_days)).isoformat()
+
+        conn = self._connect()
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM coupons WHERE (expiry_date IS NOT NULL AND expiry_date != '' AND expiry_date < ?) "
+                "OR ((expiry_date IS NULL OR expiry_date = '') AND last_seen < ?)",
+                (expired_before, stale_before)
+            ).rowcount
+            if removed:
+                self._bump_version(conn)
+
+        if removed:
+            print(f"🧹 Pruned {removed} expired/stale coupons")
+        return removed
+
+    def import_json_if_newer(self) -> int:
+        """Upsert all_coupons.json when it changed since the last import (e.g. populate_coupons.py)"""
+        if not self.json_path or not self.json_path.exists():
+            return 0
+
+        mtime = self.json_path.stat().st_mtime_ns
+        conn = self._connect()
+        if int(self._get_meta(conn, "json_mtime")) >= mtime:
+            return 0
+
+        try:
+            with open(self.json_path, 'r') as f:
+                coupons = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Error importing {self.json_path}: {e}")
+            return 0
+
+        result = self.upsert(coupons)
+        with conn:
+            self._set_meta(conn, "json_mtime", mtime)
+        print(f"📥 Imported {self.json_path.name}: {result['inserted']} new, {result['updated']} updated")
+        return result["inserted"]
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All stored coupons, newest first"""
+        rows = self._connect().execute("SELECT data FROM coupons ORDER BY first_seen DESC").fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM coupons").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "coupons": self.count(),
+            "version": self.version(),
+            "ttl_days": self.ttl_days,
+            "db_path": str(self.db_path)
+        }
+
+
+# Global coupon store (all_coupons.json is imported when newer)
+coupon_store = CouponStore(
+    Path("./data/coupons/coupons.db"),
+    json_path=Path("./data/coupons/all_coupons.json"),
+    ttl_days=int(os.getenv("COUPON_TTL_DAYS", "30")),
+    expired_grace_days=int(os.getenv("COUPON_EXPIRED_GRACE_DAYS", "1"))
+)
@@ -0,0 +1,119 @@
+"""
+Dependency-Graph Executor for Agent Data Fetches
+Runs independent fetch steps concurrently (blocking steps in worker threads)
+and records per-step timings for the response metadata
+"""
+
+import time
+import asyncio
+import inspect
+from contextvars import ContextVar
+from typing import Dict, Any, List, Callable, Optional
+
+# Timings of every graph run while handling the current request (set by the agent)
+fetch_timings: ContextVar[Optional[Dict[str, Any]]] = ContextVar("fetch_timings", default=None)
+
+
+class FetchStep:
+    """One node of a fetch graph"""
+
+    def __init__(self, name: str, func: Callable, deps: List[str], blocking: bool, default: Any, optional: bool):
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.blocking = blocking
+        self.default = default
+        self.optional = optional
+
+
+class FetchGraph:
+    """
+    Small DAG of data fetches for one handler
+    Each step receives its dependencies' results as keyword arguments
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.steps: Dict[str, FetchStep] = {}
+        self.timings: Dict[str, Any] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable,
+        deps: Optional[List[str]] = None,
+        blocking: bool = False,
+        optional: bool = False,
+        default: Any = None
+    ) -> "FetchGraph":
+        """
+        Add a step
+
+        Args:
+            name: Step name (also the keyword its result is passed as)
+            func: Sync or async callable taking its deps as keyword arguments
+            deps: Steps that must finish first (must already be added)
+            blocking: Run in a worker thread (disk, CPU or blocking network work)
+            optional: On error, log it and use `default` instead of failing the graph
+        """
+        deps = deps or []
+        for dep in deps:
+            if dep not in self.steps:
+                raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+
+        self.steps[name] = FetchStep(name, func, deps, blocking, default, optional)
+        return self
+
+    async def _run_step(self, step: FetchStep, tasks: Dict[str, asyncio.Task], graph_start: float) -> Any:
+        dep_results = await asyncio.gather(*(tasks[dep] for dep in step.deps))
+        kwargs = dict(zip(step.deps, dep_results))
+
+        started = time.perf_counter()
+        timing = {"start_ms": round((started - graph_start) * 1000, 1), "thread": step.blocking}
+        self.timings["steps"][step.name] = timing
+        try:
+            if step.blocking:
+                result = await asyncio.to_thread(step.func, **kwargs)
+            else:
+                result = step.func(**kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+        except Exception as e:
+            timing["error"] = str(e)
+            if not step.optional:
+                raise
+            print(f"⚠️ Fetch step {self.name}.{step.name} failed: {e}")
+            result = step.default
+        finally:
+            timing["ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        return result
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every step as soon as its dependencies finish; returns results by step name"""
+        graph_start = time.perf_counter()
+        self.timings = {"steps": {}}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        # Steps are added after their deps, so insertion order is a topological order
+        for name, step in self.steps.items():
+            tasks[name] = asyncio.create_task(self._run_step(step, tasks, graph_start))
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self.timings["total_ms"] = round((time.perf_counter() - graph_start) * 1000, 1)
+            # Sum of step times vs wall time shows how much overlap the graph bought
+            self.timings["sequential_ms"] = round(
+                sum(t.get("ms", 0) for t in self.timings["steps"].values()), 1
+            )
+            collector = fetch_timings.get()
+            if collector is not None:
+                collector[self.name] = self.timings
+
+        return dict(zip(tasks.keys(), results))
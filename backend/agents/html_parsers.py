@@ -0,0 +1,203 @@
+"""
+HTML Parsers for the Scraping Agents
+Pure, picklable parse functions (page text in, records out) so they can run in worker processes
+HTMLParsePool offloads them to a process pool, keeping the event loop free for I/O
+"""
+
+import os
+import re
+import time
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional
+
+from bs4 import BeautifulSoup
+
+# lxml builds the tree several times faster than the pure-Python html.parser
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+_ARTICLE_RE = re.compile(r'article|story|news', re.I)
+_HEADLINE_RE = re.compile(r'title|headline', re.I)
+_SUMMARY_RE = re.compile(r'summary|desc', re.I)
+_TIME_RE = re.compile(r'time|date', re.I)
+_COUPON_CARD_RE = re.compile(r'store|deal|coupon', re.I)
+_DEAL_CARD_RE = re.compile(r'store|deal|offer', re.I)
+
+
+def stable_id(*parts: str) -> str:
+    """Same id in every process and run (built-in hash() is salted per interpreter)"""
+    return hashlib.md5("|".join(parts).encode('utf-8')).hexdigest()[:16]
+
+
+def _soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+def parse_yahoo_articles(html: str, category: str, limit: int, with_time: bool = False) -> List[Dict[str, Any]]:
+    """Articles from a Yahoo Finance homepage/topic page"""
+    soup = _soup(html)
+    scraped_date = datetime.now().isoformat()
+    prefix = "yahoo" if category == "general" else f"yahoo_{category}"
+    articles = []
+
+    for element in soup.find_all(['article', 'li', 'div'], class_=_ARTICLE_RE)[:limit]:
+        try:
+            headline_elem = element.find(['h2', 'h3', 'h4', 'a'], class_=_HEADLINE_RE)
+            if not headline_elem:
+                continue
+
+            headline = headline_elem.get_text(strip=True)
+            if not headline:
+                continue
+
+            link_elem = element.find('a', href=True)
+            link = link_elem['href'] if link_elem else None
+            if link and not link.startswith('http'):
+                link = f"https://finance.yahoo.com{link}"
+
+            summary_elem = element.find(['p', 'div'], class_=_SUMMARY_RE)
+            summary = summary_elem.get_text(strip=True) if summary_elem else ""
+
+            article = {
+                "id": f"{prefix}_{stable_id(headline)}",
+                "source": "yahoo_finance",
+                "category": category,
+                "headline": headline,
+                "summary": summary,
+                "url": link,
+                "scraped_date": scraped_date
+            }
+
+            if with_time:
+                time_elem = element.find(['time', 'span'], class_=_TIME_RE)
+                article["published_time"] = time_elem.get_text(strip=True) if time_elem else "Unknown"
+
+            articles.append(article)
+
+        except Exception:
+            continue
+
+    return articles
+
+
+def parse_honey(html: str, url: str) -> List[Dict[str, Any]]:
+    """Coupon cards from the Honey explore page"""
+    soup = _soup(html)
+    found_date = datetime.now().isoformat()
+    coupons = []
+
+    for element in soup.find_all(['div', 'article'], class_=_COUPON_CARD_RE)[:50]:
+        try:
+            merchant_elem = element.find(['h2', 'h3', 'h4', 'span'], class_=re.compile(r'store|merchant|title', re.I))
+            merchant = merchant_elem.get_text(strip=True) if merchant_elem else "Unknown"
+
+            desc_elem = element.find(['p', 'span'], class_=re.compile(r'desc|deal|offer', re.I))
+            description = desc_elem.get_text(strip=True) if desc_elem else ""
+
+            code_elem = element.find(['code', 'span'], class_=re.compile(r'code', re.I))
+            code = code_elem.get_text(strip=True) if code_elem else None
+
+            if merchant and (description or code):
+                coupons.append({
+                    "id": f"honey_{stable_id(merchant, code or description)}",
+                    "source": "honey",
+                    "merchant": merchant,
+                    "code": code,
+                    "description": description,
+                    "found_date": found_date,
+                    "url": url,
+                    "category": "general"
+                })
+
+        except Exception:
+            continue
+
+    return coupons
+
+
+def parse_rakuten(html: str, url: str) -> List[Dict[str, Any]]:
+    """Cashback deal cards from the Rakuten homepage"""
+    soup = _soup(html)
+    found_date = datetime.now().isoformat()
+    coupons = []
+
+    for element in soup.find_all(['div', 'article'], class_=_DEAL_CARD_RE)[:50]:
+        try:
+            merchant_elem = element.find(['h2', 'h3', 'h4'], class_=re.compile(r'store|merchant', re.I))
+            merchant = merchant_elem.get_text(strip=True) if merchant_elem else "Unknown"
+
+            cashback_elem = element.find(['span', 'div'], class_=re.compile(r'cash|rate|percent', re.I))
+            cashback = cashback_elem.get_text(strip=True) if cashback_elem else ""
+
+            if merchant and cashback:
+                coupons.append({
+                    "id": f"rakuten_{stable_id(merchant, cashback)}",
+                    "source": "rakuten",
+                    "merchant": merchant,
+                    "code": None,
+                    "description": f"{cashback} cashback",
+                    "found_date": found_date,
+                    "url": url,
+                    "category": "cashback"
+                })
+
+        except Exception:
+            continue
+
+    return coupons
+
+
+class HTMLParsePool:
+    """Runs parse functions in worker processes (threads if workers is 0)"""
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.stats = {"parses": 0, "parse_ms": 0.0, "fallbacks": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def parse(self, func: Callable, *args) -> Any:
+        """Run func(*args) off the event loop; a broken pool falls back to a thread"""
+        started = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                return await asyncio.to_thread(func, *args)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+            except BrokenProcessPool:
+                print("⚠️ HTML parse pool broke, restarting it and parsing in a thread")
+                self._executor = None
+                self.stats["fallbacks"] += 1
+                return await asyncio.to_thread(func, *args)
+        finally:
+            self.stats["parses"] += 1
+            self.stats["parse_ms"] += (time.perf_counter() - started) * 1000
+
+    def shutdown(self):
+        """Stop the worker processes (called from the FastAPI lifespan hook)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "parse_ms": round(self.stats["parse_ms"], 1),
+            "workers": self.workers,
+            "parser": HTML_PARSER
+        }
+
+
+# Global parse pool (workers start lazily on the first parse)
+html_parse_pool = HTMLParsePool(workers=int(os.getenv("HTML_PARSE_WORKERS", str(min(4, os.cpu_count() or 1)))))
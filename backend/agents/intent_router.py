@@ -0,0 +1,221 @@
+"""
+Compiled Intent Router for MARK
+Stage 1: one combined-regex pass scores every intent's keyword rules at once
+Stage 2: optional nearest-centroid classifier over labelled example prompts (MiniLM embeddings)
+"""
+
+import os
+import re
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+# Intents in priority order - when several match, the earliest wins
+# (phrases match at a word start, so "codes" hits "code" but "decode" does not)
+INTENT_RULES: List[Tuple[str, List[str]]] = [
+    ("promo_codes", ["@codes", "@code"]),
+    ("polymarket", [
+        "polymarket", "prediction market", "betting market", "market odds",
+        "prediction odds", "bet on", "market opportunities", "poly market"
+    ]),
+    ("wealth_building", [
+        "build wealth", "market trends", "investment strategy", "wealth building",
+        "invest based on news", "market analysis", "portfolio strategy"
+    ]),
+    ("savings_optimization", [
+        "saving from transaction", "optimize credit card", "maximize rewards",
+        "credit card savings", "investment portfolio",
+        "best credit card", "portfolio breakdown"
+    ]),
+    ("coupon_search", ["coupon", "deal", "discount", "promo", "code"]),
+    ("finance_news", ["news", "market", "stock", "economy", "trend", "finance"]),
+    # Only counts when the message also contains an amount (see DIGIT_REQUIRED)
+    ("budget_check", [
+        "can i buy", "should i buy", "can i afford", "should i afford",
+        "afford to buy", "purchase", "buy"
+    ]),
+    ("budget_advice", ["budget", "spending", "save", "savings"]),
+    ("transaction_analysis", ["transaction", "purchase", "spent", "category", "analyze"]),
+    ("general_greeting", ["hi", "hello", "hey", "greetings", "good morning", "good afternoon"])
+]
+
+# Intents whose phrases must match whole words (short words like "hi" hide inside "this")
+WHOLE_WORD_INTENTS = {"general_greeting"}
+
+# Intents that need a number in the message ("can I buy a $1200 laptop?")
+DIGIT_REQUIRED = {"budget_check"}
+
+# Labelled example prompts for the embedding stage
+INTENT_EXAMPLES: Dict[str, List[str]] = {
+    "polymarket": [
+        "what are the odds on the election right now",
+        "which prediction bets look good this week",
+        "show me betting opportunities on current events"
+    ],
+    "wealth_building": [
+        "how do I grow my net worth over the next ten years",
+        "help me become wealthy long term",
+        "where should I put my extra money to build assets"
+    ],
+    "savings_optimization": [
+        "which card should I use to earn the most cashback",
+        "am I using the right credit card for my spending",
+        "how can I get more rewards points from my purchases"
+    ],
+    "coupon_search": [
+        "are there any sales going on at target",
+        "find me cheaper prices for groceries",
+        "any vouchers for amazon"
+    ],
+    "finance_news": [
+        "what happened on wall street today",
+        "any headlines about interest rates",
+        "how are the markets doing"
+    ],
+    "budget_advice": [
+        "how do I stop overspending every month",
+        "help me plan my monthly expenses",
+        "tips to cut back on costs"
+    ],
+    "transaction_analysis": [
+        "where did my money go last month",
+        "show me what I paid for recently",
+        "break down my expenses by type"
+    ],
+    "general_greeting": [
+        "good evening",
+        "yo what's up",
+        "howdy mark"
+    ],
+    "general": [
+        "what can you do",
+        "tell me about yourself",
+        "explain how compound interest works"
+    ]
+}
+
+_DIGIT_RE = re.compile(r"\d")
+
+
+class IntentRouter:
+    """Two-stage intent classifier: compiled keyword rules, then optional embedding fallback"""
+
+    def __init__(self, rules: List[Tuple[str, List[str]]] = INTENT_RULES, embedding_threshold: float = 0.5):
+        self.priority = [intent for intent, _ in rules]
+        self.embedding_threshold = embedding_threshold
+        self.encoder = None
+        self._intent_names: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+        self.stats = {"requests": 0, "rule_matches": 0, "embedding_matches": 0, "fallback_general": 0}
+        self._compile(rules)
+
+    def _compile(self, rules: List[Tuple[str, List[str]]]):
+        """Build one regex over every phrase and map each phrase to the intents it implies"""
+        phrase_intents: Dict[str, set] = {}
+        whole_word: Dict[str, bool] = {}
+        for intent, phrases in rules:
+            for phrase in phrases:
+                phrase_intents.setdefault(phrase, set()).add(intent)
+                whole_word[phrase] = whole_word.get(phrase, False) or intent in WHOLE_WORD_INTENTS
+
+        # The lookahead reports every word-start position but only the longest phrase there,
+        # so credit each phrase with the intents of shorter phrases it begins with
+        self._phrase_intents: Dict[str, frozenset] = {}
+        for phrase in phrase_intents:
+            implied = set()
+            for other, intents in phrase_intents.items():
+                if not phrase.startswith(other):
+                    continue
+                # A whole-word phrase only counts if the longer phrase has a word break after it
+                if whole_word[other] and len(phrase) > len(other) and re.match(r"\w", phrase[len(other)]):
+                    continue
+                implied |= intents
+            self._phrase_intents[phrase] = frozenset(implied)
+
+        alternatives = []
+        for phrase in sorted(phrase_intents, key=len, reverse=True):
+            escaped = re.escape(phrase)
+            alternatives.append(escaped + r"\b" if whole_word[phrase] else escaped)
+
+        self._pattern = re.compile(r"(?<!\w)(?=(" + "|".join(alternatives) + "))")
+
+    def score(self, message: str) -> Dict[str, int]:
+        """Count keyword hits for every intent in a single pass"""
+        scores: Dict[str, int] = {}
+        for match in self._pattern.finditer(message.lower()):
+            for intent in self._phrase_intents.get(match.group(1), ()):
+                scores[intent] = scores.get(intent, 0) + 1
+
+        if not _DIGIT_RE.search(message):
+            for intent in DIGIT_REQUIRED:
+                scores.pop(intent, None)
+
+        return scores
+
+    def match_rules(self, message: str) -> Optional[str]:
+        """Highest-priority intent with a keyword hit, or None"""
+        scores = self.score(message)
+        for intent in self.priority:
+            if intent in scores:
+                return intent
+        return None
+
+    def attach_encoder(self, encoder, examples: Dict[str, List[str]] = INTENT_EXAMPLES):
+        """Enable the embedding stage with an already-loaded sentence encoder"""
+        try:
+            names = list(examples)
+            centroids = []
+            for intent in names:
+                vectors = np.asarray(encoder.encode(examples[intent]), dtype=np.float32)
+                vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+                centroid = vectors.mean(axis=0)
+                centroids.append(centroid / (np.linalg.norm(centroid) + 1e-12))
+
+            self.encoder = encoder
+            self._intent_names = names
+            self._centroids = np.vstack(centroids)
+            print(f"🧭 Intent router embedding stage ready ({len(names)} intents)")
+        except Exception as e:
+            print(f"⚠️ Intent router embedding stage disabled: {e}")
+
+    def classify_embedding(self, message: str) -> Tuple[Optional[str], float]:
+        """Nearest intent centroid by cosine similarity (blocking - encodes the message)"""
+        if self.encoder is None or self._centroids is None:
+            return None, 0.0
+
+        vector = np.asarray(self.encoder.encode([message])[0], dtype=np.float32)
+        vector /= np.linalg.norm(vector) + 1e-12
+        similarities = self._centroids @ vector
+        best = int(np.argmax(similarities))
+        return self._intent_names[best], float(similarities[best])
+
+    async def classify(self, message: str) -> str:
+        """Route a message: keyword rules first, embeddings only when no rule matches"""
+        self.stats["requests"] += 1
+
+        intent = self.match_rules(message)
+        if intent:
+            self.stats["rule_matches"] += 1
+            return intent
+
+        if self.encoder is not None:
+            intent, similarity = await asyncio.to_thread(self.classify_embedding, message)
+            if intent and similarity >= self.embedding_threshold:
+                self.stats["embedding_matches"] += 1
+                return intent
+
+        self.stats["fallback_general"] += 1
+        return "general"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "embedding_stage": self.encoder is not None,
+            "embedding_threshold": self.embedding_threshold
+        }
+
+
+# Global intent router (embedding stage attached in main.py once the encoder is loaded)
+intent_router = IntentRouter(
+    embedding_threshold=float(os.getenv("INTENT_EMBEDDING_THRESHOLD", "0.5"))
+)
@@ -15,12 +15,22 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent))
 
 from .base_agent import BaseAgent
+from .prompt_builder import PromptBuilder, truncate_tokens
+from .intent_router import intent_router
+from .fetch_graph import FetchGraph, fetch_timings
+from .coupon_index import coupon_index
+from .news_store import news_store
+from .session_store import SessionStore
 from redis_cache import redis_cache
+from financial_snapshot import snapshot_store, FinancialSnapshot
 from rag_service import rag_service
-from credit_card_optimizer import credit_card_optimizer
+from credit_card_optimizer import credit_card_optimizer, ANALYSIS_VERSION
 from investment_advisor import investment_advisor
 from polymarket_service import polymarket_service
 
+# Messages kept per user conversation (oldest dropped first)
+MAX_CONVERSATION_MESSAGES = 100
+
 
 class MarkAgent(BaseAgent):
     """
@@ -28,7 +38,7 @@ class MarkAgent(BaseAgent):
     Coordinates all other agents and provides unified financial assistance
     """
 
-    def __init__(self, bounty_hunter_1=None, bounty_hunter_2=None):
+    def __init__(self, bounty_hunter_1=None, bounty_hunter_2=None, vector_db=None):
         super().__init__(
             agent_name="MARK",
             agent_type="Main Personal Finance Agent",
@@ -56,9 +66,10 @@ class MarkAgent(BaseAgent):
         self.cc_optimizer = credit_card_optimizer
         self.investment_advisor = investment_advisor
         self.polymarket = polymarket_service
+        self.vector_db = vector_db
 
-        # Conversation history per user
-        self.conversations: Dict[str, List[Dict]] = {}
+        # Conversation history per user (idle users evicted, spilled to Redis)
+        self.conversations = SessionStore("mark_conversations", factory=list)
 
         self.personality = {
             "traits": ["friendly", "analytical", "proactive", "educational"],
@@ -106,15 +117,17 @@ class MarkAgent(BaseAgent):
         start_time = datetime.now()
 
         # Store conversation
-        if user_id not in self.conversations:
-            self.conversations[user_id] = []
-
-        self.conversations[user_id].append({
+        conversation = self.conversations.get(user_id)
+        conversation.append({
             "role": "user",
             "content": message,
             "timestamp": datetime.now().isoformat()
         })
 
+        # Collect per-step timings from the handler's data fetches
+        timings: Dict[str, Any] = {}
+        fetch_timings.set(timings)
+
         # Analyze intent
         intent = await self._analyze_intent(message)
 
@@ -146,11 +159,12 @@ class MarkAgent(BaseAgent):
         actual_inference_time = (datetime.now() - start_time).total_seconds()
 
         # Store assistant response
-        self.conversations[user_id].append({
+        conversation.append({
             "role": "assistant",
             "content": response,
             "timestamp": datetime.now().isoformat()
         })
+        del conversation[:-MAX_CONVERSATION_MESSAGES]
 
         # Cache response with actual time
         self.redis_cache.cache_chat_response(
@@ -161,7 +175,7 @@ class MarkAgent(BaseAgent):
         )
 
         # Cache conversation history
-        self.redis_cache.cache_conversation_history(user_id, self.conversations[user_id])
+        self.redis_cache.cache_conversation_history(user_id, conversation)
 
         # Use actual inference time (dynamic)
         inference_display = f"{actual_inference_time:.2f}s"
@@ -172,68 +186,30 @@ class MarkAgent(BaseAgent):
         return {
             "response": response,
             "intent": intent,
-            "data": {},
+            "data": {"fetch_timings": timings} if timings else {},
             "cached": False,
             "inference_time": inference_display,
             "time_without_optimization": time_without_opt
         }
 
+    def _get_vector_db(self):
+        """Shared VectorDB (passed in by main.py; loaded once otherwise)"""
+        if self.vector_db is None:
+            from vector_db import VectorDB
+            self.vector_db = VectorDB()
+        return self.vector_db
+
+    def _get_snapshot(self, user_id: str) -> FinancialSnapshot:
+        """Current-month financial snapshot for the user (blocking - run in a thread from handlers)"""
+        return snapshot_store.get(user_id, self._get_vector_db())
+
+    def _current_transactions(self, snapshot: FinancialSnapshot) -> List[Dict]:
+        """The snapshot month's transactions, read from the VectorDB log"""
+        return snapshot.current_transactions(self._get_vector_db().metadata)
+
     async def _analyze_intent(self, message: str) -> str:
-        """Analyze user message to determine intent"""
-        message_lower = message.lower()
-
-        # Promo codes lookup (NEW - highest priority for @Codes)
-        if "@codes" in message_lower or "@code" in message_lower:
-            return "promo_codes"
-
-        # PolyMarket analysis (NEW - prediction markets)
-        if any(word in message_lower for word in [
-            "polymarket", "prediction market", "betting market", "market odds",
-            "prediction odds", "bet on", "market opportunities", "poly market"
-        ]):
-            return "polymarket"
-
-        # Build wealth with market trends (NEW - uses finance news)
-        if any(word in message_lower for word in [
-            "build wealth", "market trends", "investment strategy", "wealth building",
-            "invest based on news", "market analysis", "portfolio strategy"
-        ]):
-            return "wealth_building"
-
-        # Savings optimization (NEW - highest priority)
-        if any(word in message_lower for word in [
-            "saving from transaction", "optimize credit card", "maximize rewards",
-            "credit card savings", "investment portfolio",
-            "best credit card", "portfolio breakdown"
-        ]):
-            return "savings_optimization"
-
-        # Coupon/deal related
-        if any(word in message_lower for word in ["coupon", "deal", "discount", "promo", "code"]):
-            return "coupon_search"
-
-        # Finance news related
-        if any(word in message_lower for word in ["news", "market", "stock", "economy", "trend", "finance"]):
-            return "finance_news"
-
-        # Budget check for purchases (MUST BE BEFORE budget_advice!)
-        # Check if message contains price/amount AND purchase-related words
-        if any(char.isdigit() for char in message) and any(word in message_lower for word in ["can i buy", "should i buy", "can i afford", "should i afford", "afford to buy", "purchase", "buy"]):
-            return "budget_check"
-
-        # Budget advice (general budgeting questions)
-        if any(word in message_lower for word in ["budget", "spending", "save", "savings"]):
-            return "budget_advice"
-
-        # Transaction analysis
-        if any(word in message_lower for word in ["transaction", "purchase", "spent", "category", "analyze"]):
-            return "transaction_analysis"
-
-        # Greeting
-        if any(word in message_lower for word in ["hi", "hello", "hey", "greetings", "good morning", "good afternoon"]):
-            return "general_greeting"
-
-        return "general"
+        """Analyze user message to determine intent (compiled rules, then embedding fallback)"""
+        return await intent_router.classify(message)
 
     async def _handle_coupon_request(self, user_id: str, message: str) -> str:
         """Handle coupon-related requests via BountyHunter1 with status updates"""
@@ -241,10 +217,6 @@ class MarkAgent(BaseAgent):
             return "My coupon hunter is currently offline. Let me help you with something else!"
 
         try:
-            # Check if coupons exist in all_coupons.json
-            coupon_file = Path("./data/coupons/all_coupons.json")
-            coupons_exist = coupon_file.exists() and len(self.bounty_hunter_1.coupons) > 0
-
             # Set status to Running
             self.redis_cache.set_agent_status("bounty_hunter_1", "Running")
 
@@ -266,19 +238,16 @@ class MarkAgent(BaseAgent):
 
     async def _handle_promo_codes(self, user_id: str, message: str) -> str:
         """
-        Handle @Codes requests - retrieve promo codes from all_coupons.json
+        Handle @Codes requests - retrieve promo codes from the coupon store
         Provides codes and alternative savings suggestions (like public transport for Uber)
         """
         try:
-            import json
-            
-            # Load all coupons
-            coupon_file = Path("./data/coupons/all_coupons.json")
-            if not coupon_file.exists():
+            # Coupon index rebuilds only when the coupon store's version changes
+            index = coupon_index.refresh()
+            if not index.coupons:
                 return "I don't have access to promo codes right now. Please try again later!"
             
-            with open(coupon_file, 'r') as f:
-                all_coupons = json.load(f)
+            all_coupons = index.coupons
             
             # Extract merchant name from message
             # Remove @Codes and common words
@@ -293,12 +262,7 @@ class MarkAgent(BaseAgent):
             # If no specific merchant mentioned, show all available
             if not message_clean or len(message_clean) < 2:
                 # Group by merchant
-                merchants = {}
-                for coupon in all_coupons:
-                    merchant = coupon['merchant']
-                    if merchant not in merchants:
-                        merchants[merchant] = []
-                    merchants[merchant].append(coupon)
+                merchants = index.group_by_merchant()
                 
                 # Build response
                 prompt = f"""The user requested promo codes using @Codes.
@@ -324,12 +288,8 @@ Keep it concise and well-formatted!"""
                 response = await self.generate_response(prompt, {}, temperature=0.7, max_tokens=600)
                 return response
             
-            # Search for specific merchant
-            merchant_query = message_clean.lower()
-            matching_coupons = [
-                c for c in all_coupons 
-                if merchant_query in c['merchant'].lower() or merchant_query in c['category'].lower()
-            ]
+            # Search for specific merchant (aliases and typos resolved), else category
+            matching_coupons = index.coupons_for(message_clean)
             
             if not matching_coupons:
                 return f"I couldn't find any promo codes for '{message_clean}'. Try asking '@Codes' to see all available codes!"
@@ -413,111 +373,93 @@ Format it nicely with emojis and clear sections!"""
         Analyzes finance news to provide investment recommendations and shopping opportunities
         """
         try:
-            import json
-            from vector_db import VectorDB
-            
-            vector_db = VectorDB()
-            
-            # Load finance news
-            news_file = Path("./data/finance_news/finance_news.json")
-            if not news_file.exists():
+            if not len(news_store.refresh()):
                 return "I don't have access to financial news right now. Please try again later!"
             
-            with open(news_file, 'r') as f:
-                all_news = json.load(f)
-            
-            # Get user's current financial situation
-            current_month = datetime.now().strftime("%Y-%m")
-            
-            # Get budget
-            try:
-                monthly_budget = vector_db.get_budget(user_id, current_month)
-                if not monthly_budget or monthly_budget == 0:
-                    monthly_budget = 3000
-            except:
-                monthly_budget = 3000
-            
-            # Get current month transactions for spending analysis
-            all_txns = vector_db.get_all_transactions()
-            current_month_txns = [
-                txn for txn in all_txns
-                if txn.get('date', '').startswith(current_month)
-            ]
-            
-            total_spent = sum(abs(txn.get('amount', 0)) for txn in current_month_txns)
-            available_for_investment = monthly_budget - total_spent
-            
-            # Analyze news for investment insights
-            investment_news = []
-            shopping_news = []
-            market_trends = []
-            
-            for article in all_news[:50]:  # Analyze recent 50 articles
-                headline = article.get('headline', '').lower()
+            def classify_news(all_news):
+                # Analyze news for investment insights
+                investment_news = []
+                shopping_news = []
+                market_trends = []
                 
-                # Investment-related news
-                if any(word in headline for word in ['401k', 'ira', 'invest', 'stock', 'bond', 'etf', 'fund', 'portfolio', 'market', 'fed', 'interest rate']):
-                    investment_news.append(article)
+                for article in all_news[:50]:  # Analyze recent 50 articles (store is newest first)
+                    headline = article.get('headline', '').lower()
+                    
+                    # Investment-related news
+                    if any(word in headline for word in ['401k', 'ira', 'invest', 'stock', 'bond', 'etf', 'fund', 'portfolio', 'market', 'fed', 'interest rate']):
+                        investment_news.append(article)
+                    
+                    # Shopping/savings opportunities
+                    if any(word in headline for word in ['walmart', 'target', 'costco', 'amazon', 'sale', 'discount', 'seasonal', 'black friday', 'deal']):
+                        shopping_news.append(article)
+                    
+                    # Market trends
+                    if any(word in headline for word in ['trend', 'growth', 'economy', 'inflation', 'recession', 'bull', 'bear']):
+                        market_trends.append(article)
                 
-                # Shopping/savings opportunities
-                if any(word in headline for word in ['walmart', 'target', 'costco', 'amazon', 'sale', 'discount', 'seasonal', 'black friday', 'deal']):
-                    shopping_news.append(article)
-                
-                # Market trends
-                if any(word in headline for word in ['trend', 'growth', 'economy', 'inflation', 'recession', 'bull', 'bear']):
-                    market_trends.append(article)
-            
-            # Get existing savings from credit card optimization
-            cc_analysis = None
-            if current_month_txns:
-                try:
-                    cc_analysis = self.cc_optimizer.analyze_transactions(current_month_txns)
-                except:
-                    pass
+                return investment_news, shopping_news, market_trends
+            
+            def analyze_cards(transactions):
+                # Get existing savings from credit card optimization
+                return self.cc_optimizer.analyze_transactions(transactions) if transactions else None
+            
+            # News classification and the user's financial data are independent - fetch them concurrently
+            graph = FetchGraph("wealth_building")
+            graph.add("all_news", news_store.all)
+            graph.add("news_groups", classify_news, deps=["all_news"], blocking=True)
+            graph.add("snapshot", lambda: self._get_snapshot(user_id), blocking=True)
+            graph.add("cc_analysis", lambda snapshot: analyze_cards(self._current_transactions(snapshot)), deps=["snapshot"], blocking=True, optional=True)
+            results = await graph.run()
+            
+            all_news = results["all_news"]
+            investment_news, shopping_news, market_trends = results["news_groups"]
+            snapshot = results["snapshot"]
+            cc_analysis = results["cc_analysis"]
+            
+            monthly_budget = snapshot.budget_or(3000)
+            total_spent = snapshot.total_spent
+            available_for_investment = monthly_budget - total_spent
             
-            # Build comprehensive prompt
-            prompt = f"""Create a comprehensive WEALTH BUILDING STRATEGY based on current market trends and financial news.
+            # Build comprehensive prompt (headline sections are budgeted and deduplicated)
+            builder = PromptBuilder("wealth_building", query=message)
+            builder.add_text(f"""Create a comprehensive WEALTH BUILDING STRATEGY based on current market trends and financial news.
 
 USER'S FINANCIAL SITUATION:
 - Monthly Budget: ${monthly_budget:.2f}
 - Already Spent: ${total_spent:.2f}
 - Available for Investment: ${available_for_investment:.2f}
-"""
+""")
             
             if cc_analysis:
-                prompt += f"- Potential Monthly Savings (Credit Cards): ${cc_analysis['savings_analysis']['net_savings']/12:.2f}\n"
+                builder.add_text(f"- Potential Monthly Savings (Credit Cards): ${cc_analysis['savings_analysis']['net_savings']/12:.2f}\n")
             
-            prompt += f"""
+            builder.add_text(f"""
 
 CURRENT FINANCIAL NEWS ANALYSIS ({len(all_news)} articles analyzed):
-
-INVESTMENT INSIGHTS ({len(investment_news)} relevant articles):
-"""
-            for article in investment_news[:5]:
-                prompt += f"• {article['headline']}\n"
-            
-            prompt += f"""
-
-SHOPPING OPPORTUNITIES ({len(shopping_news)} relevant articles):
-"""
-            for article in shopping_news[:5]:
-                prompt += f"• {article['headline']}\n"
-            
-            prompt += f"""
-
-MARKET TRENDS ({len(market_trends)} relevant articles):
-"""
-            for article in market_trends[:5]:
-                prompt += f"• {article['headline']}\n"
-            
-            prompt += f"""
-
-ALL RECENT NEWS HEADLINES (for context):
-"""
-            for i, article in enumerate(all_news[:20], 1):
-                prompt += f"{i}. {article['headline']}\n"
+""")
+            news_sections = [
+                ("investment_news", "INVESTMENT INSIGHTS", investment_news),
+                ("shopping_news", "SHOPPING OPPORTUNITIES", shopping_news),
+                ("market_trends", "MARKET TRENDS", market_trends)
+            ]
+            for name, title, articles in news_sections:
+                header = f"\n{title} ({len(articles)} relevant articles):\n"
+                builder.add_section(
+                    name,
+                    header,
+                    [f"• {article['headline']}" for article in articles[:15]],
+                    budget=160,
+                    empty_text=header
+                )
+            
+            builder.add_section(
+                "recent_headlines",
+                "\n\nALL RECENT NEWS HEADLINES (for context):\n",
+                [f"• {article['headline']}" for article in all_news[:30]],
+                budget=350
+            )
             
-            prompt += f"""
+            builder.add_text(f"""
 
 Create a comprehensive wealth-building response that includes:
 
@@ -580,8 +522,9 @@ Make it:
 - Comprehensive (covers all aspects of wealth building)
 - Encouraging (motivational but honest)
 
-Format with clear sections, emojis, and bullet points for readability!"""
+Format with clear sections, emojis, and bullet points for readability!""")
 
+            prompt = builder.build()
             response = await self.generate_response(prompt, {}, temperature=0.7, max_tokens=1200)
             
             return response
@@ -598,10 +541,6 @@ Format with clear sections, emojis, and bullet points for readability!"""
             return "My finance news tracker is currently offline. Let me help you with something else!"
 
         try:
-            # Check if news exists in finance_news.json
-            news_file = Path("./data/finance_news/finance_news.json")
-            news_exist = news_file.exists() and len(self.bounty_hunter_2.news_articles) > 0
-
             # Set status to Running
             self.redis_cache.set_agent_status("bounty_hunter_2", "Running")
 
@@ -627,9 +566,8 @@ Format with clear sections, emojis, and bullet points for readability!"""
         try:
             import sys
             sys.path.append(str(Path(__file__).parent.parent))
-            from vector_db import VectorDB
 
-            vector_db = VectorDB()
+            vector_db = self._get_vector_db()
 
             # Get recent budget
             current_month = datetime.now().strftime("%Y-%m")
@@ -674,9 +612,8 @@ Be conversational and friendly (like a helpful financial advisor friend)."""
         """
         try:
             import re
-            from vector_db import VectorDB
             
-            vector_db = VectorDB()
+            snapshot = await asyncio.to_thread(self._get_snapshot, user_id)
             
             # Extract product name and price from message
             # Look for price in parentheses first: ($249) or ($249.99)
@@ -693,46 +630,17 @@ Be conversational and friendly (like a helpful financial advisor friend)."""
             else:
                 product_name = "AirPods Pro 2"
             
-            # Get current month budget
-            current_month = datetime.now().strftime("%Y-%m")
-            try:
-                monthly_budget = vector_db.get_budget(user_id, current_month)
-                if monthly_budget is None or monthly_budget == 0:
-                    monthly_budget = 3000  # Default budget
-            except:
-                monthly_budget = 3000  # Default budget if not set
-            
-            # Get current month transactions
-            all_txns = vector_db.get_all_transactions()
-            current_month_txns = [
-                txn for txn in all_txns
-                if txn.get('date', '').startswith(current_month)
-            ]
-            
-            # Calculate total spent this month
-            total_spent = sum(abs(txn.get('amount', 0)) for txn in current_month_txns)
+            # Current month budget and spending from the snapshot
+            monthly_budget = snapshot.budget_or(3000)  # Default budget if not set
+            total_spent = snapshot.total_spent
             available_budget = monthly_budget - total_spent
             
             # Rule of thumb: Purchase should be less than 10% of available budget
             safe_purchase_limit = available_budget * 0.10
             can_afford = product_price <= safe_purchase_limit
             
-            # Get category breakdown for savings suggestions
-            category_spending = {}
-            for txn in current_month_txns:
-                category = txn.get('category', 'Other')
-                # Handle if category is a list (take first element)
-                if isinstance(category, list):
-                    category = category[0] if category else 'Other'
-                # Ensure category is a string
-                category = str(category) if category else 'Other'
-                amount = abs(txn.get('amount', 0))
-                if category not in category_spending:
-                    category_spending[category] = 0
-                category_spending[category] += amount
-            
-            # Sort categories by spending
-            top_categories = sorted(category_spending.items(), key=lambda x: x[1], reverse=True)[:5]
+            # Top categories by spending for savings suggestions
+            top_categories = [(category, data['total']) for category, data in snapshot.top_categories(5)]
             
             # Calculate financing options
             financing_6_months = product_price / 6
@@ -832,10 +740,9 @@ Be supportive and helpful, not judgmental!"""
     async def _handle_transaction_analysis(self, user_id: str, message: str) -> str:
         """Analyze user's transaction patterns using RAG"""
         try:
-            from vector_db import VectorDB
             from embedding_service import EmbeddingService
 
-            vector_db = VectorDB()
+            vector_db = self._get_vector_db()
             embedding_service = EmbeddingService()
 
             # Determine time range from message
@@ -920,9 +827,7 @@ Be specific and helpful!"""
         Automatically fetches relevant financial data based on the query
         """
         try:
-            from vector_db import VectorDB
-            
-            vector_db = VectorDB()
+            snapshot = await asyncio.to_thread(self._get_snapshot, user_id)
             message_lower = message.lower()
             
             # Initialize data context
@@ -930,52 +835,19 @@ Be specific and helpful!"""
             
             # 1. Check if query is about spending/transactions
             if any(word in message_lower for word in ['spending', 'spent', 'transaction', 'category', 'other', 'review', 'analyze']):
-                # Get current month transactions
-                current_month = datetime.now().strftime("%Y-%m")
-                all_txns = vector_db.get_all_transactions()
-                current_month_txns = [
-                    txn for txn in all_txns
-                    if txn.get('date', '').startswith(current_month)
-                ]
-                
-                # Calculate category breakdown
-                category_spending = {}
-                for txn in current_month_txns:
-                    category = txn.get('category', 'Other')
-                    if isinstance(category, list):
-                        category = category[0] if category else 'Other'
-                    category = str(category) if category else 'Other'
-                    amount = abs(txn.get('amount', 0))
-                    if category not in category_spending:
-                        category_spending[category] = {'total': 0, 'count': 0, 'transactions': []}
-                    category_spending[category]['total'] += amount
-                    category_spending[category]['count'] += 1
-                    category_spending[category]['transactions'].append({
-                        'description': txn.get('description', 'Unknown'),
-                        'amount': amount,
-                        'date': txn.get('date', '')
-                    })
-                
-                # Sort by spending
-                sorted_categories = sorted(category_spending.items(), key=lambda x: x[1]['total'], reverse=True)
-                
                 data_context['has_transaction_data'] = True
-                data_context['total_spent'] = sum(cat['total'] for cat in category_spending.values())
-                data_context['category_breakdown'] = sorted_categories
-                data_context['transaction_count'] = len(current_month_txns)
+                data_context['total_spent'] = snapshot.total_spent
+                data_context['category_breakdown'] = snapshot.top_categories()
+                data_context['transaction_count'] = snapshot.transaction_count
             
             # 2. Check if query is about budget
             if any(word in message_lower for word in ['budget', 'afford', 'money left', 'remaining']):
-                current_month = datetime.now().strftime("%Y-%m")
-                try:
-                    monthly_budget = vector_db.get_budget(user_id, current_month)
-                    if monthly_budget and monthly_budget > 0:
-                        data_context['has_budget'] = True
-                        data_context['monthly_budget'] = monthly_budget
-                        if 'total_spent' in data_context:
-                            data_context['remaining_budget'] = monthly_budget - data_context['total_spent']
-                except:
-                    pass
+                monthly_budget = snapshot.monthly_budget
+                if monthly_budget and monthly_budget > 0:
+                    data_context['has_budget'] = True
+                    data_context['monthly_budget'] = monthly_budget
+                    if 'total_spent' in data_context:
+                        data_context['remaining_budget'] = monthly_budget - data_context['total_spent']
             
             # 3. Check if query is about specific category (like "Other")
             specific_category = None
@@ -993,56 +865,79 @@ Be specific and helpful!"""
                         data_context['specific_category_data'] = cat_data
                         break
             
-            # Build conversation context
+            builder = PromptBuilder("general", query=message)
+
+            # Build conversation context (most recent turns first, long answers trimmed)
             recent_history = conversation_history[-5:] if len(conversation_history) > 5 else conversation_history
-            history_text = "\n".join([
-                f"{msg.get('role', 'user')}: {msg.get('content', '')}"
-                for msg in recent_history
-            ])
+            builder.add_section(
+                "history",
+                "Previous conversation:\n",
+                [
+                    f"{msg.get('role', 'user')}: {truncate_tokens(str(msg.get('content', '')), 150)}"
+                    for msg in recent_history
+                ],
+                budget=600,
+                weights=list(range(1, len(recent_history) + 1)),
+                dedupe=False,
+                empty_text="Previous conversation:\n"
+            )
             
             # Build enhanced prompt with actual data
-            prompt = f"""Previous conversation:
-{history_text}
-
+            builder.add_text(f"""
 User's new message: "{message}"
 
-AVAILABLE FINANCIAL DATA:"""
+AVAILABLE FINANCIAL DATA:""")
 
             if data_context.get('has_transaction_data'):
-                prompt += f"""
+                builder.add_text(f"""
 
 SPENDING ANALYSIS (Current Month):
 - Total Spent: ${data_context['total_spent']:.2f}
 - Number of Transactions: {data_context['transaction_count']}
 
-TOP SPENDING CATEGORIES:
-"""
-                for cat_name, cat_data in data_context['category_breakdown'][:5]:
-                    prompt += f"- {cat_name}: ${cat_data['total']:.2f} ({cat_data['count']} transactions)\n"
+""")
+                builder.add_section(
+                    "top_categories",
+                    "TOP SPENDING CATEGORIES:\n",
+                    [
+                        f"- {cat_name}: ${cat_data['total']:.2f} ({cat_data['count']} transactions)"
+                        for cat_name, cat_data in data_context['category_breakdown'][:5]
+                    ],
+                    budget=150
+                )
             
             if data_context.get('specific_category'):
                 cat_data = data_context['specific_category_data']
-                prompt += f"""
+                builder.add_text(f"""
 
 DETAILED BREAKDOWN FOR "{data_context['specific_category']}":
 - Total: ${cat_data['total']:.2f}
 - Transactions: {cat_data['count']}
 
-Recent transactions in this category:
-"""
-                for txn in cat_data['transactions'][:10]:  # Show up to 10 recent
-                    prompt += f"  • {txn['date']}: {txn['description']} - ${txn['amount']:.2f}\n"
+""")
+                # Largest and most query-relevant transactions win the budget
+                builder.add_section(
+                    "category_transactions",
+                    "Largest transactions in this category:\n",
+                    [
+                        f"  • {txn['date']}: {txn['description']} - ${txn['amount']:.2f}"
+                        for txn in cat_data['top_transactions']
+                    ],
+                    budget=300,
+                    weights=[txn['amount'] for txn in cat_data['top_transactions']],
+                    dedupe=False
+                )
             
             if data_context.get('has_budget'):
-                prompt += f"""
+                builder.add_text(f"""
 
 BUDGET INFORMATION:
 - Monthly Budget: ${data_context['monthly_budget']:.2f}
-"""
+""")
                 if 'remaining_budget' in data_context:
-                    prompt += f"- Remaining: ${data_context['remaining_budget']:.2f}\n"
+                    builder.add_text(f"- Remaining: ${data_context['remaining_budget']:.2f}\n")
             
-            prompt += f"""
+            builder.add_text(f"""
 
 As MARK, the personal finance AI assistant, provide a helpful response that:
 1. Uses the ACTUAL DATA above to give specific, actionable advice
@@ -1053,12 +948,14 @@ As MARK, the personal finance AI assistant, provide a helpful response that:
 
 If they're asking about a specific category (like "Other"), analyze the transactions in that category and provide specific recommendations.
 
-Available capabilities: {', '.join(self.capabilities)}"""
+Available capabilities: {', '.join(self.capabilities)}""")
+
+            prompt = builder.build()
 
+            # History and figures are already in the prompt - keep the system context compact
             context = {
                 "user_id": user_id,
-                "conversation_history": history_text,
-                "data_context": data_context
+                "transaction_count": data_context.get('transaction_count', 0)
             }
 
             response = await self.generate_response(prompt, context, temperature=0.7, max_tokens=800)
@@ -1085,54 +982,58 @@ Available capabilities: {', '.join(self.capabilities)}"""
         3. Generate investment portfolio breakdown
         """
         try:
-            from vector_db import VectorDB
-
-            vector_db = VectorDB()
-
-            # Check cache first
-            cached_analysis = self.redis_cache.get_savings_analysis(user_id)
+            # A cached analysis answers on its own - no need to fetch any transactions
+            cached_analysis = await asyncio.to_thread(self._cached_savings_analysis, user_id)
             if cached_analysis:
                 return await self._format_savings_response(cached_analysis, from_cache=True)
 
-            # Get current month transactions (use Redis cache if available)
-            current_month_txns = self.redis_cache.get_current_month_transactions(user_id)
-            
-            if not current_month_txns:
-                # Get from RAG service
-                current_month_txns = self.rag_service.get_current_month_transactions()
-                
+            def pick_transactions(redis_txns, rag_txns):
+                current_month_txns = redis_txns or rag_txns
                 if not current_month_txns:
-                    # Fallback to vector DB
-                    all_txns = vector_db.get_all_transactions()
-                    current_month = datetime.now().strftime('%Y-%m')
-                    current_month_txns = [
-                        txn for txn in all_txns
-                        if txn.get('date', '').startswith(current_month)
-                    ]
-                
+                    # Fallback to the vector DB snapshot
+                    current_month_txns = self._current_transactions(self._get_snapshot(user_id))
                 # Cache for future use
-                if current_month_txns:
+                if current_month_txns and not redis_txns:
                     self.redis_cache.cache_current_month_transactions(user_id, current_month_txns)
-
-            if not current_month_txns:
+                return current_month_txns
+
+            def analyze_cards(transactions):
+                return self.cc_optimizer.analyze_transactions(transactions) if transactions else None
+
+            def estimate_coupon_savings(cc_analysis):
+                # Assume 5-10% savings on dining/shopping categories
+                if not cc_analysis:
+                    return 0
+                coupon_categories = ['Dining', 'Shopping', 'Groceries']
+                return sum(
+                    cc_analysis['category_spending'].get(cat, {}).get('total', 0) * 0.075
+                    for cat in coupon_categories
+                )
+
+            def build_portfolio(cc_analysis, coupon_savings):
+                if not cc_analysis:
+                    return None
+                return self.investment_advisor.generate_savings_to_wealth_plan(
+                    credit_card_savings=cc_analysis['savings_analysis'],
+                    coupon_savings=coupon_savings
+                )
+
+            # Cache miss: transaction sources run concurrently; analysis steps follow
+            graph = FetchGraph("savings_optimization")
+            graph.add("redis_txns", lambda: self.redis_cache.get_current_month_transactions(user_id), blocking=True)
+            graph.add("rag_txns", self.rag_service.get_current_month_transactions, blocking=True, optional=True)
+            graph.add("transactions", pick_transactions, deps=["redis_txns", "rag_txns"], blocking=True)
+            graph.add("cc_analysis", analyze_cards, deps=["transactions"], blocking=True)
+            graph.add("coupon_savings", estimate_coupon_savings, deps=["cc_analysis"])
+            graph.add("portfolio", build_portfolio, deps=["cc_analysis", "coupon_savings"], blocking=True)
+            results = await graph.run()
+
+            if not results["transactions"]:
                 return "I need some transaction data to analyze your savings potential. Please connect your bank account or add some transactions first!"
 
-            # 1. Credit Card Optimization
-            cc_analysis = self.cc_optimizer.analyze_transactions(current_month_txns)
-
-            # 2. Estimate coupon savings (simplified - could be enhanced)
-            # Assume 5-10% savings on dining/shopping categories
-            coupon_categories = ['Dining', 'Shopping', 'Groceries']
-            coupon_savings_monthly = sum(
-                cc_analysis['category_spending'].get(cat, {}).get('total', 0) * 0.075
-                for cat in coupon_categories
-            )
-
-            # 3. Generate investment portfolio
-            portfolio = self.investment_advisor.generate_savings_to_wealth_plan(
-                credit_card_savings=cc_analysis['savings_analysis'],
-                coupon_savings=coupon_savings_monthly
-            )
+            cc_analysis = results["cc_analysis"]
+            coupon_savings_monthly = results["coupon_savings"]
+            portfolio = results["portfolio"]
 
             # Combine analysis
             complete_analysis = {
@@ -1154,6 +1055,13 @@ Available capabilities: {', '.join(self.capabilities)}"""
             traceback.print_exc()
             return "I encountered an error while analyzing your savings potential. Please try again!"
 
+    def _cached_savings_analysis(self, user_id: str) -> Optional[Dict]:
+        """Cached savings analysis, unless it predates the current analysis format"""
+        cached = self.redis_cache.get_savings_analysis(user_id)
+        if cached and (cached.get('credit_card_analysis') or {}).get('version') == ANALYSIS_VERSION:
+            return cached
+        return None
+
     async def _format_savings_response(self, analysis: Dict, from_cache: bool = False) -> str:
         """Format savings optimization analysis into a comprehensive response"""
         try:
@@ -1251,7 +1159,7 @@ Make it exciting and motivating! Show them how small optimizations lead to wealt
 
     def get_conversation_history(self, user_id: str) -> List[Dict]:
         """Get conversation history for a user"""
-        return self.conversations.get(user_id, [])
+        return self.conversations.get(user_id, create=False) or []
 
     async def _handle_polymarket_analysis(self, user_id: str, message: str) -> str:
         """
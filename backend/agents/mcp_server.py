@@ -3,11 +3,16 @@ MCP (Model Context Protocol) Server
 Orchestrates communication between agents and routes requests
 """
 
+import os
+import time
 import asyncio
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple
 from datetime import datetime
 import json
 
+from .work_queue import AgentWorkQueue, MCPOverloadedError, QueueSlot
+from .session_store import SessionStore
+
 
 class MCPServer:
     """
@@ -17,66 +22,97 @@ class MCPServer:
 
     def __init__(self):
         self.agents: Dict[str, Any] = {}
-        self.sessions: Dict[str, Dict[str, Any]] = {}
-        self.message_queue: asyncio.Queue = asyncio.Queue()
+        # Idle sessions are evicted (and spilled to Redis) instead of kept forever
+        self.sessions = SessionStore("mcp")
+        # Per-agent admission queues (bounded in-flight work, fair across users)
+        self.queues: Dict[str, AgentWorkQueue] = {}
         self.is_running = False
 
         print("🚀 MCP Server initialized")
 
-    def register_agent(self, agent_id: str, agent_instance: Any):
+    def register_agent(self, agent_id: str, agent_instance: Any, max_in_flight: Optional[int] = None):
         """Register an agent with the MCP server"""
         self.agents[agent_id] = {
             "instance": agent_instance,
             "registered_at": datetime.now(),
             "message_count": 0
         }
+        self.queues[agent_id] = AgentWorkQueue(
+            agent_id,
+            max_in_flight=max_in_flight or int(os.getenv("MCP_MAX_IN_FLIGHT", "8")),
+            max_queue=int(os.getenv("MCP_MAX_QUEUE", "64")),
+            max_queue_per_user=int(os.getenv("MCP_MAX_QUEUE_PER_USER", "4")),
+            max_wait_seconds=float(os.getenv("MCP_MAX_QUEUE_WAIT_SECONDS", "30"))
+        )
         print(f"✅ Agent registered: {agent_id}")
 
     def unregister_agent(self, agent_id: str):
         """Unregister an agent"""
         if agent_id in self.agents:
             del self.agents[agent_id]
+            self.queues.pop(agent_id, None)
             print(f"❌ Agent unregistered: {agent_id}")
 
+    def _touch_session(self, user_id: str) -> Dict[str, Any]:
+        """Create or retrieve the user's session and record activity"""
+        session = self.sessions.get(user_id)
+        now = datetime.now().isoformat()
+        session.setdefault("created_at", now)
+        session.setdefault("message_count", 0)
+        session["last_activity"] = now
+        session["message_count"] += 1
+        return session
+
+    def _resolve_agent(self, target_agent: Optional[str]) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Determine which agent should handle a request"""
+        if target_agent and target_agent in self.agents:
+            agent_id = target_agent
+        else:
+            # Default to MARK agent for orchestration
+            agent_id = "mark"
+
+        return agent_id, self.agents.get(agent_id)
+
+    async def admit(self, user_id: str, target_agent: Optional[str] = None) -> QueueSlot:
+        """
+        Wait for an in-flight slot on the target agent
+        Raises MCPOverloadedError when its queue is full - callers map it to HTTP 429
+        """
+        agent_id, _ = self._resolve_agent(target_agent)
+        queue = self.queues.get(agent_id)
+        return await queue.acquire(user_id) if queue else QueueSlot()
+
+    def _agent_unavailable(self, agent_id: str) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": f"Agent '{agent_id}' not available",
+            "agent": None,
+            "response": "I apologize, but the requested agent is not available right now."
+        }
+
     async def route_request(
         self,
         user_id: str,
         message: str,
         conversation_history: Optional[List[Dict[str, Any]]] = None,
-        target_agent: Optional[str] = None
+        target_agent: Optional[str] = None,
+        slot: Optional[QueueSlot] = None
     ) -> Dict[str, Any]:
         """
         Route a user request to the appropriate agent(s)
+        Waits for a queue slot unless the caller already holds one (from admit)
         """
-        # Create or retrieve session
-        if user_id not in self.sessions:
-            self.sessions[user_id] = {
-                "created_at": datetime.now(),
-                "last_activity": datetime.now(),
-                "message_count": 0
-            }
-
-        session = self.sessions[user_id]
-        session["last_activity"] = datetime.now()
-        session["message_count"] += 1
+        if slot is None:
+            slot = await self.admit(user_id, target_agent)
 
-        # Determine which agent should handle this
-        if target_agent and target_agent in self.agents:
-            agent_id = target_agent
-        else:
-            # Default to MARK agent for orchestration
-            agent_id = "mark"
+        session = self._touch_session(user_id)
+        agent_id, agent_info = self._resolve_agent(target_agent)
 
         # Get the agent instance
-        if agent_id not in self.agents:
-            return {
-                "success": False,
-                "error": f"Agent '{agent_id}' not available",
-                "agent": None,
-                "response": "I apologize, but the requested agent is not available right now."
-            }
+        if agent_info is None:
+            slot.release()
+            return self._agent_unavailable(agent_id)
 
-        agent_info = self.agents[agent_id]
         agent = agent_info["instance"]
 
         # Process the request
@@ -106,6 +142,146 @@ class MCPServer:
                 "agent": agent_id,
                 "response": f"I encountered an error while processing your request: {str(e)}"
             }
+        finally:
+            slot.release()
+
+    async def route_request_stream(
+        self,
+        user_id: str,
+        message: str,
+        conversation_history: Optional[List[Dict[str, Any]]] = None,
+        target_agent: Optional[str] = None,
+        slot: Optional[QueueSlot] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Route a user request and stream the agent's response
+        Yields {"type": "token", "text"} events, then one "done" (or "error") event
+        Pass a slot from admit() to get overload errors before the stream starts
+        """
+        if slot is None:
+            slot = await self.admit(user_id, target_agent)
+
+        session = self._touch_session(user_id)
+        agent_id, agent_info = self._resolve_agent(target_agent)
+
+        if agent_info is None:
+            slot.release()
+            yield {"type": "error", **self._agent_unavailable(agent_id)}
+            return
+
+        agent = agent_info["instance"]
+
+        try:
+            async for event in agent.process_request_stream({
+                "user_id": user_id,
+                "message": message,
+                "conversation_history": conversation_history or [],
+                "session": session
+            }):
+                if event["type"] == "token":
+                    yield event
+                    continue
+
+                result = event["result"]
+                agent_info["message_count"] += 1
+
+                yield {
+                    "type": "done",
+                    "success": True,
+                    "agent": agent_id,
+                    "response": result.get("response", ""),
+                    "data": result.get("data", {}),
+                    "timestamp": datetime.now().isoformat()
+                }
+
+        except Exception as e:
+            print(f"❌ Error streaming request with {agent_id}: {e}")
+            yield {
+                "type": "error",
+                "success": False,
+                "error": str(e),
+                "agent": agent_id,
+                "response": f"I encountered an error while processing your request: {str(e)}"
+            }
+        finally:
+            slot.release()
+
+    async def _call_agent(self, user_id: str, label: str, sub_request: Dict[str, Any], timings: Dict[str, float]) -> Dict[str, Any]:
+        """One fan-out branch: admit through the agent's queue, then process"""
+        started = time.perf_counter()
+        target = sub_request.get("agent")
+        agent_id, agent_info = self._resolve_agent(target)
+        if agent_info is None or (target and target != agent_id):
+            raise ValueError(f"Agent '{target}' is not available")
+
+        slot = await self.admit(user_id, agent_id)
+        try:
+            agent_info["message_count"] += 1
+            request = {k: v for k, v in sub_request.items() if k != "agent"}
+            return await agent_info["instance"].process_request({**request, "user_id": user_id})
+        finally:
+            slot.release()
+            timings[label] = round((time.perf_counter() - started) * 1000, 1)
+
+    async def fan_out(
+        self,
+        user_id: str,
+        sub_requests: Dict[str, Dict[str, Any]],
+        deadline_seconds: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Dispatch sub-requests to several agents concurrently and merge what returns in time
+
+        Args:
+            user_id: User the sub-requests run for
+            sub_requests: label -> {"agent": agent_id, "message": ..., other request fields}
+            deadline_seconds: Overall budget; branches still running then are cancelled
+
+        Returns results by label plus which branches failed or timed out ("partial" if any did)
+        """
+        if deadline_seconds is None:
+            deadline_seconds = float(os.getenv("MCP_FAN_OUT_DEADLINE_SECONDS", "8"))
+        self._touch_session(user_id)
+
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        tasks = {
+            asyncio.create_task(self._call_agent(user_id, label, sub_request, timings)): label
+            for label, sub_request in sub_requests.items()
+        }
+
+        done, pending = await asyncio.wait(tasks, timeout=deadline_seconds) if tasks else (set(), set())
+
+        # Stragglers are cancelled rather than left holding queue slots
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results: Dict[str, Any] = {}
+        failed: Dict[str, str] = {}
+        for task in done:
+            label = tasks[task]
+            if task.exception() is not None:
+                failed[label] = str(task.exception())
+                print(f"⚠️ Fan-out branch '{label}' failed: {task.exception()}")
+            else:
+                results[label] = task.result()
+
+        timed_out = sorted(tasks[task] for task in pending)
+        if timed_out:
+            print(f"⏱️ Fan-out deadline ({deadline_seconds}s) cut off: {', '.join(timed_out)}")
+
+        return {
+            "success": bool(results),
+            "partial": bool(failed or timed_out),
+            "results": results,
+            "failed": failed,
+            "timed_out": timed_out,
+            "timings_ms": timings,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "timestamp": datetime.now().isoformat()
+        }
 
     async def broadcast_to_agents(self, message: Dict[str, Any], exclude: Optional[List[str]] = None):
         """Broadcast a message to all agents (or subset)"""
@@ -127,6 +303,7 @@ class MCPServer:
             "is_running": self.is_running,
             "active_agents": len(self.agents),
             "active_sessions": len(self.sessions),
+            "sessions": self.sessions.get_stats(),
             "agents": {
                 agent_id: {
                     "message_count": info["message_count"],
@@ -134,7 +311,8 @@ class MCPServer:
                     "status": info["instance"].get_status()
                 }
                 for agent_id, info in self.agents.items()
-            }
+            },
+            "queues": {agent_id: queue.get_stats() for agent_id, queue in self.queues.items()}
         }
 
     async def start(self):
@@ -0,0 +1,216 @@
+"""
+Semantic News Ranking for BountyHunter2
+Articles are embedded once into a FAISS inner-product index as they are stored;
+each user's interest vector is a spend-weighted mix of category embeddings, so
+personalized top-k is a single vector search
+"""
+
+import re
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import faiss
+
+from .news_store import news_store
+
+# What spending in each classified category makes a reader care about
+CATEGORY_INTERESTS = {
+    "food_dining": "restaurants, dining, food delivery and consumer spending",
+    "groceries": "grocery prices, food inflation, supermarkets and retail",
+    "transportation": "gas prices, oil, airlines, ride sharing and the auto industry",
+    "shopping": "retail sales, e-commerce, Amazon, Walmart and consumer demand",
+    "entertainment": "streaming, media, gaming and entertainment companies",
+    "bills_utilities": "utility bills, energy prices, telecom and internet providers",
+    "health_fitness": "healthcare costs, pharmacies, insurance and biotech",
+    "emi_loans": "interest rates, mortgages, loans and the Federal Reserve",
+    "credit_cards": "credit card rates, consumer debt and banking",
+    "fun_leisure": "travel, hotels, airlines and leisure spending",
+    "technology": "technology stocks, software and semiconductors"
+}
+
+# Categories that say nothing about interests
+_SKIP_CATEGORIES = {"income", "other"}
+
+
+def category_key(category: str) -> str:
+    """"Food & Dining" -> "food_dining" """
+    return re.sub(r"[^a-z0-9]+", "_", category.lower()).strip("_")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype='float32')
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+class NewsRanker:
+    """Vector index over the news store plus cached per-user interest vectors"""
+
+    def __init__(self, store, index_dir: Path, query_weight: float = 0.6):
+        self.store = store
+        self.index_dir = Path(index_dir)
+        self.query_weight = query_weight
+        self.encoder = None
+
+        self._lock = threading.Lock()
+        self._index = None
+        self._ids: Dict[int, str] = {}
+        self._vector_of: Dict[str, int] = {}
+        self._next_id = 0
+        self._store_version: Any = None
+        self._category_vectors: Dict[str, np.ndarray] = {}
+        # user_id -> (snapshot version, interest vector, top categories)
+        self._interests: Dict[str, Tuple[str, Optional[np.ndarray], List[str]]] = {}
+        self.stats = {"embedded": 0, "removed": 0, "searches": 0, "interest_builds": 0, "interest_hits": 0}
+
+    def attach_encoder(self, encoder):
+        """Use a sentence encoder (the VectorDB's MiniLM) and load any saved article vectors"""
+        with self._lock:
+            self.encoder = encoder
+            self._load()
+
+    # ---------- article index ----------
+
+    def _paths(self) -> Tuple[Path, Path]:
+        return self.index_dir / "news.index", self.index_dir / "news_ids.json"
+
+    def _load(self):
+        index_path, ids_path = self._paths()
+        if index_path.exists() and ids_path.exists():
+            try:
+                self._index = faiss.read_index(str(index_path))
+                with open(ids_path, 'r') as f:
+                    saved = json.load(f)
+                self._ids = {int(k): v for k, v in saved["ids"].items()}
+                self._vector_of = {v: k for k, v in self._ids.items()}
+                self._next_id = saved["next_id"]
+                return
+            except Exception as e:
+                print(f"⚠️ Error loading news index, rebuilding: {e}")
+
+        dimension = self.encoder.get_sentence_embedding_dimension() if hasattr(
+            self.encoder, "get_sentence_embedding_dimension") else 384
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dimension))
+        self._ids, self._vector_of, self._next_id = {}, {}, 0
+
+    def _save(self):
+        index_path, ids_path = self._paths()
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self._index, str(index_path))
+        with open(ids_path, 'w') as f:
+            json.dump({"ids": self._ids, "next_id": self._next_id}, f)
+
+    def sync(self) -> int:
+        """Embed articles new to the store and drop pruned ones; cheap when nothing changed"""
+        if self.encoder is None:
+            return 0
+
+        with self._lock:
+            if self._store_version == self.store.version:
+                return 0
+
+            articles = self.store.articles
+            stale = [vid for aid, vid in self._vector_of.items() if aid not in articles]
+            if stale:
+                self._index.remove_ids(np.array(stale, dtype='int64'))
+                for vid in stale:
+                    del self._vector_of[self._ids.pop(vid)]
+                self.stats["removed"] += len(stale)
+
+            new = [a for aid, a in list(articles.items()) if aid not in self._vector_of]
+            if new:
+                texts = [f"{a.get('headline', '')}. {a.get('summary', '') or ''}".strip() for a in new]
+                vectors = _normalize(self.encoder.encode(texts, batch_size=64))
+                vector_ids = np.arange(self._next_id, self._next_id + len(new), dtype='int64')
+                self._index.add_with_ids(vectors, vector_ids)
+                for article, vid in zip(new, vector_ids.tolist()):
+                    self._ids[vid] = article["id"]
+                    self._vector_of[article["id"]] = vid
+                self._next_id += len(new)
+                self.stats["embedded"] += len(new)
+
+            if new or stale:
+                self._save()
+            self._store_version = self.store.version
+            return len(new)
+
+    # ---------- user interests ----------
+
+    def _category_vector(self, key: str) -> np.ndarray:
+        vector = self._category_vectors.get(key)
+        if vector is None:
+            text = CATEGORY_INTERESTS.get(key, key.replace("_", " "))
+            vector = _normalize(self.encoder.encode([f"News about {text}"]))[0]
+            self._category_vectors[key] = vector
+        return vector
+
+    def interest_vector(self, user_id: str, snapshot) -> Tuple[Optional[np.ndarray], List[str]]:
+        """Spend-weighted mix of the user's category embeddings (rebuilt only when the snapshot moves)"""
+        cached = self._interests.get(user_id)
+        if cached and cached[0] == snapshot.version:
+            self.stats["interest_hits"] += 1
+            return cached[1], cached[2]
+
+        weights: Dict[str, float] = {}
+        for category, entry in snapshot.classified_stats.items():
+            key = category_key(category)
+            if key not in _SKIP_CATEGORIES and entry.get('amount', 0) > 0:
+                weights[key] = weights.get(key, 0.0) + entry['amount']
+
+        top = sorted(weights, key=weights.get, reverse=True)
+        vector = None
+        if weights:
+            total = sum(weights.values())
+            vector = sum(self._category_vector(key) * (weights[key] / total) for key in top)
+            vector = _normalize(vector.reshape(1, -1))[0]
+
+        self._interests[user_id] = (snapshot.version, vector, top)
+        self.stats["interest_builds"] += 1
+        return vector, top
+
+    # ---------- ranking ----------
+
+    def rank(self, query: str, interest: Optional[np.ndarray] = None, k: int = 10) -> List[Dict[str, Any]]:
+        """Top-k articles for the query blended with the user's interest vector"""
+        if self.encoder is None:
+            return []
+        self.sync()
+
+        parts = []
+        if query and query.strip():
+            parts.append((self.query_weight, _normalize(self.encoder.encode([query]))[0]))
+        if interest is not None:
+            parts.append((1 - self.query_weight if parts else 1.0, interest))
+        if not parts:
+            return []
+
+        target = _normalize(sum(weight * vector for weight, vector in parts).reshape(1, -1))
+
+        with self._lock:
+            if self._index.ntotal == 0:
+                return []
+            scores, vector_ids = self._index.search(target, min(k, self._index.ntotal))
+            ids = [(self._ids.get(vid), score) for vid, score in zip(vector_ids[0].tolist(), scores[0].tolist())]
+
+        self.stats["searches"] += 1
+        results = []
+        for article_id, score in ids:
+            article = self.store.articles.get(article_id) if article_id else None
+            if article:
+                results.append({**article, "relevance_score": round(float(score), 4)})
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.encoder is not None,
+            "indexed": self._index.ntotal if self._index is not None else 0,
+            "users": len(self._interests)
+        }
+
+
+# Global ranker over the shared news store (enabled once an encoder is attached)
+news_ranker = NewsRanker(news_store, Path("./data/finance_news"))
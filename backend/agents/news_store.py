@@ -0,0 +1,337 @@
+"""
+Finance News Store for BountyHunter2
+Articles bucketed by scrape day (retention drops whole buckets), deduplicated by URL
+and headline simhash, with an inverted index for keyword and category lookups
+One in-memory view shared by the agent, MARK and the API
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "for", "to", "of", "on", "in", "at", "with", "is", "are", "as",
+    "by", "its", "it", "be", "from", "this", "that", "what", "how", "why", "my", "me", "i", "any",
+    "about", "latest", "news", "today", "show", "tell", "give", "whats", "s"
+}
+
+# Headlines within this many differing simhash bits are treated as the same story
+SIMHASH_DISTANCE = 3
+_BANDS = 4  # 64 bits in 4 bands of 16 - near duplicates share at least one band exactly
+_BAND_BITS = 64 // _BANDS
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def simhash(text: str) -> int:
+    """64-bit simhash over headline words and word pairs"""
+    words = _TOKEN_RE.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+
+    weights = [0] * 64
+    for feature in features:
+        h = int.from_bytes(hashlib.md5(feature.encode('utf-8')).digest()[:8], 'big')
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def _bands(fingerprint: int) -> List[Tuple[int, int]]:
+    mask = (1 << _BAND_BITS) - 1
+    return [(band, fingerprint >> (band * _BAND_BITS) & mask) for band in range(_BANDS)]
+
+
+def _normalize_url(url: Optional[str]) -> Optional[str]:
+    """Drop query strings/fragments (tracking params) and trailing slashes"""
+    if not url:
+        return None
+    return re.split(r"[?#]", url, 1)[0].rstrip("/").lower()
+
+
+class NewsStore:
+    """Indexed, day-bucketed finance news"""
+
+    def __init__(self, news_file: Path, retention_days: int = 30):
+        self.news_file = Path(news_file)
+        self.retention_days = retention_days
+
+        self._lock = threading.RLock()
+        self.articles: Dict[str, Dict[str, Any]] = {}
+        self._buckets: Dict[str, List[str]] = {}
+        self._day_of: Dict[str, str] = {}
+        self._urls: Dict[str, str] = {}
+        self._band_index: Dict[Tuple[int, int], Set[str]] = {}
+        self._fingerprints: Dict[str, int] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._categories: Dict[str, Set[str]] = {}
+
+        # Bumped on every change; the newest-first view and saves key off it
+        self.version = 0
+        self._saved_version = 0
+        self._ordered: Optional[List[Dict[str, Any]]] = None
+        # File version last loaded/saved - another worker's save changes it
+        self._file_mtime = 0
+        self.stats = {"added": 0, "duplicates": 0, "near_duplicates": 0, "pruned": 0}
+
+        self._load()
+
+    # ---------- persistence ----------
+
+    def _read_file(self) -> Optional[List[Dict[str, Any]]]:
+        try:
+            mtime = self.news_file.stat().st_mtime_ns
+            with open(self.news_file, 'r') as f:
+                articles = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️ Error loading news: {e}")
+            return None
+
+        self._file_mtime = mtime
+        # Oldest first, so the earliest copy of a duplicated story is the one kept
+        articles.sort(key=lambda a: a.get("scraped_date", "") or "")
+        return articles
+
+    def _load(self):
+        articles = self._read_file()
+        if articles is None:
+            return
+
+        self.add(articles)
+        self.stats = {"added": 0, "duplicates": 0, "near_duplicates": 0, "pruned": 0}
+        self._saved_version = self.version
+        print(f"📰 Loaded {len(self.articles)} news articles")
+
+    def refresh(self) -> "NewsStore":
+        """Pick up articles another worker scraped and saved (one stat call when unchanged)"""
+        try:
+            mtime = self.news_file.stat().st_mtime_ns
+        except OSError:
+            return self
+        if mtime == self._file_mtime:
+            return self
+
+        with self._lock:
+            articles = self._read_file()
+            if articles:
+                added = self.add(articles)
+                self.prune()
+                if added:
+                    print(f"📰 Picked up {added} news articles saved by another worker")
+        return self
+
+    def save(self):
+        """Write the article list to disk if anything changed since the last save"""
+        with self._lock:
+            if self.version == self._saved_version:
+                return
+            articles, version = self.all(), self.version
+
+        try:
+            self.news_file.parent.mkdir(parents=True, exist_ok=True)
+            # Write-then-rename so readers in other workers never see a partial file
+            tmp = self.news_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, 'w') as f:
+                json.dump(articles, f, indent=2, default=str)
+            tmp.replace(self.news_file)
+            self._file_mtime = self.news_file.stat().st_mtime_ns
+            self._saved_version = version
+            print(f"💾 Saved {len(articles)} news articles to {self.news_file}")
+        except Exception as e:
+            print(f"❌ Error saving news: {e}")
+
+    # ---------- writes ----------
+
+    def _find_duplicate(self, article: Dict[str, Any], fingerprint: int) -> Optional[str]:
+        if article.get("id") in self.articles:
+            return article["id"]
+
+        url = _normalize_url(article.get("url"))
+        if url and url in self._urls:
+            return self._urls[url]
+
+        if fingerprint:
+            for band in _bands(fingerprint):
+                for other in self._band_index.get(band, ()):
+                    if bin(fingerprint ^ self._fingerprints[other]).count("1") <= SIMHASH_DISTANCE:
+                        return other
+        return None
+
+    def add(self, articles: List[Dict[str, Any]]) -> int:
+        """Index new articles, skipping exact and near-duplicate stories; returns how many were added"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        added = 0
+
+        with self._lock:
+            for article in articles:
+                headline = article.get("headline", "") or ""
+                fingerprint = simhash(headline)
+                duplicate = self._find_duplicate(article, fingerprint)
+                if duplicate:
+                    same_id = duplicate == article.get("id")
+                    self.stats["duplicates" if same_id else "near_duplicates"] += 1
+                    continue
+
+                article_id = article.get("id") or f"news_{fingerprint:016x}"
+                article = {**article, "id": article_id}
+
+                # Unparseable dates land in today's bucket rather than living forever
+                day = str(article.get("scraped_date", "") or "")[:10]
+                if not re.match(r"\d{4}-\d{2}-\d{2}$", day):
+                    day = today
+
+                self.articles[article_id] = article
+                self._buckets.setdefault(day, []).append(article_id)
+                self._day_of[article_id] = day
+
+                url = _normalize_url(article.get("url"))
+                if url:
+                    self._urls[url] = article_id
+                if fingerprint:
+                    self._fingerprints[article_id] = fingerprint
+                    for band in _bands(fingerprint):
+                        self._band_index.setdefault(band, set()).add(article_id)
+
+                for token in set(tokenize(f"{headline} {article.get('summary', '') or ''}")):
+                    self._postings.setdefault(token, set()).add(article_id)
+                self._categories.setdefault((article.get("category") or "general").lower(), set()).add(article_id)
+
+                added += 1
+
+            if added:
+                self.version += 1
+                self._ordered = None
+                self.stats["added"] += added
+
+        return added
+
+    def _unindex(self, article_id: str):
+        article = self.articles.pop(article_id)
+        self._day_of.pop(article_id, None)
+
+        url = _normalize_url(article.get("url"))
+        if url and self._urls.get(url) == article_id:
+            del self._urls[url]
+
+        fingerprint = self._fingerprints.pop(article_id, 0)
+        if fingerprint:
+            for band in _bands(fingerprint):
+                ids = self._band_index.get(band)
+                if ids is not None:
+                    ids.discard(article_id)
+                    if not ids:
+                        del self._band_index[band]
+
+        text = f"{article.get('headline', '') or ''} {article.get('summary', '') or ''}"
+        for token in set(tokenize(text)):
+            ids = self._postings.get(token)
+            if ids is not None:
+                ids.discard(article_id)
+                if not ids:
+                    del self._postings[token]
+
+        ids = self._categories.get((article.get("category") or "general").lower())
+        if ids is not None:
+            ids.discard(article_id)
+
+    def prune(self) -> int:
+        """Drop every day bucket older than the retention window"""
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime('%Y-%m-%d')
+        removed = 0
+
+        with self._lock:
+            for day in [d for d in self._buckets if d < cutoff]:
+                for article_id in self._buckets.pop(day):
+                    self._unindex(article_id)
+                    removed += 1
+
+            if removed:
+                self.version += 1
+                self._ordered = None
+                self.stats["pruned"] += removed
+
+        return removed
+
+    # ---------- reads ----------
+
+    def __len__(self) -> int:
+        return len(self.articles)
+
+    def all(self) -> List[Dict[str, Any]]:
+        """All articles, newest day first (cached until the store changes)"""
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = [
+                    self.articles[article_id]
+                    for day in sorted(self._buckets, reverse=True)
+                    for article_id in reversed(self._buckets[day])
+                ]
+            return self._ordered
+
+    def recent(self, limit: int) -> List[Dict[str, Any]]:
+        return self.all()[:limit]
+
+    def _newest_first(self, ids: Set[str], limit: int) -> List[Dict[str, Any]]:
+        ranked = sorted(ids, key=lambda i: (self._day_of[i], self.articles[i].get("scraped_date", "") or ""), reverse=True)
+        return [self.articles[i] for i in ranked[:limit]]
+
+    def search(self, query: str = "", categories: Optional[List[str]] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Articles matching the query's keywords or any of the given categories
+        Ranked by matched keywords, then newest first
+        """
+        with self._lock:
+            scores: Dict[str, int] = {}
+            for token in set(tokenize(query)):
+                for article_id in self._postings.get(token, ()):
+                    scores[article_id] = scores.get(article_id, 0) + 2
+
+            for category in categories or []:
+                name = category.lower()
+                for article_id in self._categories.get(name, ()):
+                    scores[article_id] = scores.get(article_id, 0) + 1
+                for token in tokenize(name.replace("_", " ")):
+                    for article_id in self._postings.get(token, ()):
+                        scores[article_id] = scores.get(article_id, 0) + 1
+
+            if not scores:
+                return []
+
+            best = max(scores.values())
+            top = {article_id for article_id, score in scores.items() if score == best}
+            results = self._newest_first(top, limit)
+            if len(results) < limit:
+                rest = set(scores) - top
+                ranked = sorted(rest, key=lambda i: (scores[i], self._day_of[i]), reverse=True)
+                results.extend(self.articles[i] for i in ranked[:limit - len(results)])
+            return results
+
+    def by_category(self, category: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            return self._newest_first(self._categories.get(category.lower(), set()), limit)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "articles": len(self.articles),
+            "days": len(self._buckets),
+            "tokens": len(self._postings),
+            "version": self.version
+        }
+
+
+# Global news store (shared by BountyHunter2, MARK and the API)
+news_store = NewsStore(Path("./data/finance_news/finance_news.json"))
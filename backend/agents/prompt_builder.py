@@ -0,0 +1,206 @@
+"""
+Prompt Assembly with Token Budgets
+Builds LLM prompts from sections with per-section token budgets,
+relevance-ranked truncation and deduplication of repeated context lines
+Records prompt-size metrics per intent
+"""
+
+import re
+from typing import Dict, Any, List, Optional, Set
+
+# Exact token counts when tiktoken is installed, ~4 chars/token otherwise
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_BULLET_RE = re.compile(r"^[\s•\-\*\d\.\)]+")
+
+# Words too common to signal relevance
+_STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "with", "is", "are",
+    "my", "me", "i", "you", "your", "what", "how", "can", "should", "do", "it", "this", "that"
+}
+
+
+def count_tokens(text: str) -> int:
+    """Count (or estimate) LLM tokens in text"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return len(text) // 4 + 1
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Trim text to roughly max_tokens, marking the cut"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text)[:max_tokens]) + "…"
+    return text[:max_tokens * 4] + "…"
+
+
+def _keywords(text: str) -> Set[str]:
+    return {w for w in _WORD_RE.findall(text.lower()) if w not in _STOPWORDS and len(w) > 1}
+
+
+def _normalize(line: str) -> str:
+    """Normalize a context line for duplicate detection (ignore bullets, case, spacing)"""
+    return " ".join(_BULLET_RE.sub("", line).lower().split())
+
+
+class PromptMetrics:
+    """Prompt-size statistics per intent"""
+
+    def __init__(self):
+        self.by_intent: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, intent: str, stats: Dict[str, Any]):
+        entry = self.by_intent.setdefault(intent, {
+            "prompts": 0,
+            "total_tokens": 0,
+            "max_tokens": 0,
+            "last_tokens": 0,
+            "items_dropped": 0,
+            "duplicates_removed": 0
+        })
+        entry["prompts"] += 1
+        entry["total_tokens"] += stats["tokens"]
+        entry["max_tokens"] = max(entry["max_tokens"], stats["tokens"])
+        entry["last_tokens"] = stats["tokens"]
+        entry["items_dropped"] += stats["items_dropped"]
+        entry["duplicates_removed"] += stats["duplicates_removed"]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "token_counter": "tiktoken" if _encoding is not None else "estimate",
+            "intents": {
+                intent: {
+                    **entry,
+                    "avg_tokens": round(entry["total_tokens"] / entry["prompts"]) if entry["prompts"] else 0
+                }
+                for intent, entry in self.by_intent.items()
+            }
+        }
+
+
+class PromptBuilder:
+    """
+    Assemble a prompt from fixed text and budgeted sections
+    Sections keep their most relevant items within budget, in original order
+    """
+
+    def __init__(self, intent: str, query: str = ""):
+        self.intent = intent
+        self.query_keywords = _keywords(query)
+        self.parts: List[str] = []
+        self._seen: Set[str] = set()
+        self.stats = {
+            "tokens": 0,
+            "items_dropped": 0,
+            "duplicates_removed": 0,
+            "sections": {}
+        }
+
+    def add_text(self, text: str) -> "PromptBuilder":
+        """Add unbudgeted text (instructions, key figures)"""
+        self.parts.append(text)
+        return self
+
+    def _relevance(self, item: str, weight: float) -> float:
+        """Keyword overlap with the user's query plus the caller's weight (0-1)"""
+        overlap = 0.0
+        if self.query_keywords:
+            overlap = len(_keywords(item) & self.query_keywords) / len(self.query_keywords)
+        return overlap + 0.5 * weight
+
+    def add_section(
+        self,
+        name: str,
+        header: str,
+        items: List[str],
+        budget: int,
+        weights: Optional[List[float]] = None,
+        dedupe: bool = True,
+        empty_text: Optional[str] = None
+    ) -> List[str]:
+        """
+        Add a section of context lines within a token budget
+
+        Args:
+            name: Section name for metrics
+            header: Text placed before the items
+            items: Candidate lines, in display order
+            budget: Max tokens for header + items
+            weights: Importance per item (higher = keep first); defaults to earlier = more important
+            dedupe: Skip lines already included by an earlier section
+            empty_text: Text used instead of the section when no items survive (None = omit)
+
+        Returns the included lines
+        """
+        if weights is None:
+            weights = [1 - i / max(len(items), 1) for i in range(len(items))]
+        max_weight = max(weights, default=0) or 1
+
+        candidates = []
+        duplicates = 0
+        seen_here: Set[str] = set()
+        for index, item in enumerate(items):
+            normalized = _normalize(item)
+            if dedupe and (normalized in self._seen or normalized in seen_here):
+                duplicates += 1
+                continue
+            seen_here.add(normalized)
+            score = self._relevance(item, weights[index] / max_weight)
+            candidates.append((score, index, item, normalized))
+
+        # Greedily keep the highest-scoring lines that fit
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+        used = count_tokens(header)
+        selected = []
+        for score, index, item, normalized in candidates:
+            item_tokens = count_tokens(item) + 1
+            if used + item_tokens > budget:
+                continue
+            used += item_tokens
+            selected.append((index, item, normalized))
+
+        selected.sort(key=lambda s: s[0])
+        lines = [item for _, item, _ in selected]
+        for _, _, normalized in selected:
+            self._seen.add(normalized)
+
+        dropped = len(candidates) - len(selected)
+        if dropped:
+            lines_text = "\n".join(lines + [f"(+{dropped} more omitted)"])
+        else:
+            lines_text = "\n".join(lines)
+
+        if lines:
+            self.parts.append(f"{header}{lines_text}\n")
+        elif empty_text is not None:
+            self.parts.append(empty_text)
+
+        self.stats["items_dropped"] += dropped
+        self.stats["duplicates_removed"] += duplicates
+        self.stats["sections"][name] = {
+            "items": len(lines),
+            "dropped": dropped,
+            "duplicates": duplicates,
+            "tokens": used
+        }
+        return lines
+
+    def build(self) -> str:
+        """Join all parts and record the prompt size for this intent"""
+        prompt = "".join(self.parts)
+        self.stats["tokens"] = count_tokens(prompt)
+        prompt_metrics.record(self.intent, self.stats)
+        return prompt
+
+
+# Global prompt-size metrics
+prompt_metrics = PromptMetrics()
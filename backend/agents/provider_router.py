@@ -0,0 +1,285 @@
+"""
+LLM Provider Router
+Hedged requests across LLM providers instead of waiting for the primary to time out
+Tracks per-provider latency histograms and skips failing providers with circuit breakers
+"""
+
+import os
+import time
+import math
+import bisect
+import asyncio
+from typing import Dict, Any, List, Callable, Awaitable, Optional, Tuple
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (seconds) with percentile estimates"""
+
+    # Bucket upper bounds in seconds - LLM calls range from sub-second to the 60s timeout
+    BUCKETS = [0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4, 5, 6, 8, 10, 12, 15, 20, 30, 45, 60]
+
+    def __init__(self, max_samples: int = 1000):
+        self.counts = [0.0] * (len(self.BUCKETS) + 1)
+        self.count = 0.0
+        self.total = 0.0
+        self.max_seen = 0.0
+        # Halve all counts once this many samples accumulate so old latencies fade out
+        self.max_samples = max_samples
+
+    def observe(self, seconds: float):
+        """Record one latency sample"""
+        if self.count >= self.max_samples:
+            self.counts = [c / 2 for c in self.counts]
+            self.count /= 2
+            self.total /= 2
+
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max_seen = max(self.max_seen, seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Estimate the p-th percentile (0-1) as a bucket upper bound"""
+        if self.count == 0:
+            return None
+
+        target = math.ceil(p * self.count)
+        cumulative = 0.0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return self.BUCKETS[i] if i < len(self.BUCKETS) else self.max_seen
+
+        return self.max_seen
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "samples": round(self.count),
+            "avg": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": round(self.max_seen, 3)
+        }
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+    closed -> open after `failure_threshold` failures; open -> half_open after `reset_timeout`
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def allow_request(self) -> bool:
+        """Check if the provider may be called right now"""
+        if self.state == "open":
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let one probe request through
+                self.state = "half_open"
+                return True
+            return False
+        return True
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures
+        }
+
+
+class ProviderRouter:
+    """
+    Route completions across providers in preference order
+    The next provider is fired once the current one exceeds its p95 latency (hedging),
+    or immediately if it fails. The first success wins and the rest are cancelled.
+    """
+
+    def __init__(
+        self,
+        hedging: bool = True,
+        hedge_percentile: float = 0.95,
+        default_hedge_delay: float = 8.0,
+        min_hedge_delay: float = 1.0,
+        max_hedge_delay: float = 20.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0
+    ):
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.max_hedge_delay = max_hedge_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.stats: Dict[str, Dict[str, int]] = {}
+
+    def _ensure_provider(self, name: str):
+        if name not in self.histograms:
+            self.histograms[name] = LatencyHistogram()
+            self.breakers[name] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            self.stats[name] = {
+                "calls": 0,
+                "wins": 0,
+                "errors": 0,
+                "hedges_fired": 0,
+                "cancelled": 0,
+                "skipped_open_circuit": 0
+            }
+
+    def hedge_delay(self, name: str) -> float:
+        """Delay before hedging past `name` - its p95 latency, clamped"""
+        self._ensure_provider(name)
+        p95 = self.histograms[name].percentile(self.hedge_percentile)
+        if p95 is None:
+            return self.default_hedge_delay
+        return min(max(p95, self.min_hedge_delay), self.max_hedge_delay)
+
+    def order(self, names: List[str]) -> List[str]:
+        """Providers in preference order, skipping any whose circuit is open"""
+        available = []
+        for name in names:
+            self._ensure_provider(name)
+            if self.breakers[name].allow_request():
+                available.append(name)
+            else:
+                self.stats[name]["skipped_open_circuit"] += 1
+
+        # If every circuit is open, try them all rather than failing outright
+        return available or list(names)
+
+    def record_success(self, name: str, latency: Optional[float] = None):
+        self._ensure_provider(name)
+        self.breakers[name].record_success()
+        if latency is not None:
+            self.histograms[name].observe(latency)
+
+    def record_failure(self, name: str):
+        self._ensure_provider(name)
+        self.stats[name]["errors"] += 1
+        self.breakers[name].record_failure()
+
+    async def _timed_call(self, name: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Run one provider call, feeding its histogram and circuit breaker"""
+        self.stats[name]["calls"] += 1
+        started = time.perf_counter()
+        try:
+            result = await factory()
+        except asyncio.CancelledError:
+            self.stats[name]["cancelled"] += 1
+            raise
+        except Exception:
+            self.record_failure(name)
+            raise
+
+        self.record_success(name, time.perf_counter() - started)
+        return result
+
+    async def complete(
+        self,
+        providers: Dict[str, Callable[[], Awaitable[Any]]]
+    ) -> Tuple[Any, str]:
+        """
+        Run a completion across providers (dict order = preference order)
+        Returns (result, winning provider name); raises the last error if all fail
+        """
+        candidates = self.order(list(providers))
+        pending: Dict[asyncio.Task, str] = {}
+        errors: Dict[str, Exception] = {}
+        next_index = 0
+        next_launch_at = 0.0
+
+        def launch():
+            nonlocal next_index, next_launch_at
+            name = candidates[next_index]
+            next_index += 1
+            task = asyncio.create_task(self._timed_call(name, providers[name]))
+            pending[task] = name
+            next_launch_at = time.monotonic() + self.hedge_delay(name)
+
+        launch()
+
+        try:
+            while pending:
+                timeout = None
+                if self.hedging and next_index < len(candidates):
+                    timeout = max(next_launch_at - time.monotonic(), 0)
+
+                done, _ = await asyncio.wait(
+                    pending.keys(),
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Current provider is slower than its p95 - hedge with the next one
+                    self.stats[candidates[next_index]]["hedges_fired"] += 1
+                    launch()
+                    continue
+
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        self.stats[name]["wins"] += 1
+                        return task.result(), name
+                    errors[name] = task.exception()
+                    print(f"⚠️ {name} failed: {errors[name]}")
+
+                # A provider failed - fire the next one now instead of waiting
+                if next_index < len(candidates) and (self.hedging or not pending):
+                    launch()
+
+            raise Exception(
+                "All LLM providers failed: " +
+                "; ".join(f"{name}: {error}" for name, error in errors.items())
+            )
+
+        finally:
+            # Cancel the losers (and everything, if we were cancelled ourselves)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-provider latency, circuit and hedging stats"""
+        return {
+            "hedging": self.hedging,
+            "providers": {
+                name: {
+                    **self.stats[name],
+                    "latency": self.histograms[name].to_dict(),
+                    "circuit": self.breakers[name].to_dict(),
+                    "hedge_delay": round(self.hedge_delay(name), 3)
+                }
+                for name in self.histograms
+            }
+        }
+
+
+# Global provider router shared by all agents
+provider_router = ProviderRouter(
+    hedging=os.getenv("LLM_HEDGING", "true").lower() != "false",
+    default_hedge_delay=float(os.getenv("LLM_HEDGE_DEFAULT_DELAY", "8")),
+    max_hedge_delay=float(os.getenv("LLM_HEDGE_MAX_DELAY", "20")),
+    failure_threshold=int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "3")),
+    reset_timeout=float(os.getenv("LLM_CIRCUIT_RESET_SECONDS", "30"))
+)
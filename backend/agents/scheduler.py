@@ -1,13 +1,23 @@
 """
 Background Scheduler for Agents
 Manages periodic tasks like BountyHunter2's 24-hour news scraping
+Sleeps until the next deadline (heap), runs due tasks concurrently and persists last runs
+Each run first claims a fleet-wide lease, so N workers run a task once per interval
 """
 
+import os
+import json
+import time
+import heapq
+import random
 import asyncio
 from datetime import datetime, timedelta
-from typing import Callable, Dict, Any
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
 import logging
 
+from redis_cache import redis_cache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -17,64 +27,218 @@ class AgentScheduler:
     Scheduler for running agent tasks periodically
     """
 
-    def __init__(self):
+    def __init__(self, state_file: Path = Path("./data/scheduler_state.json")):
         self.tasks: Dict[str, Dict[str, Any]] = {}
         self.running = False
+        self.state_file = Path(state_file)
+
+        # (deadline timestamp, sequence, task_id, generation) - stale generations are skipped
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._sequence = 0
+        self._wake: Optional[asyncio.Event] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._state = self._load_state()
+
+    # ---------- persisted state ----------
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load scheduler state: {e}")
+            return {}
+
+    def _save_state(self):
+        state = {
+            task_id: {
+                "last_run": info["last_run"].isoformat() if info["last_run"] else None,
+                "metrics": info["metrics"]
+            }
+            for task_id, info in self.tasks.items()
+        }
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            # Per-process temp file - several workers may share the state file
+            tmp = self.state_file.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, 'w') as f:
+                json.dump(state, f, indent=2)
+            tmp.replace(self.state_file)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save scheduler state: {e}")
+
+    # ---------- scheduling ----------
+
+    def _push(self, task_id: str, deadline: float):
+        info = self.tasks[task_id]
+        info["next_run"] = deadline
+        self._sequence += 1
+        heapq.heappush(self._heap, (deadline, self._sequence, task_id, info["generation"]))
+        if self._wake is not None:
+            self._wake.set()
+
+    def _jitter(self, info: Dict[str, Any]) -> float:
+        return random.uniform(0, info["jitter_seconds"]) if info["jitter_seconds"] else 0.0
 
     def add_task(
         self,
         task_id: str,
         task_func: Callable,
-        interval_hours: int,
-        run_immediately: bool = False
+        interval_hours: float,
+        run_immediately: bool = False,
+        max_concurrency: int = 1,
+        jitter_seconds: Optional[float] = None
     ):
-        """Add a scheduled task"""
+        """
+        Add a scheduled task
+
+        Args:
+            task_id: Unique task name (also the key its run state is persisted under)
+            task_func: Async callable to run
+            interval_hours: Time between runs
+            run_immediately: Run at startup if the interval has passed since the last persisted run
+            max_concurrency: Overlapping runs allowed when a run outlasts its interval
+            jitter_seconds: Random delay added to each deadline (default 5% of the interval, max 5 min)
+        """
+        interval = timedelta(hours=interval_hours)
+        if jitter_seconds is None:
+            jitter_seconds = min(interval.total_seconds() * 0.05, 300)
+
+        saved = self._state.get(task_id, {})
+        last_run = datetime.fromisoformat(saved["last_run"]) if saved.get("last_run") else None
+        previous = self.tasks.get(task_id)
+
         self.tasks[task_id] = {
             "func": task_func,
-            "interval": timedelta(hours=interval_hours),
-            "last_run": None,
-            "run_immediately": run_immediately
+            "interval": interval,
+            "last_run": last_run,
+            "next_run": None,
+            "run_immediately": run_immediately,
+            "max_concurrency": max(1, max_concurrency),
+            "jitter_seconds": jitter_seconds,
+            "active": 0,
+            "generation": previous["generation"] + 1 if previous else 0,
+            "metrics": saved.get("metrics") or {
+                "runs": 0,
+                "failures": 0,
+                "skipped_overlaps": 0,
+                "lease_skips": 0,
+                "last_duration_s": None,
+                "avg_duration_s": None,
+                "max_duration_s": None,
+                "last_error": None
+            }
         }
+
+        now = time.time()
+        if last_run is None:
+            deadline = now
+        else:
+            deadline = (last_run + interval).timestamp()
+            if deadline <= now and not run_immediately:
+                # Overdue, but the caller doesn't want a startup run - wait a full interval
+                deadline = now + interval.total_seconds()
+        if deadline > now:
+            deadline += self._jitter(self.tasks[task_id])
+        self._push(task_id, max(deadline, now))
+
         logger.info(f"📅 Scheduled task '{task_id}' to run every {interval_hours} hours")
 
+    async def _run(self, task_id: str, info: Dict[str, Any]):
+        """Run one task invocation (if this worker wins the interval's lease) and record its duration"""
+        metrics = info["metrics"]
+        lease = f"scheduler:{task_id}"
+
+        # The winner keeps the lease for most of the interval, so other workers skip this window
+        token = await asyncio.to_thread(redis_cache.acquire_lease, lease, info["interval"].total_seconds() * 0.95)
+        if token is None:
+            metrics["lease_skips"] = metrics.get("lease_skips", 0) + 1
+            logger.info(f"⏭️ Task '{task_id}' already claimed by another worker this interval")
+            return
+
+        info["active"] += 1
+        started = time.perf_counter()
+        try:
+            logger.info(f"🔄 Running scheduled task: {task_id}")
+            await info["func"]()
+            info["last_run"] = datetime.now()
+            logger.info(f"✅ Task '{task_id}' completed")
+        except asyncio.CancelledError:
+            # Let another worker pick the task up
+            redis_cache.release_lease(lease, token)
+            raise
+        except Exception as e:
+            metrics["failures"] += 1
+            metrics["last_error"] = str(e)
+            logger.error(f"❌ Error in task '{task_id}': {e}")
+            redis_cache.release_lease(lease, token)
+        finally:
+            info["active"] -= 1
+            duration = round(time.perf_counter() - started, 3)
+            runs = metrics["runs"] + 1
+            metrics["runs"] = runs
+            metrics["last_duration_s"] = duration
+            metrics["max_duration_s"] = max(metrics["max_duration_s"] or 0, duration)
+            metrics["avg_duration_s"] = round(((metrics["avg_duration_s"] or 0) * (runs - 1) + duration) / runs, 3)
+            self._save_state()
+
+    def _dispatch(self, task_id: str):
+        info = self.tasks[task_id]
+        now = time.time()
+
+        if info["active"] >= info["max_concurrency"]:
+            info["metrics"]["skipped_overlaps"] += 1
+            logger.warning(f"⏭️ Task '{task_id}' still running, skipping this run")
+        else:
+            task = asyncio.create_task(self._run(task_id, info))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+        # Next deadline is set now, so a slow run never delays other tasks
+        self._push(task_id, now + info["interval"].total_seconds() + self._jitter(info))
+
     async def start(self):
         """Start the scheduler"""
         self.running = True
+        self._wake = asyncio.Event()
         logger.info("⏰ Agent scheduler started")
 
         while self.running:
-            for task_id, task_info in self.tasks.items():
-                func = task_info["func"]
-                interval = task_info["interval"]
-                last_run = task_info["last_run"]
-                run_immediately = task_info.get("run_immediately", False)
-
-                # Check if task should run
-                should_run = False
-
-                if run_immediately and last_run is None:
-                    should_run = True
-                    task_info["run_immediately"] = False
-                elif last_run is None:
-                    should_run = True
-                elif datetime.now() - last_run >= interval:
-                    should_run = True
-
-                if should_run:
-                    try:
-                        logger.info(f"🔄 Running scheduled task: {task_id}")
-                        await func()
-                        task_info["last_run"] = datetime.now()
-                        logger.info(f"✅ Task '{task_id}' completed")
-                    except Exception as e:
-                        logger.error(f"❌ Error in task '{task_id}': {e}")
-
-            # Sleep for 1 hour before checking again
-            await asyncio.sleep(3600)  # Check every hour
+            self._wake.clear()
+
+            # Drop entries superseded by a re-added task
+            while self._heap and (self._heap[0][2] not in self.tasks
+                                  or self._heap[0][3] != self.tasks[self._heap[0][2]]["generation"]):
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                await self._wake.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, task_id, _ = heapq.heappop(self._heap)
+            self._dispatch(task_id)
 
     async def stop(self):
-        """Stop the scheduler"""
+        """Stop the scheduler and cancel in-flight runs"""
         self.running = False
+        if self._wake is not None:
+            self._wake.set()
+
+        for task in list(self._in_flight):
+            task.cancel()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
         logger.info("⏹️ Agent scheduler stopped")
 
     def get_status(self) -> Dict[str, Any]:
@@ -84,7 +248,11 @@ class AgentScheduler:
             "tasks": {
                 task_id: {
                     "last_run": task_info["last_run"].isoformat() if task_info["last_run"] else None,
-                    "interval_hours": task_info["interval"].total_seconds() / 3600
+                    "next_run": datetime.fromtimestamp(task_info["next_run"]).isoformat() if task_info["next_run"] else None,
+                    "interval_hours": task_info["interval"].total_seconds() / 3600,
+                    "active_runs": task_info["active"],
+                    "max_concurrency": task_info["max_concurrency"],
+                    **task_info["metrics"]
                 }
                 for task_id, task_info in self.tasks.items()
             }
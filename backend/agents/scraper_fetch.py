@@ -0,0 +1,175 @@
+"""
+Scraper Fetch Layer for BountyHunter1/2
+Pooled, per-host rate-limited page fetches with ETag/Last-Modified conditional requests
+Content-hash change detection lets scrapers skip parsing unchanged pages; responses are
+cached on disk (once the caller has stored what it parsed) and can be replayed offline
+(SCRAPER_OFFLINE=true)
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+from http_pool import http_pool
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+
+class FetchResult:
+    """A fetched page and whether it changed since the previous fetch"""
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        text: str,
+        changed: bool,
+        from_cache: bool = False,
+        cache_entry: Optional[Dict[str, Any]] = None
+    ):
+        self.url = url
+        self.status = status
+        self.text = text
+        self.changed = changed
+        self.from_cache = from_cache
+        # Validators and hash for this response - saved by ScraperFetcher.commit()
+        self.cache_entry = cache_entry
+
+
+class ScraperFetcher:
+    """Conditional, change-detecting GETs shared by the scraping agents"""
+
+    def __init__(self, cache_dir: Path, per_host_limit: int = 2, offline: bool = False):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.per_host_limit = per_host_limit
+        self.offline = offline
+
+        # host -> (semaphore, owning event loop)
+        self._semaphores: Dict[str, Tuple[asyncio.Semaphore, asyncio.AbstractEventLoop]] = {}
+        self.stats = {
+            "requests": 0,
+            "not_modified": 0,
+            "unchanged": 0,
+            "changed": 0,
+            "offline_replays": 0,
+            "errors": 0
+        }
+
+    def _semaphore(self, url: str) -> asyncio.Semaphore:
+        """Per-host concurrency limit, rebuilt if the event loop changes"""
+        host = urlsplit(url).hostname or ""
+        loop = asyncio.get_running_loop()
+        entry = self._semaphores.get(host)
+        if entry and entry[1] is loop:
+            return entry[0]
+        semaphore = asyncio.Semaphore(self.per_host_limit)
+        self._semaphores[host] = (semaphore, loop)
+        return semaphore
+
+    def _cache_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+    def _read_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        path = self._cache_path(url)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️ Error reading HTTP cache for {url}: {e}")
+            return None
+
+    def _write_cache(self, url: str, entry: Dict[str, Any]):
+        try:
+            with open(self._cache_path(url), 'w') as f:
+                json.dump(entry, f)
+        except Exception as e:
+            print(f"⚠️ Error writing HTTP cache for {url}: {e}")
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """
+        GET a page, revalidating against the cached copy
+
+        Returns changed=False (and the cached text) when the server answers 304 or the
+        body hashes the same as last time. 404s are returned; other HTTP errors raise.
+        Nothing is cached until the caller commit()s the page, so a failed parse or store
+        means the next fetch still reports the page as changed.
+        """
+        cached = self._read_cache(url)
+
+        if self.offline:
+            if not cached:
+                raise FileNotFoundError(f"No cached response for {url} (SCRAPER_OFFLINE is set)")
+            self.stats["offline_replays"] += 1
+            return FetchResult(url, cached["status"], cached["text"], changed=True, from_cache=True)
+
+        request_headers = {**DEFAULT_HEADERS, **(headers or {})}
+        if cached:
+            if cached.get("etag"):
+                request_headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                request_headers["If-Modified-Since"] = cached["last_modified"]
+
+        self.stats["requests"] += 1
+        try:
+            async with self._semaphore(url):
+                response = await http_pool.get_client(url).get(url, headers=request_headers)
+        except Exception:
+            self.stats["errors"] += 1
+            http_pool.record_error(url)
+            raise
+
+        if response.status_code == 304 and cached:
+            self.stats["not_modified"] += 1
+            return FetchResult(url, 200, cached["text"], changed=False, from_cache=True)
+
+        if response.status_code == 404:
+            return FetchResult(url, 404, "", changed=False)
+
+        response.raise_for_status()
+
+        text = response.text
+        content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        changed = not cached or cached.get("content_hash") != content_hash
+        self.stats["changed" if changed else "unchanged"] += 1
+
+        entry = {
+            "url": url,
+            "status": response.status_code,
+            "etag": response.headers.get("etag"),
+            "last_modified": response.headers.get("last-modified"),
+            "content_hash": content_hash,
+            "fetched_at": datetime.now().isoformat(),
+            "text": text
+        }
+        return FetchResult(url, response.status_code, text, changed=changed, cache_entry=entry)
+
+    def commit(self, page: FetchResult):
+        """Remember a page as processed - call only after its contents were parsed and stored"""
+        if page.cache_entry is not None:
+            self._write_cache(page.url, page.cache_entry)
+            page.cache_entry = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "offline": self.offline,
+            "per_host_limit": self.per_host_limit
+        }
+
+
+# Global scraper fetcher
+scraper_fetcher = ScraperFetcher(
+    Path("./data/http_cache"),
+    per_host_limit=int(os.getenv("SCRAPER_MAX_CONCURRENCY_PER_HOST", "2")),
+    offline=os.getenv("SCRAPER_OFFLINE", "false").lower() == "true"
+)
@@ -0,0 +1,128 @@
+"""
+Bounded Per-User Session State
+LRU dict with an idle TTL and a resident cap; evicted sessions spill to Redis and are
+restored on the user's next request, so memory stays flat as distinct users grow
+"""
+
+import os
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from redis_cache import redis_cache
+
+# Sessions sampled when estimating resident memory
+_SIZE_SAMPLE = 200
+
+
+class SessionStore:
+    """TTL + LRU session map for one namespace (e.g. MCP sessions, MARK conversations)"""
+
+    def __init__(
+        self,
+        namespace: str,
+        factory: Callable[[], Any] = dict,
+        max_resident: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        spill_ttl_seconds: Optional[float] = None,
+        spill: bool = True
+    ):
+        self.namespace = namespace
+        self.factory = factory
+        # False when the owner keeps its own Redis copy - evicted values are just dropped
+        self.spill = spill
+        self.max_resident = max_resident or int(os.getenv("SESSION_MAX_RESIDENT", "10000"))
+        self.ttl_seconds = ttl_seconds or float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+        self.spill_ttl_seconds = spill_ttl_seconds or float(os.getenv("SESSION_SPILL_TTL_SECONDS", "86400"))
+
+        # user_id -> (value, last access); least recently used first
+        self._data: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self.stats = {"created": 0, "restored": 0, "evicted_ttl": 0, "evicted_lru": 0, "spilled": 0}
+
+    # ---------- eviction ----------
+
+    def _evict(self, now: float):
+        """Drop idle sessions from the LRU end, then trim to the resident cap"""
+        while self._data:
+            user_id, (value, last_access) = next(iter(self._data.items()))
+            if now - last_access < self.ttl_seconds:
+                break
+            del self._data[user_id]
+            self._spill(user_id, value)
+            self.stats["evicted_ttl"] += 1
+
+        while len(self._data) > self.max_resident:
+            user_id, (value, _) = self._data.popitem(last=False)
+            self._spill(user_id, value)
+            self.stats["evicted_lru"] += 1
+
+    def _spill(self, user_id: str, value: Any):
+        if self.spill and redis_cache.spill_session(self.namespace, user_id, value, self.spill_ttl_seconds):
+            self.stats["spilled"] += 1
+
+    # ---------- access ----------
+
+    def get(self, user_id: str, create: bool = True) -> Any:
+        """The user's session (restored from Redis or created if not resident); marks it used"""
+        now = time.monotonic()
+        entry = self._data.pop(user_id, None)
+
+        if entry is not None:
+            value = entry[0]
+        else:
+            value = redis_cache.restore_session(self.namespace, user_id) if self.spill else None
+            if value is not None:
+                self.stats["restored"] += 1
+            elif create:
+                value = self.factory()
+                self.stats["created"] += 1
+            else:
+                return None
+
+        self._data[user_id] = (value, now)
+        self._evict(now)
+        return value
+
+    def put(self, user_id: str, value: Any):
+        """Store a value for the user and mark it used"""
+        now = time.monotonic()
+        self._data.pop(user_id, None)
+        self._data[user_id] = (value, now)
+        self._evict(now)
+
+    def peek(self, user_id: str, default: Any = None) -> Any:
+        """Resident value without touching recency or Redis"""
+        entry = self._data.get(user_id)
+        return entry[0] if entry is not None else default
+
+    def pop(self, user_id: str) -> Any:
+        entry = self._data.pop(user_id, None)
+        return entry[0] if entry is not None else None
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[str]:
+        """Resident user ids (idle sessions are evicted first)"""
+        self._evict(time.monotonic())
+        return iter(list(self._data))
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._evict(time.monotonic())
+
+        # JSON size of a sample of sessions, scaled up - a proxy for resident memory
+        sample = [value for _, (value, _) in zip(range(_SIZE_SAMPLE), reversed(self._data.items()))]
+        sample_bytes = sum(len(json.dumps(value, default=str)) for value in sample)
+        approx_bytes = int(sample_bytes / len(sample) * len(self._data)) if sample else 0
+
+        return {
+            **self.stats,
+            "resident": len(self._data),
+            "max_resident": self.max_resident,
+            "ttl_seconds": self.ttl_seconds,
+            "approx_bytes": approx_bytes
+        }
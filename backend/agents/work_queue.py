@@ -0,0 +1,145 @@
+"""
+Per-Agent Work Queue for the MCP Server
+Caps in-flight requests per agent, queues the rest fairly (round-robin across users)
+and rejects with a Retry-After estimate once the queue is full
+"""
+
+import time
+import asyncio
+from collections import OrderedDict, deque
+from typing import Dict, Any, Deque, Optional
+
+
+class MCPOverloadedError(Exception):
+    """An agent's queue is full (or the wait timed out) - surfaced to clients as HTTP 429"""
+
+    def __init__(self, agent_id: str, retry_after: int, reason: str = "queue full"):
+        super().__init__(f"Agent '{agent_id}' is overloaded ({reason}), retry in {retry_after}s")
+        self.agent_id = agent_id
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class QueueSlot:
+    """An admitted request's hold on one in-flight slot; release() is idempotent"""
+
+    def __init__(self, queue: Optional["AgentWorkQueue"] = None):
+        self._queue = queue
+        self._started = time.perf_counter()
+
+    def release(self):
+        if self._queue is not None:
+            queue, self._queue = self._queue, None
+            queue._release(time.perf_counter() - self._started)
+
+
+class AgentWorkQueue:
+    """Fair, bounded admission for one agent"""
+
+    def __init__(
+        self,
+        agent_id: str,
+        max_in_flight: int = 8,
+        max_queue: int = 64,
+        max_queue_per_user: int = 4,
+        max_wait_seconds: float = 30.0
+    ):
+        self.agent_id = agent_id
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_per_user = max_queue_per_user
+        self.max_wait_seconds = max_wait_seconds
+
+        self.in_flight = 0
+        # user_id -> waiting futures; users are served round-robin (OrderedDict order)
+        self._waiting: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._depth = 0
+
+        self._wait_ms: Deque[float] = deque(maxlen=512)
+        self._hold_seconds = 1.0  # EWMA of how long a request holds its slot
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timeouts": 0}
+
+    def retry_after(self) -> int:
+        """Seconds until a newly queued request would likely start"""
+        backlog = (self._depth + 1) / max(self.max_in_flight, 1)
+        return max(1, int(round(backlog * self._hold_seconds)))
+
+    async def acquire(self, user_id: str) -> QueueSlot:
+        """Wait for a fair turn at an in-flight slot; raises MCPOverloadedError when saturated"""
+        if self.in_flight < self.max_in_flight and not self._depth:
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            self._wait_ms.append(0.0)
+            return QueueSlot(self)
+
+        user_waiting = self._waiting.get(user_id)
+        if self._depth >= self.max_queue:
+            self.stats["rejected"] += 1
+            raise MCPOverloadedError(self.agent_id, self.retry_after())
+        if user_waiting is not None and len(user_waiting) >= self.max_queue_per_user:
+            self.stats["rejected"] += 1
+            raise MCPOverloadedError(self.agent_id, self.retry_after(), "too many queued requests for this user")
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(user_id, deque()).append(future)
+        self._depth += 1
+        self.stats["queued"] += 1
+        queued_at = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Granted just as we gave up - pass the slot on
+                self._release(0.0, record=False)
+            else:
+                future.cancel()
+                self._remove(user_id, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self.stats["timeouts"] += 1
+                raise MCPOverloadedError(self.agent_id, self.retry_after(), "queue wait timed out")
+            raise
+
+        self.stats["admitted"] += 1
+        self._wait_ms.append((time.perf_counter() - queued_at) * 1000)
+        return QueueSlot(self)
+
+    def _remove(self, user_id: str, future: asyncio.Future):
+        waiting = self._waiting.get(user_id)
+        if waiting and future in waiting:
+            waiting.remove(future)
+            self._depth -= 1
+            if not waiting:
+                del self._waiting[user_id]
+
+    def _release(self, held_seconds: float, record: bool = True):
+        """Hand the slot to the next user in round-robin order, or free it"""
+        if record:
+            self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held_seconds
+
+        while self._waiting:
+            user_id, waiting = self._waiting.popitem(last=False)
+            future = waiting.popleft()
+            self._depth -= 1
+            if waiting:
+                # Back of the line - other users get a turn first
+                self._waiting[user_id] = waiting
+            if not future.done():
+                future.set_result(True)
+                return
+
+        self.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        waits = sorted(self._wait_ms)
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self._depth,
+            "max_queue": self.max_queue,
+            "waiting_users": len(self._waiting),
+            "wait_ms_avg": round(sum(waits) / len(waits), 1) if waits else 0.0,
+            "wait_ms_p95": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1) if waits else 0.0,
+            "hold_seconds_ewma": round(self._hold_seconds, 2)
+        }
@@ -5,6 +5,7 @@ import asyncio
 from typing import List, Dict
 from embedding_service import EmbeddingService
 from vector_db import VectorDB
+from financial_snapshot import snapshot_store
 import json
 import os
 
@@ -88,8 +89,10 @@ class BackgroundProcessor:
                     self.processed_ids.add(txn_id)
                 
                 # Save progress
+                self.vector_db.revision += 1
                 self.vector_db._save()
                 self._save_processed_ids()
+                snapshot_store.refresh(self.vector_db)
                 
                 # Small delay to avoid rate limiting
                 await asyncio.sleep(1)
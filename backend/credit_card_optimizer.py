@@ -1,21 +1,108 @@
 """
 Credit Card Optimizer
 Analyzes transactions and recommends best credit cards for maximum savings and points
+Card rewards are compiled once into a cards × categories rate matrix, so scoring a
+spending profile is a handful of NumPy operations rather than regex loops
 """
 
+import os
+import re
 import json
-from typing import List, Dict, Any, Optional
+import heapq
+import threading
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from pathlib import Path
 from datetime import datetime
 
+import numpy as np
+
+# Patterns like "3x", "3%", "3 points", "3 cash back" - first match wins
+_RATE_PATTERNS = [
+    re.compile(r'(\d+(?:\.\d+)?)x'),
+    re.compile(r'(\d+(?:\.\d+)?)%'),
+    re.compile(r'(\d+(?:\.\d+)?)\s*points'),
+    re.compile(r'(\d+(?:\.\d+)?)\s*cash\s*back')
+]
+
+
+# Bumped when the analysis payload changes shape - cached analyses of another version are ignored
+ANALYSIS_VERSION = 2
+
+# Transaction fields kept for the largest purchases in each category
+_EXEMPLAR_FIELDS = ('id', 'date', 'merchant', 'amount')
+
+
+class CategoryAggregator:
+    """
+    Streaming per-category spending: running totals, counts and the top-N purchases
+    Memory depends on the number of categories, not transactions
+    """
+
+    def __init__(self, top_n: int = 5):
+        self.top_n = top_n
+        self.total_spending = 0.0
+        self._categories: Dict[str, Dict[str, Any]] = {}
+        self._sequence = 0
+
+    def add(self, txn: Dict[str, Any]):
+        # Skip income
+        if txn.get('amount', 0) < 0:
+            return
+
+        amount = abs(txn.get('amount', 0))
+        category = txn.get('classified_category', 'Other')
+        stats = self._categories.get(category)
+        if stats is None:
+            stats = self._categories[category] = {'total': 0, 'count': 0, 'max': 0, 'top': []}
+
+        stats['total'] += amount
+        stats['count'] += 1
+        stats['max'] = max(stats['max'], amount)
+        self.total_spending += amount
+
+        # Min-heap of the largest purchases (sequence breaks ties without comparing dicts)
+        top = stats['top']
+        if len(top) < self.top_n or (top and amount > top[0][0]):
+            self._sequence += 1
+            entry = (amount, self._sequence, {field: txn.get(field) for field in _EXEMPLAR_FIELDS})
+            if len(top) < self.top_n:
+                heapq.heappush(top, entry)
+            else:
+                heapq.heapreplace(top, entry)
+
+    def extend(self, transactions: Iterable[Dict[str, Any]]) -> "CategoryAggregator":
+        for txn in transactions:
+            self.add(txn)
+        return self
+
+    def category_spending(self) -> Dict[str, Dict[str, Any]]:
+        """Per-category totals, counts, share of spending and largest purchases"""
+        return {
+            category: {
+                'total': stats['total'],
+                'count': stats['count'],
+                'average': round(stats['total'] / stats['count'], 2),
+                'max': stats['max'],
+                'percentage': stats['total'] / self.total_spending * 100 if self.total_spending > 0 else 0,
+                'top_transactions': [txn for _, _, txn in sorted(stats['top'], reverse=True)]
+            }
+            for category, stats in self._categories.items()
+        }
+
+
+def _parse_fee(annual_fee: str) -> float:
+    """'$95' -> 95.0 (anything without a dollar amount counts as no fee)"""
+    match = re.search(r'\$\s*([\d,]+(?:\.\d+)?)', annual_fee or '')
+    return float(match.group(1).replace(',', '')) if match else 0.0
+
 
 class CreditCardOptimizer:
     """Optimize credit card usage for maximum rewards and savings"""
 
-    def __init__(self):
-        """Load credit card data"""
-        self.credit_cards_path = Path("./credit_cards.json")
-        self.credit_cards = self._load_credit_cards()
+    def __init__(self, credit_cards_path: Path = Path("./credit_cards.json"), credit_cards: Optional[List[Dict]] = None):
+        """Load credit card data (or use the given catalog)"""
+        self.credit_cards_path = Path(credit_cards_path)
+        self.credit_cards = credit_cards if credit_cards is not None else self._load_credit_cards()
         
         # Category mapping to credit card reward categories
         self.category_mapping = {
@@ -29,6 +116,8 @@ class CreditCardOptimizer:
             'Drugstores': ['drugstore', 'pharmacy']
         }
 
+        self._compile()
+
         print(f"💳 Loaded {len(self.credit_cards)} credit cards for optimization")
 
     def _load_credit_cards(self) -> List[Dict]:
@@ -41,47 +130,62 @@ class CreditCardOptimizer:
             print(f"❌ Error loading credit cards: {e}")
             return []
 
-    def analyze_transactions(self, transactions: List[Dict]) -> Dict[str, Any]:
+    # ---------- reward matrix ----------
+
+    def _compile(self):
+        """Parse every card's reward lines once; category columns are filled in on first use"""
+        self._card_rewards: List[List[Tuple[float, str]]] = [
+            [(self._extract_reward_rate(reward), reward.lower()) for reward in card.get('rewards', [])]
+            for card in self.credit_cards
+        ]
+        self.annual_fees = np.array([_parse_fee(card.get('annual_fee', '$0')) for card in self.credit_cards])
+        self._card_index = {card['name'].lower(): i for i, card in enumerate(self.credit_cards)}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._columns_lock = threading.Lock()
+
+        # The categories the mapping knows about are compiled up front
+        self.reward_matrix(list(self.category_mapping))
+
+    def _rate_column(self, category: str) -> np.ndarray:
+        """Best matching reward rate of every card for one spending category (0 if none match)"""
+        column = self._columns.get(category)
+        if column is None:
+            column = np.array([
+                max((rate for rate, text in rewards if self._category_matches(category, text)), default=0.0)
+                for rewards in self._card_rewards
+            ])
+            with self._columns_lock:
+                self._columns[category] = column
+        return column
+
+    def reward_matrix(self, categories: List[str]) -> np.ndarray:
+        """Reward rates (%) as a cards × categories matrix"""
+        if not categories:
+            return np.zeros((len(self.credit_cards), 0))
+        return np.column_stack([self._rate_column(category) for category in categories])
+
+    @staticmethod
+    def _spending_vector(category_spending: Dict) -> Tuple[List[str], np.ndarray]:
+        categories = list(category_spending)
+        return categories, np.array([category_spending[c]['total'] for c in categories], dtype=float)
+
+    def analyze_transactions(self, transactions: Iterable[Dict], period_months: float = 1) -> Dict[str, Any]:
         """
         Analyze transactions and recommend best credit cards
+        Transactions are consumed in one pass (lists or generators); period_months is how
+        many months they cover (MARK passes the current month), used to annualize the wallet
         
         Returns:
-            - category_spending: Breakdown by category
+            - category_spending: Totals, counts and largest purchases by category
             - recommended_cards: Best cards for user's spending pattern
             - best_card_per_category: Best card for each spending category
             - potential_savings: Estimated savings with optimal cards
             - current_vs_optimal: Comparison
         """
         # Calculate spending by category
-        category_spending = {}
-        total_spending = 0
-
-        for txn in transactions:
-            amount = abs(txn.get('amount', 0))
-            category = txn.get('classified_category', 'Other')
-
-            # Skip income
-            if txn.get('amount', 0) < 0:
-                continue
-
-            if category not in category_spending:
-                category_spending[category] = {
-                    'total': 0,
-                    'count': 0,
-                    'transactions': []
-                }
-
-            category_spending[category]['total'] += amount
-            category_spending[category]['count'] += 1
-            category_spending[category]['transactions'].append(txn)
-            total_spending += amount
-
-        # Calculate percentages
-        for category in category_spending:
-            category_spending[category]['percentage'] = (
-                category_spending[category]['total'] / total_spending * 100
-                if total_spending > 0 else 0
-            )
+        aggregator = CategoryAggregator().extend(transactions)
+        category_spending = aggregator.category_spending()
+        total_spending = aggregator.total_spending
 
         # Find best cards for each category
         card_recommendations = self._recommend_cards_by_category(category_spending)
@@ -92,77 +196,60 @@ class CreditCardOptimizer:
         # Calculate potential savings
         savings_analysis = self._calculate_savings(category_spending, card_recommendations)
 
+        # Which cards to hold together, net of every card's fee
+        wallet = self.optimize_wallet(
+            category_spending,
+            k=int(os.getenv("WALLET_MAX_CARDS", "3")),
+            period_months=period_months
+        )
+
         return {
+            'version': ANALYSIS_VERSION,
             'total_spending': total_spending,
             'category_spending': category_spending,
             'recommended_cards': card_recommendations,
             'best_card_per_category': best_card_per_category,
             'savings_analysis': savings_analysis,
+            'wallet': wallet,
             'analyzed_at': datetime.now().isoformat()
         }
 
     def _recommend_cards_by_category(self, category_spending: Dict) -> List[Dict]:
         """Recommend best credit cards based on spending categories"""
-        recommendations = []
+        if not self.credit_cards:
+            return []
 
-        # Analyze each card's rewards for user's spending
-        for card in self.credit_cards:
-            card_score = 0
-            card_rewards = {}
-
-            # Parse rewards
-            rewards = card.get('rewards', [])
-
-            for category, data in category_spending.items():
-                spending = data['total']
-                best_rate = 0
-
-                # Find best reward rate for this category
-                for reward in rewards:
-                    reward_lower = reward.lower()
-                    rate = self._extract_reward_rate(reward)
-
-                    # Check if reward applies to this category
-                    if self._category_matches(category, reward_lower):
-                        if rate > best_rate:
-                            best_rate = rate
-
-                # Calculate points/cashback for this category
-                if best_rate > 0:
-                    card_rewards[category] = {
-                        'rate': best_rate,
-                        'spending': spending,
-                        'value': spending * (best_rate / 100)
-                    }
-                    card_score += spending * (best_rate / 100)
+        categories, spending = self._spending_vector(category_spending)
+        rates = self.reward_matrix(categories)
+
+        # Card score: rewards earned on matching categories only (no base rate)
+        values = spending * (rates / 100)
+        totals = values.sum(axis=1)
 
-            # Add card to recommendations
+        recommendations = []
+        for i in np.argsort(-totals, kind='stable')[:5]:  # Top 5 cards
+            card = self.credit_cards[i]
             recommendations.append({
                 'card': card,
-                'total_value': card_score,
-                'category_rewards': card_rewards,
+                'total_value': float(totals[i]),
+                'category_rewards': {
+                    category: {
+                        'rate': float(rates[i, j]),
+                        'spending': category_spending[category]['total'],
+                        'value': float(values[i, j])
+                    }
+                    for j, category in enumerate(categories) if rates[i, j] > 0
+                },
                 'annual_fee': card.get('annual_fee', '$0')
             })
 
-        # Sort by total value
-        recommendations.sort(key=lambda x: x['total_value'], reverse=True)
-
-        return recommendations[:5]  # Top 5 cards
+        return recommendations
 
     def _extract_reward_rate(self, reward_text: str) -> float:
         """Extract reward rate from text (e.g., '3x points' -> 3.0)"""
-        import re
-
-        # Look for patterns like "3x", "3%", "3 points"
-        patterns = [
-            r'(\d+(?:\.\d+)?)x',
-            r'(\d+(?:\.\d+)?)%',
-            r'(\d+(?:\.\d+)?)\s*points',
-            r'(\d+(?:\.\d+)?)\s*cash\s*back'
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, reward_text.lower())
+        text = reward_text.lower()
+        for pattern in _RATE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return float(match.group(1))
 
@@ -230,8 +317,7 @@ class CreditCardOptimizer:
         savings_percentage = (potential_savings / total_spending * 100) if total_spending > 0 else 0
 
         # Subtract annual fees (simplified - use top card's fee)
-        annual_fee_str = best_card['card'].get('annual_fee', '$0')
-        annual_fee = float(annual_fee_str.replace('$', '').replace(',', '')) if '$' in annual_fee_str else 0
+        annual_fee = _parse_fee(best_card['card'].get('annual_fee', '$0'))
 
         net_savings = potential_savings - annual_fee
 
@@ -247,93 +333,55 @@ class CreditCardOptimizer:
 
     def get_card_details(self, card_name: str) -> Optional[Dict]:
         """Get details for a specific credit card"""
-        for card in self.credit_cards:
-            if card['name'].lower() == card_name.lower():
-                return card
-        return None
+        i = self._card_index.get(card_name.lower())
+        return self.credit_cards[i] if i is not None else None
 
     def _find_best_card_per_category(self, category_spending: Dict) -> Dict[str, Dict]:
         """Find the single best credit card for each spending category"""
         best_cards = {}
-
-        for category, data in category_spending.items():
-            spending = data['total']
-            best_card = None
-            best_rate = 0
-            best_value = 0
-
-            # Check each card for this category
-            for card in self.credit_cards:
-                # Find best reward rate for this category
-                category_rate = 1.0  # Default 1%
-
-                for reward in card.get('rewards', []):
-                    rate = self._extract_reward_rate(reward)
-                    if self._category_matches(category, reward.lower()):
-                        if rate > category_rate:
-                            category_rate = rate
-
-                # Calculate value
-                value = spending * (category_rate / 100)
-
-                # Track best card
-                if value > best_value:
-                    best_value = value
-                    best_rate = category_rate
-                    best_card = card
-
-            if best_card:
-                best_cards[category] = {
-                    'card_name': best_card['name'],
-                    'card_issuer': best_card['issuer'],
-                    'reward_rate': f"{best_rate}%",
-                    'spending': spending,
-                    'annual_value': round(best_value, 2),
-                    'annual_fee': best_card.get('annual_fee', '$0')
-                }
+        if not self.credit_cards:
+            return best_cards
+
+        categories, spending = self._spending_vector(category_spending)
+        # Every card earns at least a 1% base rate
+        rates = np.maximum(self.reward_matrix(categories), 1.0)
+        values = spending * (rates / 100)
+        winners = values.argmax(axis=0)
+
+        for j, category in enumerate(categories):
+            i = winners[j]
+            if values[i, j] <= 0:
+                continue
+            best_card = self.credit_cards[i]
+            best_cards[category] = {
+                'card_name': best_card['name'],
+                'card_issuer': best_card['issuer'],
+                'reward_rate': f"{float(rates[i, j])}%",
+                'spending': category_spending[category]['total'],
+                'annual_value': round(float(values[i, j]), 2),
+                'annual_fee': best_card.get('annual_fee', '$0')
+            }
 
         return best_cards
 
-    def compare_cards(self, card_names: List[str], transactions: List[Dict]) -> Dict:
+    def compare_cards(self, card_names: List[str], transactions: Iterable[Dict]) -> Dict:
         """Compare specific cards for user's spending pattern"""
-        comparison = []
-
-        for card_name in card_names:
-            card = self.get_card_details(card_name)
-            if not card:
-                continue
-
-            # Calculate value for this card
-            total_value = 0
-            category_breakdown = {}
+        category_spending = CategoryAggregator(top_n=0).extend(transactions).category_spending()
 
-            # Analyze spending
-            for txn in transactions:
-                amount = abs(txn.get('amount', 0))
-                category = txn.get('classified_category', 'Other')
-
-                if txn.get('amount', 0) < 0:  # Skip income
-                    continue
-
-                # Find best reward rate
-                best_rate = 1.0  # Default
-                for reward in card.get('rewards', []):
-                    rate = self._extract_reward_rate(reward)
-                    if self._category_matches(category, reward.lower()):
-                        if rate > best_rate:
-                            best_rate = rate
-
-                value = amount * (best_rate / 100)
-                total_value += value
-
-                if category not in category_breakdown:
-                    category_breakdown[category] = {'value': 0, 'rate': best_rate}
-                category_breakdown[category]['value'] += value
+        indices = [i for i in (self._card_index.get(name.lower()) for name in card_names) if i is not None]
+        categories, spending = self._spending_vector(category_spending)
+        rates = np.maximum(self.reward_matrix(categories)[indices], 1.0)
+        values = spending * (rates / 100)
 
+        comparison = []
+        for row, i in enumerate(indices):
             comparison.append({
-                'card': card,
-                'total_value': round(total_value, 2),
-                'category_breakdown': category_breakdown
+                'card': self.credit_cards[i],
+                'total_value': round(float(values[row].sum()), 2),
+                'category_breakdown': {
+                    category: {'value': float(values[row, j]), 'rate': float(rates[row, j])}
+                    for j, category in enumerate(categories)
+                }
             })
 
         # Sort by value
@@ -344,6 +392,188 @@ class CreditCardOptimizer:
             'winner': comparison[0]['card']['name'] if comparison else None
         }
 
+    # ---------- wallet optimization ----------
+
+    @staticmethod
+    def _undominated(gains: np.ndarray, fees: np.ndarray) -> np.ndarray:
+        """
+        Cards no other card beats outright (at least as much reward in every category
+        for no more fee, and strictly better somewhere) - only these can be in an optimal wallet
+        """
+        # Identical cards: keep the first of each
+        _, first = np.unique(np.column_stack([gains, fees]), axis=0, return_index=True)
+        first = np.sort(first)
+        gains, fees = gains[first], fees[first]
+
+        # Skyline pass: a card can only be dominated by one that sorts before it (lower fee,
+        # then higher total), and dominance is transitive, so compare against survivors only
+        order = np.lexsort((-gains.sum(axis=1), fees))
+        survivors = np.array([], dtype=int)
+        for start in range(0, len(order), 256):
+            block = order[start:start + 256]
+            others = np.concatenate([survivors, block])
+            at_least = (gains[others][None, :, :] >= gains[block][:, None, :]).all(axis=2) & (fees[others][None, :] <= fees[block][:, None])
+            strictly = (gains[others][None, :, :] > gains[block][:, None, :]).any(axis=2) | (fees[others][None, :] < fees[block][:, None])
+            survivors = np.concatenate([survivors, block[~(at_least & strictly).any(axis=1)]])
+        return first[np.sort(survivors)]
+
+    @staticmethod
+    def _wallet_exact(gains: np.ndarray, fees: np.ndarray, k: int,
+                      incumbent: Tuple[List[int], float], max_nodes: int) -> Tuple[List[int], float, int, bool]:
+        """
+        Branch and bound over card combinations (up to k cards), starting from a known wallet
+        Returns the best wallet found, its value, nodes visited and whether the search finished
+        """
+        best_wallet, best_value = list(incumbent[0]), incumbent[1]
+        nodes = 0
+
+        def search(remaining: np.ndarray, chosen: List[int], cover: np.ndarray, value: float) -> bool:
+            nonlocal nodes, best_wallet, best_value
+            nodes += 1
+            if value > best_value + 1e-9:
+                best_wallet, best_value = list(chosen), value
+            slots = k - len(chosen)
+            if slots == 0 or not len(remaining):
+                return True
+            if nodes >= max_nodes:
+                return False
+
+            # Each remaining card's net gain on top of this wallet, best first
+            marginal = np.maximum(gains[remaining], cover).sum(axis=1) - cover.sum() - fees[remaining]
+            # Coverage is submodular: a card that doesn't pay for itself now never will
+            paying = marginal > 1e-9
+            order = np.argsort(-marginal[paying], kind='stable')
+            remaining, marginal = remaining[paying][order], marginal[paying][order]
+
+            for t in range(len(remaining)):
+                # Upper bound: the next `slots` marginals added independently
+                if value + marginal[t:t + slots].sum() <= best_value + 1e-9:
+                    break
+                card = remaining[t]
+                chosen.append(int(card))
+                finished = search(remaining[t + 1:], chosen, np.maximum(cover, gains[card]), value + marginal[t])
+                chosen.pop()
+                if not finished:
+                    return False
+            return True
+
+        finished = search(np.arange(len(fees)), [], np.zeros(gains.shape[1]), 0.0)
+        return best_wallet, best_value, nodes, finished
+
+    @staticmethod
+    def _wallet_greedy(gains: np.ndarray, fees: np.ndarray, k: int) -> Tuple[List[int], float, int]:
+        """Add the best marginal card until k (or no card pays its fee), then improve by swaps"""
+        chosen: List[int] = []
+        cover = np.zeros(gains.shape[1])
+        evaluated = 0
+
+        while len(chosen) < k:
+            marginal = np.maximum(gains, cover).sum(axis=1) - cover.sum() - fees
+            marginal[chosen] = -np.inf
+            evaluated += len(fees)
+            if marginal.size == 0:
+                break
+            i = int(marginal.argmax())
+            if marginal[i] <= 1e-9:
+                break
+            chosen.append(i)
+            cover = np.maximum(cover, gains[i])
+
+        def net(wallet: List[int]) -> float:
+            return (gains[wallet].max(axis=0).sum() if wallet else 0.0) - fees[wallet].sum()
+
+        value = net(chosen)
+        for _ in range(10):
+            improved = False
+            for slot in range(len(chosen)):
+                others = chosen[:slot] + chosen[slot + 1:]
+                base = gains[others].max(axis=0) if others else np.zeros(gains.shape[1])
+                candidate = np.maximum(gains, base).sum(axis=1) - fees - fees[others].sum()
+                candidate[others] = -np.inf
+                evaluated += len(fees)
+                i = int(candidate.argmax())
+                if candidate[i] > value + 1e-9:
+                    chosen[slot], value, improved = i, float(candidate[i]), True
+            if not improved:
+                break
+
+        return chosen, float(value), evaluated
+
+    def optimize_wallet(
+        self,
+        category_spending: Dict,
+        k: int = 3,
+        max_nodes: Optional[int] = None,
+        period_months: float = 1
+    ) -> Dict[str, Any]:
+        """
+        Best set of up to k cards for a spending profile, net of annual fees
+
+        category_spending covers period_months of spending and is scaled to a year first, so
+        fees are weighed against a year of rewards. Each category earns the best rate among the
+        wallet's cards (1% base with any card), and the gain over 1% everywhere must cover the fees.
+        A greedy + swap wallet seeds a branch and bound search; if the search exceeds max_nodes
+        (large k on a large catalog) the best wallet found so far is returned ("greedy" method).
+
+        Returns the chosen cards, which card to use per category, and the net annual value
+        """
+        if max_nodes is None:
+            max_nodes = int(os.getenv("WALLET_MAX_SEARCH_NODES", "5000"))
+
+        categories = [c for c, data in category_spending.items() if data['total'] > 0]
+        # Annual spending per category
+        spending = np.array([category_spending[c]['total'] for c in categories], dtype=float) * (12 / period_months)
+        rates = np.maximum(self.reward_matrix(categories), 1.0)
+        # Annual reward above the 1% baseline, per card and category
+        gains = spending * ((rates - 1.0) / 100)
+
+        candidates = self._undominated(gains, self.annual_fees) if self.credit_cards else np.array([], dtype=int)
+        gains_c, fees_c = gains[candidates], self.annual_fees[candidates]
+        nodes, finished = 0, True
+        if not len(candidates):
+            # No catalog (or nothing to spend on) - the empty wallet, 1% base everywhere
+            best, k = ([], 0.0), 0
+        else:
+            # Deepen one card at a time: the best smaller wallet is the next search's incumbent
+            best = self._wallet_greedy(gains_c, fees_c, k)[:2]
+        for size in range(1, k + 1):
+            picked, value, used, finished = self._wallet_exact(gains_c, fees_c, size, best, max_nodes - nodes)
+            nodes += used
+            best = (picked, value)
+            if not finished:
+                break
+        picked, net_gain = best
+        wallet = [int(candidates[i]) for i in picked]
+
+        assignments = {}
+        for j, category in enumerate(categories):
+            best = max(wallet, key=lambda i: rates[i, j]) if wallet else None
+            rate = float(rates[best, j]) if best is not None else 1.0
+            assignments[category] = {
+                'card_name': self.credit_cards[best]['name'] if best is not None and rate > 1.0 else 'Any card (1% base)',
+                'reward_rate': f"{rate}%",
+                'annual_spending': round(float(spending[j]), 2),
+                'annual_value': round(float(spending[j]) * rate / 100, 2)
+            }
+
+        baseline = float(spending.sum()) * 0.01
+        annual_fees = float(self.annual_fees[wallet].sum()) if wallet else 0.0
+        return {
+            'cards': [
+                {'name': self.credit_cards[i]['name'], 'issuer': self.credit_cards[i].get('issuer'),
+                 'annual_fee': self.credit_cards[i].get('annual_fee', '$0')}
+                for i in wallet
+            ],
+            'category_assignments': assignments,
+            'annual_rewards': round(baseline + net_gain + annual_fees, 2),
+            'annual_fees': round(annual_fees, 2),
+            'net_value': round(baseline + net_gain, 2),
+            'gain_vs_baseline': round(net_gain, 2),
+            'method': "exact" if finished else "greedy",
+            'candidates': int(len(candidates)),
+            'search_nodes': nodes
+        }
+
 
 # Global optimizer instance
 credit_card_optimizer = CreditCardOptimizer()
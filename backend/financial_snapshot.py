@@ -0,0 +1,245 @@
+"""
+Per-user Financial Snapshot for BuckBounty
+Current-month category breakdowns and budget computed once per data version
+Updated incrementally as transactions are ingested; cached in memory and Redis
+Only aggregates and a few example transactions are kept - full lists come from the log on demand
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from redis_cache import redis_cache
+from agents.session_store import SessionStore
+
+# Bumped when the cached snapshot layout changes - older Redis copies are rebuilt
+SNAPSHOT_FORMAT = 2
+
+# Largest transactions kept per category as examples
+CATEGORY_EXEMPLARS = 10
+
+
+def _month_key(date: datetime) -> str:
+    return date.strftime('%Y-%m')
+
+
+def _previous_month_key(date: datetime) -> str:
+    return _month_key(date.replace(day=1) - timedelta(days=1))
+
+
+def _category_name(txn: Dict) -> str:
+    """Plaid category as a string (lists use their first element)"""
+    category = txn.get('category', 'Other')
+    if isinstance(category, list):
+        category = category[0] if category else 'Other'
+    return str(category) if category else 'Other'
+
+
+class FinancialSnapshot:
+    """Aggregates for one user and month, built from the transaction log"""
+
+    def __init__(self, user_id: str, month: str, previous_month: str):
+        self.user_id = user_id
+        self.month = month
+        self.previous_month = previous_month
+
+        # Current month
+        self.transaction_count = 0
+        self.total_spent = 0.0
+        self.category_breakdown: Dict[str, Dict[str, Any]] = {}
+        # Spending only (income skipped), by classified category - what the dashboard shows
+        self.classified_stats: Dict[str, Dict[str, float]] = {}
+        self.classified_total = 0.0
+
+        # Previous month (dashboard comparison)
+        self.previous_transaction_count = 0
+        self.previous_classified_stats: Dict[str, Dict[str, float]] = {}
+        self.previous_classified_total = 0.0
+
+        self.monthly_budget = 0.0
+        self.budget_stamp: Optional[str] = None
+
+        # Position in the transaction log this snapshot has consumed
+        self.processed = 0
+        self.last_id: Optional[str] = None
+        # VectorDB revision the aggregates were built at (reclassification forces a rebuild)
+        self.revision = 0
+        self.format = SNAPSHOT_FORMAT
+
+    @property
+    def version(self) -> str:
+        return f"{self.month}:{self.revision}:{self.processed}:{self.budget_stamp or ''}"
+
+    @staticmethod
+    def _add_classified(stats: Dict[str, Dict[str, float]], txn: Dict) -> float:
+        amount = txn.get('amount', 0)
+        if amount < 0:
+            return 0.0
+        entry = stats.setdefault(txn.get('classified_category', 'Other'), {'count': 0, 'amount': 0})
+        entry['count'] += 1
+        entry['amount'] += abs(amount)
+        return abs(amount)
+
+    def apply(self, txn: Dict):
+        """Fold one newly ingested transaction into the aggregates"""
+        self.processed += 1
+        self.last_id = txn.get('id')
+
+        date = txn.get('date', '') or ''
+        if date.startswith(self.month):
+            amount = abs(txn.get('amount', 0))
+            self.transaction_count += 1
+            self.total_spent += amount
+
+            category = self.category_breakdown.setdefault(
+                _category_name(txn),
+                {'total': 0, 'count': 0, 'top_transactions': []}
+            )
+            category['total'] += amount
+            category['count'] += 1
+
+            # Keep the largest few, in the order they were logged, so the payload stays bounded
+            exemplars = category['top_transactions']
+            exemplars.append({
+                'description': txn.get('description', 'Unknown'),
+                'amount': amount,
+                'date': date
+            })
+            if len(exemplars) > CATEGORY_EXEMPLARS:
+                exemplars.remove(min(exemplars, key=lambda t: t['amount']))
+
+            self.classified_total += self._add_classified(self.classified_stats, txn)
+
+        elif date.startswith(self.previous_month):
+            self.previous_transaction_count += 1
+            self.previous_classified_total += self._add_classified(self.previous_classified_stats, txn)
+
+    def current_transactions(self, metadata: List[Dict]) -> List[Dict]:
+        """This month's transactions, read back from the transaction log (not stored in the snapshot)"""
+        return [txn for txn in metadata[:self.processed] if (txn.get('date', '') or '').startswith(self.month)]
+
+    def set_budget(self, amount: float, stamp: Optional[str]):
+        self.monthly_budget = amount or 0.0
+        self.budget_stamp = stamp
+
+    def budget_or(self, default: float) -> float:
+        """Monthly budget, or `default` if none is set"""
+        return self.monthly_budget if self.monthly_budget else default
+
+    def top_categories(self, n: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Categories sorted by spend (highest first)"""
+        ranked = sorted(self.category_breakdown.items(), key=lambda x: x[1]['total'], reverse=True)
+        return ranked[:n] if n else ranked
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FinancialSnapshot":
+        snapshot = cls(data['user_id'], data['month'], data['previous_month'])
+        snapshot.__dict__.update(data)
+        return snapshot
+
+
+class SnapshotStore:
+    """
+    In-memory snapshots per user, backed by Redis, kept in step with the VectorDB log
+    Idle or least recently used snapshots are dropped from memory (the Redis copy restores them)
+    """
+
+    def __init__(self):
+        self._snapshots = SessionStore("financial_snapshots", spill=False)
+        self._lock = threading.Lock()
+        self.stats = {
+            "builds": 0,
+            "incremental_updates": 0,
+            "memory_hits": 0,
+            "redis_restores": 0
+        }
+
+    def _is_consistent(self, snapshot: FinancialSnapshot, vector_db, month: str) -> bool:
+        """Check the snapshot still describes a prefix of the current transaction log"""
+        metadata = vector_db.metadata
+        if snapshot.month != month or snapshot.revision != vector_db.revision:
+            return False
+        if snapshot.processed > len(metadata):
+            return False
+        if snapshot.processed == 0:
+            return True
+        return metadata[snapshot.processed - 1].get('id') == snapshot.last_id
+
+    def get(self, user_id: str, vector_db) -> FinancialSnapshot:
+        """Get the user's snapshot, applying any transactions ingested since it was built"""
+        with self._lock:
+            snapshot = self._snapshots.get(user_id, create=False)
+            if snapshot is None:
+                cached = redis_cache.get_financial_snapshot(user_id)
+                if cached and cached.get('format') == SNAPSHOT_FORMAT:
+                    snapshot = FinancialSnapshot.from_dict(cached)
+                    self.stats["redis_restores"] += 1
+
+            snapshot, changed = self._sync(user_id, snapshot, vector_db)
+            self._snapshots.put(user_id, snapshot)
+
+        if changed:
+            redis_cache.cache_financial_snapshot(user_id, snapshot.to_dict())
+
+        return snapshot
+
+    def _sync(self, user_id: str, snapshot: Optional[FinancialSnapshot], vector_db) -> Tuple[FinancialSnapshot, bool]:
+        """Bring a snapshot up to date with the log and budgets; returns it and whether it changed"""
+        now = datetime.now()
+        month = _month_key(now)
+        metadata = vector_db.metadata
+
+        changed = False
+        if snapshot is None or not self._is_consistent(snapshot, vector_db, month):
+            if snapshot is None:
+                snapshot = FinancialSnapshot(user_id, month, _previous_month_key(now))
+            else:
+                # Rebuilt in place, so a resident snapshot keeps its slot
+                snapshot.__init__(user_id, month, _previous_month_key(now))
+            snapshot.revision = vector_db.revision
+            self.stats["builds"] += 1
+            changed = True
+        elif snapshot.processed < len(metadata):
+            self.stats["incremental_updates"] += 1
+        else:
+            self.stats["memory_hits"] += 1
+
+        if snapshot.processed < len(metadata):
+            for txn in metadata[snapshot.processed:]:
+                snapshot.apply(txn)
+            changed = True
+
+        budget_entry = vector_db.budgets.get(f"{user_id}_{month}") or {}
+        budget_stamp = budget_entry.get('updated_at')
+        if changed or snapshot.budget_stamp != budget_stamp:
+            snapshot.set_budget(vector_db.get_budget(user_id, month), budget_stamp)
+            changed = True
+
+        return snapshot, changed
+
+    def refresh(self, vector_db):
+        """Fold newly ingested transactions/budgets into every resident snapshot (recency untouched)"""
+        for user_id in self._snapshots:
+            with self._lock:
+                snapshot = self._snapshots.peek(user_id)
+                if snapshot is None:
+                    continue
+                snapshot, changed = self._sync(user_id, snapshot, vector_db)
+            if changed:
+                redis_cache.cache_financial_snapshot(user_id, snapshot.to_dict())
+
+    def get_stats(self) -> Dict[str, Any]:
+        sessions = self._snapshots.get_stats()
+        return {
+            **self.stats,
+            "users": sessions["resident"],
+            "max_resident": sessions["max_resident"],
+            "evicted": sessions["evicted_ttl"] + sessions["evicted_lru"]
+        }
+
+
+# Global snapshot store
+snapshot_store = SnapshotStore()
@@ -0,0 +1,149 @@
+"""
+Shared HTTP Client Pool for BuckBounty
+Long-lived keep-alive httpx clients (one pool per upstream host) shared by all agents
+Tracks connection reuse so we can see how many TCP/TLS handshakes are avoided
+"""
+
+import os
+import asyncio
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# HTTP/2 needs the optional `h2` package (installed via httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientPool:
+    """Per-host pooled AsyncClients with configurable limits and reuse metrics"""
+
+    def __init__(self):
+        """Read pool configuration from environment"""
+        self.max_connections_per_host = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS_PER_HOST", "10"))
+        self.max_keepalive_per_host = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE_PER_HOST", "5"))
+        self.keepalive_expiry = float(os.getenv("HTTP_POOL_KEEPALIVE_EXPIRY", "60"))
+        self.connect_timeout = float(os.getenv("HTTP_POOL_CONNECT_TIMEOUT", "10"))
+        self.read_timeout = float(os.getenv("HTTP_POOL_READ_TIMEOUT", "60"))
+        self.http2 = HTTP2_AVAILABLE and os.getenv("HTTP_POOL_HTTP2", "true").lower() != "false"
+
+        # host -> (client, owning event loop)
+        self._clients: Dict[str, Tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+        self._metrics: Dict[str, Dict[str, int]] = {}
+
+    def _host_key(self, url: str) -> str:
+        """Normalize a URL to its scheme://host:port pool key"""
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        return f"{parts.scheme}://{parts.hostname}:{port}"
+
+    def _new_metrics(self) -> Dict[str, int]:
+        return {
+            "requests": 0,
+            "new_connections": 0,
+            "tls_handshakes": 0,
+            "errors": 0
+        }
+
+    def _make_trace(self, host: str):
+        """httpcore trace hook - counts fresh TCP connects and TLS handshakes"""
+        metrics = self._metrics[host]
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            if event_name == "connection.connect_tcp.started":
+                metrics["new_connections"] += 1
+            elif event_name == "connection.start_tls.started":
+                metrics["tls_handshakes"] += 1
+
+        return trace
+
+    def _build_client(self, host: str) -> httpx.AsyncClient:
+        """Create a pooled client for one upstream host"""
+        self._metrics.setdefault(host, self._new_metrics())
+        trace = self._make_trace(host)
+        metrics = self._metrics[host]
+
+        async def on_request(request: httpx.Request):
+            metrics["requests"] += 1
+            request.extensions["trace"] = trace
+
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections_per_host,
+                max_keepalive_connections=self.max_keepalive_per_host,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            follow_redirects=True,
+            event_hooks={"request": [on_request]}
+        )
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """
+        Get the shared client for the host of `url`
+        Clients are bound to the running event loop and rebuilt if the loop changes
+        """
+        host = self._host_key(url)
+        loop = asyncio.get_running_loop()
+
+        entry = self._clients.get(host)
+        if entry:
+            client, owner_loop = entry
+            if owner_loop is loop and not client.is_closed:
+                return client
+
+        client = self._build_client(host)
+        self._clients[host] = (client, loop)
+        return client
+
+    def record_error(self, url: str):
+        """Count a failed request against its host"""
+        host = self._host_key(url)
+        self._metrics.setdefault(host, self._new_metrics())["errors"] += 1
+
+    async def aclose(self):
+        """Close every pooled client (called from the FastAPI lifespan hook)"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+
+        for client, owner_loop in clients:
+            if owner_loop.is_closed() or client.is_closed:
+                continue
+            try:
+                await client.aclose()
+            except Exception as e:
+                print(f"⚠️ Error closing HTTP client: {e}")
+
+        if clients:
+            print(f"🔌 Closed {len(clients)} pooled HTTP clients")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-host connection reuse metrics"""
+        hosts = {}
+        for host, metrics in self._metrics.items():
+            requests = metrics["requests"]
+            reused = max(requests - metrics["new_connections"], 0)
+            hosts[host] = {
+                **metrics,
+                "reused_connections": reused,
+                "reuse_ratio": round(reused / requests, 3) if requests else 0.0
+            }
+
+        return {
+            "http2": self.http2,
+            "max_connections_per_host": self.max_connections_per_host,
+            "max_keepalive_per_host": self.max_keepalive_per_host,
+            "open_clients": len(self._clients),
+            "hosts": hosts
+        }
+
+
+# Global HTTP client pool instance
+http_pool = HTTPClientPool()
@@ -1,11 +1,127 @@
 """
 Investment Advisor
 Generates investment portfolio breakdown based on savings from credit card optimization
+Projections are simulated: thousands of monthly return paths per asset class, reported as percentile bands
 """
 
-from typing import Dict, Any, List
+import os
+import re
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
+import numpy as np
+
+# Annual (mean return, volatility, market loading) per asset class - long-run historical ballparks
+# Pairwise correlation is the product of the two loadings (a one-factor market model)
+ASSET_CLASS_ASSUMPTIONS = {
+    'Cash/Money Market': (0.030, 0.010, 0.00),
+    'Bonds': (0.040, 0.060, 0.20),
+    'Large Cap Stocks': (0.080, 0.160, 0.95),
+    'Index Funds': (0.080, 0.150, 0.97),
+    'Index Funds (S&P 500)': (0.080, 0.150, 0.97),
+    'Dividend Stocks': (0.075, 0.140, 0.90),
+    'International Stocks': (0.070, 0.180, 0.80),
+    'REITs': (0.075, 0.190, 0.70),
+    'Growth Stocks': (0.100, 0.220, 0.90),
+    'Small Cap Stocks': (0.090, 0.210, 0.85),
+    'Tech Stocks': (0.110, 0.260, 0.85)
+}
+DEFAULT_ASSUMPTION = (0.070, 0.150, 0.90)
+
+PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class MonteCarloEngine:
+    """Vectorized monthly-return simulation of a rebalanced portfolio with fixed contributions"""
+
+    def __init__(self, paths: Optional[int] = None, seed: Optional[int] = None, cache_size: Optional[int] = None):
+        self.paths = paths or int(os.getenv("MONTE_CARLO_PATHS", "10000"))
+        self.seed = seed if seed is not None else int(os.getenv("MONTE_CARLO_SEED", "42"))
+        self.cache_size = cache_size or int(os.getenv("MONTE_CARLO_CACHE_SIZE", "256"))
+        self._cache: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self.stats = {"simulations": 0, "cache_hits": 0}
+
+    def _model(self, allocation: Dict[str, float]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Portfolio weights, monthly log drift and volatility, and the Cholesky factor of the correlations"""
+        held = [(asset, float(weight)) for asset, weight in allocation.items() if weight and weight > 0]
+        if not held:
+            held = [('Index Funds', 1.0)]
+
+        weights = np.array([weight for _, weight in held])
+        weights /= weights.sum()
+        mean, vol, loading = np.array(
+            [ASSET_CLASS_ASSUMPTIONS.get(asset, DEFAULT_ASSUMPTION) for asset, _ in held]
+        ).T
+
+        correlation = np.outer(loading, loading)
+        np.fill_diagonal(correlation, 1.0)
+        chol = np.linalg.cholesky(correlation)
+
+        # Lognormal monthly returns whose expected annual compounding matches the mean
+        sigma = vol / np.sqrt(12)
+        drift = np.log1p(mean) / 12 - sigma ** 2 / 2
+        return weights, drift, sigma, chol
+
+    def simulate(
+        self,
+        allocation: Dict[str, float],
+        monthly_contribution: float,
+        years: List[int],
+        paths: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Portfolio value percentiles at each horizon (in years)
+        Same allocation, contribution, horizons, paths and seed always give the same (cached) result
+        """
+        paths = paths or self.paths
+        seed = self.seed if seed is None else seed
+        monthly_contribution = round(monthly_contribution, 2)
+        horizons = sorted({int(y) for y in years if y > 0})
+        key = (tuple(sorted(allocation.items())), monthly_contribution, tuple(horizons), paths, seed)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats["cache_hits"] += 1
+            return cached
+
+        weights, drift, sigma, chol = self._model(allocation)
+        rng = np.random.default_rng(seed)
+        wealth = np.zeros(paths)
+        bands = {}
+
+        # One year of draws at a time keeps memory at 12 x paths x assets
+        for year in range(1, (horizons[-1] if horizons else 0) + 1):
+            shocks = rng.standard_normal((12, paths, len(weights))) @ chol.T
+            growth = np.exp(drift + shocks * sigma) @ weights  # (12, paths), rebalanced monthly
+
+            # Contributions land at month end: each grows by the months after it
+            # suffix[t] = growth[t] * ... * growth[11]
+            suffix = np.cumprod(growth[::-1], axis=0)[::-1]
+            wealth = wealth * suffix[0] + monthly_contribution * (suffix[1:].sum(axis=0) + 1)
+
+            if year in horizons:
+                invested = monthly_contribution * 12 * year
+                values = np.percentile(wealth, PERCENTILES)
+                bands[year] = {
+                    'total_invested': round(invested, 2),
+                    'percentiles': {f"p{p}": round(float(v), 2) for p, v in zip(PERCENTILES, values)},
+                    'mean': round(float(wealth.mean()), 2),
+                    'probability_of_loss': round(float((wealth < invested).mean()), 4)
+                }
+
+        result = {'paths': paths, 'seed': seed, 'bands': bands}
+        self.stats["simulations"] += 1
+        self._cache[key] = result
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "cached": len(self._cache), "paths": self.paths}
+
 
 class InvestmentAdvisor:
     """Generate investment portfolio recommendations based on savings"""
@@ -93,6 +209,8 @@ class InvestmentAdvisor:
             ]
         }
 
+        self.monte_carlo = MonteCarloEngine()
+
         print("📈 Investment Advisor initialized")
 
     def generate_portfolio(
@@ -137,7 +255,8 @@ class InvestmentAdvisor:
         projections = self._calculate_projections(
             monthly_savings,
             strategy['expected_return'],
-            time_horizon
+            time_horizon,
+            strategy['allocation']
         )
 
         return {
@@ -171,12 +290,16 @@ class InvestmentAdvisor:
         self,
         monthly_investment: float,
         expected_return_str: str,
-        time_horizon: str
+        time_horizon: str,
+        allocation: Optional[Dict[str, float]] = None
     ) -> Dict[str, Any]:
-        """Calculate investment growth projections"""
+        """
+        Calculate investment growth projections
+        The annuity formula gives the average-return path; with an allocation, each horizon
+        also gets Monte Carlo percentile bands and the chance of ending below what was invested
+        """
         
         # Parse expected return (take average)
-        import re
         returns = re.findall(r'(\d+)', expected_return_str)
         if len(returns) >= 2:
             avg_return = (float(returns[0]) + float(returns[1])) / 2 / 100
@@ -192,6 +315,8 @@ class InvestmentAdvisor:
 
         years = periods.get(time_horizon, [1, 5, 10])
 
+        simulation = self.monte_carlo.simulate(allocation, monthly_investment, years) if allocation else None
+
         projections = []
 
         for year in years:
@@ -210,19 +335,31 @@ class InvestmentAdvisor:
             total_invested = monthly_investment * months
             gains = future_value - total_invested
 
-            projections.append({
+            projection = {
                 'year': year,
                 'total_invested': round(total_invested, 2),
                 'projected_value': round(future_value, 2),
                 'gains': round(gains, 2),
                 'return_percentage': round((gains / total_invested * 100) if total_invested > 0 else 0, 2)
-            })
+            }
+            if simulation:
+                band = simulation['bands'][year]
+                projection['percentiles'] = band['percentiles']
+                projection['probability_of_loss'] = band['probability_of_loss']
+            projections.append(projection)
 
-        return {
+        result = {
             'annual_return_rate': f"{avg_return * 100:.1f}%",
             'projections': projections,
             'note': 'Projections are estimates based on historical averages. Actual returns may vary.'
         }
+        if simulation:
+            result['simulation'] = {'method': 'monte_carlo', 'paths': simulation['paths'], 'seed': simulation['seed']}
+            result['note'] = (
+                'Projected values assume the average return every year. Percentile bands come from '
+                f"{simulation['paths']:,} simulated market paths - p10 is a weak market, p90 a strong one."
+            )
+        return result
 
     def _generate_next_steps(self, monthly_savings: float) -> List[str]:
         """Generate actionable next steps"""
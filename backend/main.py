@@ -12,6 +12,8 @@ if sys.platform == 'win32' and os.name == 'nt':
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from dotenv import load_dotenv
@@ -21,15 +23,28 @@ from background_tasks import BackgroundProcessor
 from bill_service import BillService
 from datetime import datetime
 import asyncio
+import json
 import stripe
 from contextlib import asynccontextmanager
 
 # Import agents
-from agents.mcp_server import mcp_server
+from agents.mcp_server import mcp_server, MCPOverloadedError
 from agents.mark_agent import MarkAgent
 from agents.bounty_hunter_1 import BountyHunter1
 from agents.bounty_hunter_2 import BountyHunter2
 from agents.scheduler import agent_scheduler
+from agents.provider_router import provider_router
+from agents.completion_cache import completion_cache
+from agents.prompt_builder import PromptBuilder, prompt_metrics
+from agents.intent_router import intent_router
+from agents.coupon_index import coupon_index
+from mention_handler import MentionHandler
+from agents.news_store import news_store
+from agents.news_ranker import news_ranker
+from agents.scraper_fetch import scraper_fetcher
+from agents.html_parsers import html_parse_pool
+from http_pool import http_pool
+from financial_snapshot import snapshot_store
 
 load_dotenv()
 
@@ -56,8 +71,16 @@ async def lifespan(app: FastAPI):
     
     yield
     
-    # Cleanup on shutdown (if needed)
+    # Cleanup on shutdown
     print("🛑 Shutting down BuckBounty API...")
+    await agent_scheduler.stop()
+    await mcp_server.stop()
+
+    # Close pooled LLM connections
+    await http_pool.aclose()
+
+    # Stop HTML parse workers
+    html_parse_pool.shutdown()
 
 app = FastAPI(title="BuckBounty API", lifespan=lifespan)
 
@@ -80,15 +103,25 @@ bill_service = BillService()
 from rag_service import RAGService
 rag_service = RAGService(dimension=384)  # Match sentence transformer dimension
 
+# @mention resolution over an incrementally maintained merchant index
+mention_handler = MentionHandler(vector_db=vector_db, rag_service=rag_service)
+
 # Initialize Stripe
 stripe_key = os.getenv('STRIPE_API_KEY', '')
 if stripe_key.startswith('sk_'):
     stripe.api_key = stripe_key
 
 # Initialize Agents
-bounty_hunter_1 = BountyHunter1()
-bounty_hunter_2 = BountyHunter2()
-mark_agent = MarkAgent(bounty_hunter_1, bounty_hunter_2)
+bounty_hunter_1 = BountyHunter1(vector_db=vector_db)
+bounty_hunter_2 = BountyHunter2(vector_db=vector_db)
+mark_agent = MarkAgent(bounty_hunter_1, bounty_hunter_2, vector_db=vector_db)
+
+# Reuse the loaded MiniLM encoder for MARK's embedding intent fallback
+if os.getenv("INTENT_EMBEDDINGS", "true").lower() != "false":
+    intent_router.attach_encoder(vector_db.encoder)
+
+# Same encoder embeds finance news for personalized ranking
+news_ranker.attach_encoder(vector_db.encoder)
 
 # Register agents with MCP server
 mcp_server.register_agent("mark", mark_agent)
@@ -145,6 +178,7 @@ async def get_transactions(user_id: str, days: int = 30, background_tasks: Backg
             plaid_transactions = plaid_service.get_transactions(user_id, days)
             for txn in plaid_transactions:
                 vector_db.add_transaction(txn)
+            snapshot_store.refresh(vector_db)
         except Exception as plaid_error:
             print(f"Plaid fetch skipped: {plaid_error}")
         
@@ -273,56 +307,10 @@ async def get_category_stats(time_filter: str = 'all'):
 async def get_dashboard_stats(user_id: str = "default"):
     """Get comprehensive dashboard statistics with current vs previous month comparison"""
     try:
-        from datetime import datetime, timedelta
-        from collections import defaultdict
-        
-        all_transactions = vector_db.get_all_transactions()
-        
-        # Get current date
-        now = datetime.now()
-        current_month_start = now.replace(day=1)
-        previous_month_end = current_month_start - timedelta(days=1)
-        previous_month_start = previous_month_end.replace(day=1)
-        
-        # Split transactions by month
-        current_month_txns = []
-        previous_month_txns = []
-        
-        for txn in all_transactions:
-            txn_date_str = txn.get('date', '')
-            if not txn_date_str:
-                continue
-            
-            try:
-                txn_date = datetime.strptime(txn_date_str, '%Y-%m-%d')
-                if txn_date >= current_month_start:
-                    current_month_txns.append(txn)
-                elif previous_month_start <= txn_date < current_month_start:
-                    previous_month_txns.append(txn)
-            except:
-                continue
-        
-        # Calculate category stats for both months
-        def calculate_category_stats(transactions):
-            stats = defaultdict(lambda: {'count': 0, 'amount': 0})
-            total_spent = 0
-            
-            for txn in transactions:
-                amount = abs(txn.get('amount', 0))
-                category = txn.get('classified_category', 'Other')
-                
-                # Skip income transactions for spending stats
-                if txn.get('amount', 0) < 0:
-                    continue
-                
-                stats[category]['count'] += 1
-                stats[category]['amount'] += amount
-                total_spent += amount
-            
-            return dict(stats), total_spent
+        snapshot = snapshot_store.get(user_id, vector_db)
         
-        current_stats, current_total = calculate_category_stats(current_month_txns)
-        previous_stats, previous_total = calculate_category_stats(previous_month_txns)
+        current_stats, current_total = snapshot.classified_stats, snapshot.classified_total
+        previous_stats, previous_total = snapshot.previous_classified_stats, snapshot.previous_classified_total
         
         # Get all unique categories
         all_categories = set(list(current_stats.keys()) + list(previous_stats.keys()))
@@ -345,14 +333,15 @@ async def get_dashboard_stats(user_id: str = "default"):
         top_category = category_comparison[0]['category'] if category_comparison else 'N/A'
         
         # Calculate average transaction
-        avg_transaction = current_total / len(current_month_txns) if current_month_txns else 0
+        current_count = snapshot.transaction_count
+        avg_transaction = current_total / current_count if current_count else 0
         
         # Get current month budget
-        budget = vector_db.get_budget(user_id, current_month_start.strftime('%Y-%m'))
+        budget = snapshot.monthly_budget
         
         return {
             'summary': {
-                'total_transactions': len(current_month_txns),
+                'total_transactions': current_count,
                 'total_spent': current_total,
                 'avg_transaction': avg_transaction,
                 'top_category': top_category,
@@ -360,11 +349,11 @@ async def get_dashboard_stats(user_id: str = "default"):
             },
             'category_comparison': category_comparison,
             'current_month': {
-                'transactions': len(current_month_txns),
+                'transactions': current_count,
                 'total': current_total
             },
             'previous_month': {
-                'transactions': len(previous_month_txns),
+                'transactions': snapshot.previous_transaction_count,
                 'total': previous_total
             }
         }
@@ -387,6 +376,7 @@ async def set_budget(user_id: str, amount: float, month: Optional[str] = None):
         
         # Save budget with embedding
         vector_db.set_budget(user_id, month, amount)
+        snapshot_store.refresh(vector_db)
         
         return {
             'success': True,
@@ -492,6 +482,7 @@ async def add_bill_transaction(request: BillTransactionRequest):
         
         # Add to vector DB
         vector_db.add_transaction(transaction)
+        snapshot_store.refresh(vector_db)
         
         return {
             'success': True,
@@ -526,72 +517,104 @@ class ChatRequest(BaseModel):
     conversation_history: Optional[List[Dict[str, Any]]] = []
     target_agent: Optional[str] = None
 
+class FanOutRequest(BaseModel):
+    user_id: str
+    # label -> {"agent": "bounty_hunter_1", "message": "..."}
+    requests: Dict[str, Dict[str, Any]]
+    deadline_seconds: Optional[float] = None
+
+def _prepare_chat_message(message: str):
+    """Process @ mentions and append merchant analysis to the message for MARK"""
+    mention_data = mention_handler.process_mentions(message)
+
+    # Add mention data to the message context if mentions exist
+    builder = PromptBuilder("mention_context", query=message)
+    builder.add_text(message)
+    if mention_data.get("has_mentions"):
+        # Append mention analysis to the message for the agent
+        builder.add_text("\n\n[SYSTEM: Merchant Analysis Available]")
+        for mention in mention_data.get("mentions", []):
+            merchant = mention.get("merchant")
+            spending = mention.get("spending_analysis", {})
+            coupons = mention.get("coupons", [])
+            suggestions = mention.get("savings_suggestions", [])
+
+            analysis = f"\n\n@{merchant.upper()} Analysis:"
+
+            # Check if transactions were found
+            if spending.get('transaction_count', 0) > 0:
+                analysis += f"\n- {spending.get('message', '')}"
+                analysis += f"\n- Total Spent: ${spending.get('total_spent', 0)}"
+                analysis += f"\n- Transactions: {spending.get('transaction_count', 0)}"
+                analysis += f"\n- Average per Transaction: ${spending.get('avg_per_transaction', 0)}"
+                analysis += f"\n- Last 30 Days: ${spending.get('monthly_average', 0)}"
+                if spending.get('date_range'):
+                    analysis += f"\n- Date Range: {spending.get('date_range')}"
+            else:
+                analysis += f"\n- {spending.get('message', 'No transactions found')}"
+                analysis += "\n- Note: User may need to link their accounts or this merchant hasn't been used recently"
+            builder.add_text(analysis)
+
+            listed_codes = set()
+            if coupons:
+                coupon_lines = []
+                for coupon in coupons:
+                    line = f"- {coupon.get('code')}: {coupon.get('description')}"
+                    if coupon.get('expiry_date'):
+                        line += f" (Expires: {coupon.get('expiry_date')})"
+                    coupon_lines.append(line)
+                included = builder.add_section(
+                    f"coupons:{merchant}",
+                    f"\n\n💰 Available Coupons ({len(coupons)}):\n",
+                    coupon_lines,
+                    budget=150
+                )
+                listed_codes = {
+                    coupon.get('code') for coupon, line in zip(coupons, coupon_lines) if line in included
+                }
+
+            if suggestions:
+                suggestion_lines = []
+                for sug in suggestions:
+                    if sug.get('type') == 'alternative':
+                        line = f"- {sug.get('title')}: {sug.get('suggestion')}"
+                        if sug.get('estimated_savings'):
+                            line += f" (Save: {sug.get('estimated_savings')})"
+                        suggestion_lines.append(line)
+                    elif sug.get('type') == 'coupon' and sug.get('code') not in listed_codes:
+                        # Coupons already listed above would only repeat context
+                        suggestion_lines.append(f"- Use code {sug.get('code')}: {sug.get('description')}")
+                builder.add_section(
+                    f"suggestions:{merchant}",
+                    "\n\n💡 Savings Suggestions:\n",
+                    suggestion_lines,
+                    budget=200
+                )
+
+    enhanced_message = builder.build().rstrip("\n")
+
+    # Log the enhanced message for debugging
+    if mention_data.get("has_mentions"):
+        print(f"\n📝 Enhanced Message being sent to MARK:")
+        print(f"{enhanced_message}")
+        print(f"\n" + "="*60 + "\n")
+
+    return enhanced_message, mention_data
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _overloaded(e: MCPOverloadedError) -> HTTPException:
+    """429 with Retry-After instead of queueing past the point of useful latency"""
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
 @app.post("/api/agents/chat")
 async def agent_chat(request: ChatRequest):
     """Chat with MARK and the agent team"""
     try:
-        # Check for @ mentions and process them
-        from mention_handler import MentionHandler
-        mention_handler = MentionHandler(vector_db=vector_db, rag_service=rag_service)
-        
-        # Log database stats
-        print(f"\n📊 Database Stats:")
-        print(f"   Vector DB: {vector_db.index.ntotal} transactions, {len(vector_db.metadata)} metadata")
-        if vector_db.metadata:
-            sample_merchants = list(set(tx.get('merchant', 'Unknown') for tx in vector_db.metadata[:10]))
-            print(f"   Sample merchants: {sample_merchants}")
-        
-        mention_data = mention_handler.process_mentions(request.message)
-        
-        # Add mention data to the message context if mentions exist
-        enhanced_message = request.message
-        if mention_data.get("has_mentions"):
-            # Append mention analysis to the message for the agent
-            enhanced_message += "\n\n[SYSTEM: Merchant Analysis Available]"
-            for mention in mention_data.get("mentions", []):
-                merchant = mention.get("merchant")
-                spending = mention.get("spending_analysis", {})
-                coupons = mention.get("coupons", [])
-                suggestions = mention.get("savings_suggestions", [])
-                
-                enhanced_message += f"\n\n@{merchant.upper()} Analysis:"
-                
-                # Check if transactions were found
-                if spending.get('transaction_count', 0) > 0:
-                    enhanced_message += f"\n- {spending.get('message', '')}"
-                    enhanced_message += f"\n- Total Spent: ${spending.get('total_spent', 0)}"
-                    enhanced_message += f"\n- Transactions: {spending.get('transaction_count', 0)}"
-                    enhanced_message += f"\n- Average per Transaction: ${spending.get('avg_per_transaction', 0)}"
-                    enhanced_message += f"\n- Last 30 Days: ${spending.get('monthly_average', 0)}"
-                    if spending.get('date_range'):
-                        enhanced_message += f"\n- Date Range: {spending.get('date_range')}"
-                else:
-                    enhanced_message += f"\n- {spending.get('message', 'No transactions found')}"
-                    enhanced_message += "\n- Note: User may need to link their accounts or this merchant hasn't been used recently"
-                
-                if coupons:
-                    enhanced_message += f"\n\n💰 Available Coupons ({len(coupons)}):"
-                    for coupon in coupons[:3]:
-                        enhanced_message += f"\n- {coupon.get('code')}: {coupon.get('description')}"
-                        if coupon.get('expiry_date'):
-                            enhanced_message += f" (Expires: {coupon.get('expiry_date')})"
-                
-                if suggestions:
-                    enhanced_message += f"\n\n💡 Savings Suggestions:"
-                    for sug in suggestions[:5]:
-                        if sug.get('type') == 'alternative':
-                            enhanced_message += f"\n- {sug.get('title')}: {sug.get('suggestion')}"
-                            if sug.get('estimated_savings'):
-                                enhanced_message += f" (Save: {sug.get('estimated_savings')})"
-                        elif sug.get('type') == 'coupon':
-                            enhanced_message += f"\n- Use code {sug.get('code')}: {sug.get('description')}"
-        
-        # Log the enhanced message for debugging
-        if mention_data.get("has_mentions"):
-            print(f"\n📝 Enhanced Message being sent to MARK:")
-            print(f"{enhanced_message}")
-            print(f"\n" + "="*60 + "\n")
-        
+        enhanced_message, mention_data = _prepare_chat_message(request.message)
+
         # Route request through MCP server with enhanced message
         result = await mcp_server.route_request(
             user_id=request.user_id,
@@ -605,6 +628,56 @@ async def agent_chat(request: ChatRequest):
             result["mention_data"] = mention_data
 
         return result
+    except MCPOverloadedError as e:
+        raise _overloaded(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/agents/chat/stream")
+async def agent_chat_stream(request: ChatRequest):
+    """Chat with MARK, streaming the response as Server-Sent Events"""
+    try:
+        enhanced_message, mention_data = _prepare_chat_message(request.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Admit before the 200 is sent so overload can still be reported as a 429
+    try:
+        slot = await mcp_server.admit(request.user_id, request.target_agent)
+    except MCPOverloadedError as e:
+        raise _overloaded(e)
+
+    async def event_stream():
+        async for event in mcp_server.route_request_stream(
+            user_id=request.user_id,
+            message=enhanced_message,
+            conversation_history=request.conversation_history,
+            target_agent=request.target_agent,
+            slot=slot
+        ):
+            event_type = event.pop("type")
+            if event_type == "token":
+                yield _sse_event("token", event)
+                continue
+
+            # Final event carries the full response and metadata
+            if mention_data.get("has_mentions"):
+                event["mention_data"] = mention_data
+            yield _sse_event(event_type, event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot even if the client disconnects before the stream starts
+        background=BackgroundTask(slot.release)
+    )
+
+@app.post("/api/agents/fan-out")
+async def agent_fan_out(request: FanOutRequest):
+    """Ask several agents at once; whatever misses the deadline is reported as timed out"""
+    try:
+        return await mcp_server.fan_out(request.user_id, request.requests, request.deadline_seconds)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -630,6 +703,26 @@ async def get_agent_status():
             'rag_flat_transactions': rag_service.flat_index.ntotal if rag_service else 0,
             'rag_hnsw_transactions': rag_service.hnsw_index.ntotal if rag_service else 0
         }
+
+        # Connection reuse for pooled LLM calls
+        base_status['http_pool'] = http_pool.get_stats()
+
+        # Per-provider latency, hedging and circuit breaker state
+        base_status['llm_providers'] = provider_router.get_stats()
+
+        # Shared LLM completion cache
+        base_status['completion_cache'] = completion_cache.get_stats()
+        base_status['prompt_metrics'] = prompt_metrics.get_stats()
+        base_status['intent_router'] = intent_router.get_stats()
+        base_status['financial_snapshots'] = snapshot_store.get_stats()
+        base_status['coupon_index'] = coupon_index.get_stats()
+        base_status['mention_index'] = mention_handler.get_stats()
+        base_status['news_store'] = news_store.get_stats()
+        base_status['news_ranker'] = news_ranker.get_stats()
+        base_status['scheduler'] = agent_scheduler.get_status()
+        base_status['scraper_fetch'] = scraper_fetcher.get_stats()
+        base_status['html_parse_pool'] = html_parse_pool.get_stats()
+        base_status['mark_conversations'] = mark_agent.conversations.get_stats()
         
         # Sample merchants
         if vector_db.metadata:
@@ -681,6 +774,19 @@ async def get_coupons(query: Optional[str] = None):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/agents/bounty-hunter-1/coupons/semantic")
+async def semantic_coupon_search(query: str, limit: int = 10):
+    """Search coupons by meaning via the vector DB coupon namespace"""
+    try:
+        coupons = await bounty_hunter_1.semantic_search(query, limit=min(max(limit, 1), 50))
+        return {
+            "coupons": coupons,
+            "count": len(coupons),
+            "query": query
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/agents/bounty-hunter-2/news")
 async def get_finance_news(query: Optional[str] = None):
     """Get finance news from BountyHunter2"""
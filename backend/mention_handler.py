@@ -4,28 +4,20 @@ Analyzes transaction data and provides savings suggestions
 """
 
 import re
-import json
 from typing import List, Dict, Any, Optional
-from pathlib import Path
 from datetime import datetime, timedelta
 
+from merchant_index import MerchantIndex
+from agents.coupon_index import coupon_index
+
 class MentionHandler:
-    def __init__(self, vector_db=None, rag_service=None):
+    """Long-lived @mention resolver (one per process) over a merchant index and the coupon index"""
+
+    def __init__(self, vector_db=None, rag_service=None, coupons=None):
         self.vector_db = vector_db
         self.rag_service = rag_service
-        self.coupons_path = Path("backend/data/coupons/all_coupons.json")
-        self.coupons = self._load_coupons()
-    
-    def _load_coupons(self) -> List[Dict[str, Any]]:
-        """Load all coupons"""
-        try:
-            if self.coupons_path.exists():
-                with open(self.coupons_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return []
-        except Exception as e:
-            print(f"Error loading coupons: {e}")
-            return []
+        self.merchant_index = MerchantIndex(vector_db, rag_service)
+        self.coupon_index = coupons or coupon_index
     
     def extract_mentions(self, message: str) -> List[str]:
         """Extract @ mentions from message"""
@@ -35,64 +27,25 @@ class MentionHandler:
     
     def find_merchant_transactions(self, merchant_name: str) -> List[Dict[str, Any]]:
         """Find all transactions for a specific merchant"""
-        merchant_lower = merchant_name.lower()
-        matching_transactions = []
-        
-        print(f"\n🔍 Searching for merchant: {merchant_name}")
-        
-        # Primary Strategy: Direct metadata scan (most reliable)
-        if self.vector_db and hasattr(self.vector_db, 'metadata'):
-            print(f"   Scanning {len(self.vector_db.metadata)} transactions in vector_db...")
-            for tx in self.vector_db.metadata:
-                merchant = tx.get('merchant', '').lower()
-                # Flexible matching: check if merchant name contains the search term or vice versa
-                if merchant_lower in merchant or merchant in merchant_lower:
-                    matching_transactions.append(tx)
-                    print(f"   ✓ Found: {tx.get('merchant')} - ${tx.get('amount')} on {tx.get('date')}")
-        
-        # Fallback: Check RAG service if available
-        if not matching_transactions and self.rag_service:
-            print(f"   Checking RAG service...")
-            try:
-                # Check current month transactions
-                for tx in self.rag_service.get_current_month_transactions():
-                    merchant = tx.get('merchant', '').lower()
-                    if merchant_lower in merchant or merchant in merchant_lower:
-                        matching_transactions.append(tx)
-                        print(f"   ✓ Found in FLAT: {tx.get('merchant')} - ${tx.get('amount')}")
-                
-                # Check historical transactions
-                for tx in self.rag_service.get_historical_transactions():
-                    merchant = tx.get('merchant', '').lower()
-                    if merchant_lower in merchant or merchant in merchant_lower:
-                        if not any(t.get('id') == tx.get('id') for t in matching_transactions):
-                            matching_transactions.append(tx)
-                            print(f"   ✓ Found in HNSW: {tx.get('merchant')} - ${tx.get('amount')}")
-            except Exception as e:
-                print(f"   ⚠️ RAG service error: {e}")
-        
-        print(f"   📊 Total found: {len(matching_transactions)} transactions for {merchant_name}\n")
-        return matching_transactions
+        return self.merchant_index.lookup(merchant_name)["transactions"]
     
     def find_merchant_coupons(self, merchant_name: str) -> List[Dict[str, Any]]:
-        """Find coupons for a specific merchant"""
-        merchant_lower = merchant_name.lower()
+        """Find unexpired coupons for a specific merchant"""
+        now = datetime.now()
         matching_coupons = []
         
-        for coupon in self.coupons:
-            coupon_merchant = coupon.get('merchant', '').lower()
-            if merchant_lower in coupon_merchant or coupon_merchant in merchant_lower:
-                # Check if coupon is not expired
-                expiry = coupon.get('expiry_date')
-                if expiry:
-                    try:
-                        expiry_date = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
-                        if expiry_date > datetime.now():
-                            matching_coupons.append(coupon)
-                    except:
+        for coupon in self.coupon_index.refresh().coupons_for(merchant_name):
+            # Check if coupon is not expired
+            expiry = coupon.get('expiry_date')
+            if expiry:
+                try:
+                    expiry_date = datetime.fromisoformat(expiry.replace('Z', '+00:00'))
+                    if expiry_date.replace(tzinfo=None) > now:
                         matching_coupons.append(coupon)
-                else:
+                except:
                     matching_coupons.append(coupon)
+            else:
+                matching_coupons.append(coupon)
         
         return matching_coupons
     
@@ -170,8 +123,13 @@ class MentionHandler:
         
         return suggestions
     
-    def analyze_merchant_spending(self, merchant_name: str, transactions: List[Dict]) -> Dict[str, Any]:
-        """Analyze spending patterns for a merchant"""
+    def analyze_merchant_spending(
+        self,
+        merchant_name: str,
+        transactions: List[Dict],
+        aggregates: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Analyze spending patterns for a merchant (totals from the index's aggregates when given)"""
         if not transactions:
             return {
                 "merchant": merchant_name,
@@ -183,8 +141,12 @@ class MentionHandler:
             }
         
         # Handle both positive and negative amounts (debits vs credits)
-        total = sum(abs(tx.get('amount', 0)) for tx in transactions)
-        count = len(transactions)
+        if aggregates:
+            total = sum(a["total"] for a in aggregates.values())
+            count = sum(a["count"] for a in aggregates.values())
+        else:
+            total = sum(abs(tx.get('amount', 0)) for tx in transactions)
+            count = len(transactions)
         avg = total / count if count > 0 else 0
         
         # Calculate monthly average (assuming last 30 days)
@@ -195,10 +157,14 @@ class MentionHandler:
         monthly_total = sum(abs(tx.get('amount', 0)) for tx in recent_transactions)
         
         # Get date range
-        dates = [tx.get('date') for tx in transactions if tx.get('date')]
+        if aggregates:
+            firsts = [a["first_date"] for a in aggregates.values() if a["first_date"]]
+            lasts = [a["last_date"] for a in aggregates.values() if a["last_date"]]
+            dates = [min(firsts), max(lasts)] if firsts else []
+        else:
+            dates = sorted(tx.get('date') for tx in transactions if tx.get('date'))
         date_range = ""
         if dates:
-            dates.sort()
             date_range = f"{dates[0]} to {dates[-1]}"
         
         return {
@@ -235,9 +201,11 @@ class MentionHandler:
         
         results = []
         for merchant in mentions:
-            transactions = self.find_merchant_transactions(merchant)
+            match = self.merchant_index.lookup(merchant)
+            transactions = match["transactions"]
+            print(f"🔍 @{merchant}: {len(transactions)} transactions across {len(match['merchants'])} merchant(s) ({match['source'] or 'none'})")
             coupons = self.find_merchant_coupons(merchant)
-            spending_analysis = self.analyze_merchant_spending(merchant, transactions)
+            spending_analysis = self.analyze_merchant_spending(merchant, transactions, match["aggregates"])
             suggestions = self.generate_savings_suggestions(merchant, transactions, coupons)
             
             results.append({
@@ -251,3 +219,6 @@ class MentionHandler:
             "has_mentions": True,
             "mentions": results
         }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return self.merchant_index.get_stats()
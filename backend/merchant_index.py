@@ -0,0 +1,171 @@
+"""
+Merchant Name Index for @mention lookups
+Transactions grouped by normalized merchant name with running spend aggregates,
+kept in step with the append-only transaction logs (only new rows are indexed)
+Substring matches go through trigram postings, so a lookup touches only its matches
+"""
+
+import bisect
+import threading
+from typing import Dict, Any, List, Set
+
+from agents.coupon_index import normalize_merchant
+
+
+def _trigrams(key: str) -> Set[str]:
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+class _LogCursor:
+    """How far into one transaction list the index has read"""
+
+    def __init__(self):
+        self.processed = 0
+        self.last_id: Any = None
+        self.revision: Any = None
+
+    def is_prefix_of(self, rows: List[Dict[str, Any]], revision: Any) -> bool:
+        if revision != self.revision or self.processed > len(rows):
+            return False
+        return self.processed == 0 or rows[self.processed - 1].get('id') == self.last_id
+
+
+class MerchantTier:
+    """Merchant -> transactions and aggregates for one group of transaction logs"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.transactions: Dict[str, List[Dict[str, Any]]] = {}
+        self.aggregates: Dict[str, Dict[str, Any]] = {}
+        self._keys: List[str] = []
+        self._trigram_postings: Dict[str, Set[str]] = {}
+        self._ids: Set[Any] = set()
+        self._cursors: Dict[str, _LogCursor] = {}
+
+    def clear(self):
+        self.__init__(self.name)
+
+    def sync(self, logs: Dict[str, List[Dict[str, Any]]], revision: Any = None) -> int:
+        """Index rows appended since the last sync; rebuild if any log was rewritten"""
+        if any(not self._cursors.setdefault(name, _LogCursor()).is_prefix_of(rows, revision)
+               for name, rows in logs.items()):
+            self.clear()
+
+        added = 0
+        for name, rows in logs.items():
+            cursor = self._cursors.setdefault(name, _LogCursor())
+            for tx in rows[cursor.processed:]:
+                added += self._add(tx)
+            cursor.processed = len(rows)
+            cursor.last_id = rows[-1].get('id') if rows else None
+            cursor.revision = revision
+        return added
+
+    def _add(self, tx: Dict[str, Any]) -> int:
+        tx_id = tx.get('id')
+        if tx_id is not None:
+            if tx_id in self._ids:
+                return 0
+            self._ids.add(tx_id)
+
+        key = normalize_merchant(tx.get('merchant', '') or '')
+        if not key:
+            return 0
+
+        if key not in self.transactions:
+            self.transactions[key] = []
+            self.aggregates[key] = {"total": 0.0, "count": 0, "first_date": None, "last_date": None}
+            bisect.insort(self._keys, key)
+            for gram in _trigrams(key):
+                self._trigram_postings.setdefault(gram, set()).add(key)
+
+        self.transactions[key].append(tx)
+        aggregate = self.aggregates[key]
+        aggregate["total"] += abs(tx.get('amount', 0) or 0)
+        aggregate["count"] += 1
+        date = tx.get('date')
+        if date:
+            if aggregate["first_date"] is None or date < aggregate["first_date"]:
+                aggregate["first_date"] = date
+            if aggregate["last_date"] is None or date > aggregate["last_date"]:
+                aggregate["last_date"] = date
+        return 1
+
+    def match(self, query_key: str) -> List[str]:
+        """Merchant keys containing the query, or contained in it (the old two-way substring rule)"""
+        if not query_key:
+            return []
+
+        if len(query_key) < 3:
+            # Too short for trigrams - prefix range of the sorted keys
+            start = bisect.bisect_left(self._keys, query_key)
+            end = bisect.bisect_left(self._keys, query_key + "\uffff")
+            found = set(self._keys[start:end])
+        else:
+            postings = [self._trigram_postings.get(gram, set()) for gram in _trigrams(query_key)]
+            candidates = set.intersection(*sorted(postings, key=len)) if postings else set()
+            found = {key for key in candidates if query_key in key}
+
+        # Merchants whose whole name appears in the query ("@ubereats" finds "Uber")
+        length = len(query_key)
+        for i in range(length):
+            for j in range(i + 1, length + 1):
+                if query_key[i:j] in self.transactions:
+                    found.add(query_key[i:j])
+
+        return sorted(found)
+
+
+class MerchantIndex:
+    """Merchant lookups over the VectorDB log, with the RAG indices as a fallback tier"""
+
+    def __init__(self, vector_db=None, rag_service=None):
+        self.vector_db = vector_db
+        self.rag_service = rag_service
+        self.primary = MerchantTier("vector_db")
+        self.fallback = MerchantTier("rag")
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "indexed": 0}
+
+    def sync(self):
+        """Pick up transactions ingested since the last lookup"""
+        with self._lock:
+            if self.vector_db is not None and hasattr(self.vector_db, 'metadata'):
+                self.stats["indexed"] += self.primary.sync(
+                    {"metadata": self.vector_db.metadata},
+                    getattr(self.vector_db, 'revision', None)
+                )
+            if self.rag_service is not None:
+                self.stats["indexed"] += self.fallback.sync({
+                    "flat": self.rag_service.flat_metadata,
+                    "hnsw": self.rag_service.hnsw_metadata
+                })
+
+    def lookup(self, merchant_name: str) -> Dict[str, Any]:
+        """
+        Transactions and spend aggregates for a merchant name
+        RAG transactions are consulted only when the VectorDB has none (as before)
+        """
+        self.sync()
+        query_key = normalize_merchant(merchant_name)
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            for tier in (self.primary, self.fallback):
+                keys = tier.match(query_key)
+                if keys:
+                    return {
+                        "source": tier.name,
+                        "merchants": keys,
+                        "transactions": [tx for key in keys for tx in tier.transactions[key]],
+                        "aggregates": {key: dict(tier.aggregates[key]) for key in keys}
+                    }
+
+        return {"source": None, "merchants": [], "transactions": [], "aggregates": {}}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "merchants": len(self.primary.transactions),
+            "fallback_merchants": len(self.fallback.transactions)
+        }
@@ -6,12 +6,51 @@ Stores chat history, agent responses, and current month transactions
 import redis
 import json
 import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# File-lock fallback for leases when Redis is down (fcntl on POSIX, msvcrt on Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Delete a lease only if we still hold it (it may have expired and been taken by another worker)
+_RELEASE_LEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive inter-process lock on a file (held for a short read-modify-write)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
 
 class RedisCache:
     """Redis cache for chat history and transaction data"""
@@ -35,6 +74,9 @@ class RedisCache:
             self.enabled = False
             self.redis_client = None
 
+        # Lease files for workers sharing a disk when Redis is unavailable
+        self.lease_dir = Path(os.getenv('LEASE_DIR', './data/locks'))
+
     def cache_chat_response(self, user_id: str, query: str, response: str, metadata: Optional[Dict] = None):
         """Cache chat response for 24 hours"""
         if not self.enabled:
@@ -233,6 +275,35 @@ class RedisCache:
             print(f"❌ Error retrieving savings analysis: {e}")
             return None
 
+    def cache_financial_snapshot(self, user_id: str, snapshot: Dict):
+        """Cache the user's financial snapshot until the end of the month"""
+        if not self.enabled:
+            return
+
+        try:
+            key = f"snapshot:{user_id}"
+            days_left = (datetime.now().replace(day=28) + timedelta(days=4)).replace(day=1) - datetime.now()
+            
+            self.redis_client.setex(
+                key,
+                days_left,
+                json.dumps(snapshot, default=str)
+            )
+        except Exception as e:
+            print(f"❌ Error caching financial snapshot: {e}")
+
+    def get_financial_snapshot(self, user_id: str) -> Optional[Dict]:
+        """Get the cached financial snapshot"""
+        if not self.enabled:
+            return None
+
+        try:
+            data = self.redis_client.get(f"snapshot:{user_id}")
+            return json.loads(data) if data else None
+        except Exception as e:
+            print(f"❌ Error retrieving financial snapshot: {e}")
+            return None
+
     def clear_user_cache(self, user_id: str):
         """Clear all cache for a user"""
         if not self.enabled:
@@ -243,7 +314,9 @@ class RedisCache:
                 f"chat:{user_id}:*",
                 f"conversation:{user_id}",
                 f"transactions:current:{user_id}",
-                f"savings:analysis:{user_id}"
+                f"savings:analysis:{user_id}",
+                f"snapshot:{user_id}",
+                f"session:*:{user_id}"
             ]
             
             for pattern in patterns:
@@ -255,6 +328,90 @@ class RedisCache:
         except Exception as e:
             print(f"❌ Error clearing cache: {e}")
 
+    def spill_session(self, namespace: str, user_id: str, value: Any, ttl_seconds: float) -> bool:
+        """Park an evicted in-memory session until the user returns; False if Redis is unavailable"""
+        if not self.enabled:
+            return False
+
+        try:
+            self.redis_client.setex(
+                f"session:{namespace}:{user_id}",
+                timedelta(seconds=ttl_seconds),
+                json.dumps(value, default=str)
+            )
+            return True
+        except Exception as e:
+            print(f"❌ Error spilling session: {e}")
+            return False
+
+    def restore_session(self, namespace: str, user_id: str) -> Optional[Any]:
+        """Take back a spilled session (removed from Redis once restored)"""
+        if not self.enabled:
+            return None
+
+        try:
+            key = f"session:{namespace}:{user_id}"
+            pipe = self.redis_client.pipeline()
+            pipe.get(key)
+            pipe.delete(key)
+            data, _ = pipe.execute()
+            return json.loads(data) if data else None
+        except Exception as e:
+            print(f"❌ Error restoring session: {e}")
+            return None
+
+    def _lease_file(self, name: str) -> Path:
+        return self.lease_dir / (name.replace(':', '_').replace('/', '_') + '.lease')
+
+    def acquire_lease(self, name: str, ttl_seconds: float) -> Optional[str]:
+        """
+        Take a fleet-wide lease (SET NX PX); returns a token, or None if another worker holds it
+        Falls back to a lease file under an exclusive file lock when Redis is disabled
+        """
+        token = uuid.uuid4().hex
+        ttl_ms = max(1, int(ttl_seconds * 1000))
+
+        if self.enabled:
+            try:
+                return token if self.redis_client.set(f"lease:{name}", token, nx=True, px=ttl_ms) else None
+            except Exception as e:
+                print(f"⚠️ Redis lease error, using file lock: {e}")
+
+        path = self._lease_file(name)
+        try:
+            with _file_lock(path.with_suffix('.lock')):
+                if path.exists():
+                    with open(path, 'r') as f:
+                        current = json.load(f)
+                    if current.get('expires_at', 0) > time.time():
+                        return None
+                with open(path, 'w') as f:
+                    json.dump({'token': token, 'expires_at': time.time() + ttl_ms / 1000, 'pid': os.getpid()}, f)
+            return token
+        except Exception as e:
+            print(f"❌ Error acquiring lease {name}: {e}")
+            return None
+
+    def release_lease(self, name: str, token: str):
+        """Give a lease back early (only if it is still ours)"""
+        if self.enabled:
+            try:
+                self.redis_client.eval(_RELEASE_LEASE, 1, f"lease:{name}", token)
+                return
+            except Exception as e:
+                print(f"⚠️ Redis lease release error, using file lock: {e}")
+
+        path = self._lease_file(name)
+        try:
+            with _file_lock(path.with_suffix('.lock')):
+                if path.exists():
+                    with open(path, 'r') as f:
+                        current = json.load(f)
+                    if current.get('token') == token:
+                        path.unlink()
+        except Exception as e:
+            print(f"❌ Error releasing lease {name}: {e}")
+
 
 # Global cache instance
 redis_cache = RedisCache()
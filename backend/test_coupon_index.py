@@ -0,0 +1,125 @@
+"""
+Test the in-memory coupon index
+Merchant, keyword and fuzzy lookups against a brute-force scan, plus a benchmark on 100k coupons
+"""
+
+import random
+import time
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent))
+
+from agents.coupon_index import CouponIndex, normalize_merchant
+
+PRODUCTS = ["coffee", "pizza", "shoes", "sneakers", "laptops", "groceries", "burgers", "flights", "hotels",
+            "headphones", "jeans", "dresses", "furniture", "mattresses", "vitamins", "makeup", "books",
+            "toys", "pet food", "tires", "phones", "sushi", "tacos", "streaming", "gym membership"]
+CATEGORIES = ["food_delivery", "dining", "clothing", "electronics", "travel", "home", "health", "beauty", "other"]
+TEMPLATES = ["{pct}% off {product}", "${amount} off {product} orders over ${minimum}",
+             "Free shipping on {product}", "Buy one get one free {product}", "{pct}% off your first {product} order"]
+
+
+def synthetic_coupons(count: int, merchants: int = 2000, seed: int = 3):
+    rng = random.Random(seed)
+    today = datetime(2026, 1, 15)
+    names = [f"{rng.choice(['Blue', 'Red', 'Prime', 'Urban', 'Happy', 'Green'])} {rng.choice(['Market', 'Store', 'Shop', 'Outlet', 'Co'])} {i}"
+             for i in range(merchants)]
+    names[:4] = ["UberEats", "DoorDash", "Whole Foods Market", "Best Buy"]
+
+    coupons = []
+    for i in range(count):
+        expiry = today + timedelta(days=rng.randint(-30, 60))
+        coupons.append({
+            "id": f"coupon_{i}",
+            "merchant": names[rng.randrange(merchants)] if i % 10 else names[i % 4],
+            "code": f"SAVE{i}",
+            "description": rng.choice(TEMPLATES).format(pct=rng.choice([10, 15, 20, 30]), amount=rng.choice([5, 10, 20]),
+                                                         minimum=rng.choice([30, 50]), product=rng.choice(PRODUCTS)),
+            "category": rng.choice(CATEGORIES),
+            "found_date": (today - timedelta(minutes=rng.randint(0, 500_000))).isoformat(),
+            "expiry_date": expiry.strftime("%Y-%m-%d") if i % 7 else None
+        })
+    return coupons
+
+
+def _brute_force(coupons, merchant=None, words=(), limit=10, today="2026-01-15"):
+    """Coupons matching the merchant and every word, valid first, then newest found"""
+    def text(c):
+        return f"{c['merchant']} {c['description']} {c['category']} {c['code']}".lower()
+
+    hits = [c for c in coupons
+            if (merchant is None or normalize_merchant(c['merchant']) == merchant)
+            and all(w in text(c) for w in words)]
+    hits.sort(key=lambda c: c['found_date'], reverse=True)
+    hits.sort(key=lambda c: bool(c['expiry_date']) and c['expiry_date'] < today)
+    return [c['id'] for c in hits[:limit]]
+
+
+def test_search_matches_brute_force():
+    coupons = synthetic_coupons(5000)
+    index = CouponIndex()
+    index.build(coupons)
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    cases = [
+        ("coffee", None, ["coffee"]),
+        ("pizza coupons", None, ["pizza"]),
+        ("sushi free shipping", None, ["sushi", "free", "shipping"]),
+        ("doordash", "doordash", []),
+        ("uber eats pizza", "ubereats", ["pizza"]),
+        ("whole foods vitamins", "wholefoods", ["vitamins"]),
+    ]
+    for query, merchant, words in cases:
+        got = [c['id'] for c in index.search(query)]
+        assert got == _brute_force(coupons, merchant, words, today=today), query
+
+    # Typos fall back to the closest merchant
+    assert {normalize_merchant(c['merchant']) for c in index.search("doordsh")} == {"doordash"}
+    print(f"✅ Search matches a brute-force scan for {len(cases)} queries")
+
+
+def test_benchmark_100k():
+    coupons = synthetic_coupons(100_000)
+    index = CouponIndex()
+
+    started = time.perf_counter()
+    index.build(coupons)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    queries = ["coffee", "pizza", "coffee pizza", "free shipping sneakers", "doordash", "uber eats",
+               "best buy headphones", "laptops", "20% off dresses", "happy market 77", "doordsh"]
+
+    # The first query after a build pays no warm-up cost
+    started = time.perf_counter()
+    index.search(queries[0])
+    first_ms = (time.perf_counter() - started) * 1000
+
+    rounds = 50
+    worst = {}
+    for query in queries:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            index.search(query)
+        worst[query] = (time.perf_counter() - started) * 1000 / rounds
+
+    print(f"⏱️  build {build_ms:.0f}ms, first query {first_ms:.3f}ms")
+    for query, ms in worst.items():
+        print(f"   {query!r}: {ms:.3f}ms")
+    assert first_ms < 1.0
+    assert max(worst.values()) < 1.0
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("Testing Coupon Index")
+    print("="*60 + "\n")
+
+    test_search_matches_brute_force()
+    test_benchmark_100k()
+
+    print("\n" + "="*60)
+    print("Coupon Index Testing Complete!")
+    print("="*60 + "\n")
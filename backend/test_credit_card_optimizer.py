@@ -0,0 +1,236 @@
+"""
+Test the credit card reward matrix against the original per-card loops,
+streaming category aggregation and the wallet optimizer against brute force
+Benchmarks recommendation scoring and wallet search on large synthetic card catalogs
+"""
+
+import itertools
+import json
+import random
+import time
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent))
+
+from credit_card_optimizer import CreditCardOptimizer, CategoryAggregator, ANALYSIS_VERSION
+
+CATEGORIES = ['Dining', 'Groceries', 'Travel', 'Gas', 'Shopping', 'Entertainment',
+              'Transit', 'Drugstores', 'Food & Dining', 'Bills & Utilities', 'Other']
+
+REWARD_TEMPLATES = [
+    "{r}x points on dining", "{r}% cash back at U.S. supermarkets", "{r}x miles on travel",
+    "{r}% cash back at U.S. gas stations", "{r}x points on online shopping at retail stores",
+    "{r}% cash back on select streaming services", "{r}% cash back on transit",
+    "{r}x points at restaurants worldwide", "{r}% cash back on drugstore purchases",
+    "{r}x points on flights booked directly with airlines", "{r}% cash back on all other purchases"
+]
+
+
+def synthetic_cards(count: int, seed: int = 7):
+    """A catalog of `count` cards with 2-5 random category rewards each"""
+    rng = random.Random(seed)
+    cards = []
+    for i in range(count):
+        rewards = [t.format(r=rng.choice([1, 1.5, 2, 3, 4, 5, 6])) for t in rng.sample(REWARD_TEMPLATES, rng.randint(2, 5))]
+        cards.append({
+            "name": f"Card {i}",
+            "issuer": f"Issuer {i % 40}",
+            "rewards": rewards,
+            "annual_fee": rng.choice(["$0", "$0", "$95", "$150", "$250", "$550"])
+        })
+    return cards
+
+
+def synthetic_spending(seed: int = 11):
+    rng = random.Random(seed)
+    return {category: {'total': rng.randint(200, 9000), 'count': 10} for category in CATEGORIES}
+
+
+def _legacy_scores(optimizer: CreditCardOptimizer, category_spending):
+    """The original per-card × reward × category loop (regex parse on every pass)"""
+    scores = []
+    for card in optimizer.credit_cards:
+        score = 0
+        for category, data in category_spending.items():
+            best_rate = 0
+            for reward in card.get('rewards', []):
+                rate = optimizer._extract_reward_rate(reward)
+                if optimizer._category_matches(category, reward.lower()) and rate > best_rate:
+                    best_rate = rate
+            score += data['total'] * (best_rate / 100)
+        scores.append(score)
+    return scores
+
+
+def test_matrix_matches_loops():
+    """Matrix recommendations and best-card picks agree with the loop implementation"""
+    optimizer = CreditCardOptimizer(credit_cards=synthetic_cards(200))
+    spending = synthetic_spending()
+
+    legacy = _legacy_scores(optimizer, spending)
+    expected = sorted(range(len(legacy)), key=lambda i: legacy[i], reverse=True)[:5]
+    recommended = optimizer._recommend_cards_by_category(spending)
+
+    assert [rec['card']['name'] for rec in recommended] == [f"Card {i}" for i in expected]
+    assert all(abs(rec['total_value'] - legacy[i]) < 1e-6 for rec, i in zip(recommended, expected))
+
+    best = optimizer._find_best_card_per_category(spending)
+    for category, data in spending.items():
+        rates = [
+            max([optimizer._extract_reward_rate(r) for r in card['rewards']
+                 if optimizer._category_matches(category, r.lower())] + [1.0])
+            for card in optimizer.credit_cards
+        ]
+        assert best[category]['annual_value'] == round(data['total'] * max(rates) / 100, 2)
+    print(f"✅ Matrix matches loops for {len(optimizer.credit_cards)} cards × {len(spending)} categories")
+
+
+def test_benchmark_reward_matrix():
+    """Recommendation scoring on a 1,000-card catalog: loops vs matrix"""
+    optimizer = CreditCardOptimizer(credit_cards=synthetic_cards(1000))
+    spending = synthetic_spending()
+    optimizer._recommend_cards_by_category(spending)  # compile the category columns
+
+    started = time.perf_counter()
+    _legacy_scores(optimizer, spending)
+    loop_ms = (time.perf_counter() - started) * 1000
+
+    runs = 20
+    started = time.perf_counter()
+    for _ in range(runs):
+        optimizer._recommend_cards_by_category(spending)
+        optimizer._find_best_card_per_category(spending)
+    matrix_ms = (time.perf_counter() - started) * 1000 / runs
+
+    print(f"   loops: {loop_ms:.1f}ms per analysis")
+    print(f"   matrix: {matrix_ms:.2f}ms per analysis (recommend + best per category)")
+    assert matrix_ms < loop_ms
+    print("✅ Reward matrix is faster than the per-card loops")
+
+
+def _transaction_stream(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "id": f"txn_{i}", "date": "2025-01-15", "merchant": f"Merchant {i % 50}",
+            "amount": rng.randint(-100, 500), "classified_category": rng.choice(CATEGORIES),
+            "description": "card purchase " * 10
+        }
+
+
+def test_streaming_aggregation():
+    """Generators aggregate in one pass and the payload size doesn't grow with transactions"""
+    optimizer = CreditCardOptimizer(credit_cards=synthetic_cards(20))
+    small = optimizer.analyze_transactions(_transaction_stream(1_000))
+    large = optimizer.analyze_transactions(_transaction_stream(50_000))
+
+    expected = sum(t["amount"] for t in _transaction_stream(50_000) if t["amount"] >= 0)
+    assert large['total_spending'] == expected
+    assert large['version'] == ANALYSIS_VERSION
+
+    for stats in large['category_spending'].values():
+        amounts = [t['amount'] for t in stats['top_transactions']]
+        assert len(amounts) == 5 and amounts == sorted(amounts, reverse=True) and amounts[0] == stats['max']
+
+    small_size = len(json.dumps(small['category_spending'], default=str))
+    large_size = len(json.dumps(large['category_spending'], default=str))
+    print(f"   category payload: {small_size:,} bytes @ 1k transactions, {large_size:,} bytes @ 50k")
+    assert large_size < small_size * 1.5
+    assert CategoryAggregator(top_n=0).extend(_transaction_stream(10)).category_spending()
+    print("✅ Streaming aggregation keeps the analysis compact")
+
+
+def _brute_force_wallet(optimizer: CreditCardOptimizer, category_spending, k: int) -> float:
+    """Net annual gain over the 1% baseline of the best wallet of up to k cards (spending is a year's)"""
+    categories = list(category_spending)
+    spending = np.array([category_spending[c]['total'] for c in categories], dtype=float)
+    gains = spending * ((np.maximum(optimizer.reward_matrix(categories), 1.0) - 1.0) / 100)
+    best = 0.0
+    for size in range(1, k + 1):
+        for wallet in itertools.combinations(range(len(optimizer.credit_cards)), size):
+            wallet = list(wallet)
+            best = max(best, gains[wallet].max(axis=0).sum() - optimizer.annual_fees[wallet].sum())
+    return round(best, 2)
+
+
+def test_wallet_matches_brute_force():
+    """Branch and bound finds the same optimum as trying every wallet"""
+    optimizer = CreditCardOptimizer(credit_cards=synthetic_cards(40))
+    spending = synthetic_spending()
+
+    for k in (1, 2, 3, 4):
+        wallet = optimizer.optimize_wallet(spending, k, period_months=12)
+        assert wallet['method'] == "exact"
+        assert wallet['gain_vs_baseline'] == _brute_force_wallet(optimizer, spending, k)
+        assert len(wallet['cards']) <= k
+        used = {a['card_name'] for a in wallet['category_assignments'].values()} - {'Any card (1% base)'}
+        assert used <= {card['name'] for card in wallet['cards']}
+    print(f"✅ Wallet optimizer matches brute force for k = 1..4 on {len(optimizer.credit_cards)} cards")
+
+
+def test_wallet_annualizes_monthly_spending():
+    """A $95 card earning ~$20/month above the 1% base pays for itself over a year"""
+    optimizer = CreditCardOptimizer(credit_cards=[
+        {"name": "No Fee Card", "issuer": "Bank A", "rewards": ["1.5% cash back on all other purchases"], "annual_fee": "$0"},
+        {"name": "Dining Card", "issuer": "Bank B", "rewards": ["5x points on dining"], "annual_fee": "$95"},
+    ])
+    month = [{'amount': 500, 'classified_category': 'Dining'}, {'amount': 100, 'classified_category': 'Other'}]
+
+    wallet = optimizer.analyze_transactions(month)['wallet']
+    assert 'Dining Card' in [card['name'] for card in wallet['cards']]
+    assert wallet['annual_fees'] == 95
+    assert wallet['category_assignments']['Dining']['annual_spending'] == 6000
+    # $20/month above base = $240/year, less the $95 fee
+    assert wallet['gain_vs_baseline'] >= 240 - 95
+    print(f"✅ Monthly spending is annualized before fees (net gain ${wallet['gain_vs_baseline']:.2f}/year)")
+
+
+def test_empty_catalog():
+    """Without a card catalog the analysis still completes with an empty wallet"""
+    optimizer = CreditCardOptimizer(credit_cards=[])
+    analysis = optimizer.analyze_transactions([{'amount': 50, 'classified_category': 'Dining'}])
+
+    assert analysis['recommended_cards'] == []
+    assert analysis['savings_analysis']['potential_savings'] == 0
+    assert analysis['wallet']['cards'] == [] and analysis['wallet']['gain_vs_baseline'] == 0
+    assert analysis['wallet']['category_assignments']['Dining']['card_name'] == 'Any card (1% base)'
+    assert optimizer.optimize_wallet({}, 3)['cards'] == []
+    print("✅ Empty card catalog returns an empty wallet")
+
+
+def test_benchmark_wallet():
+    """Wallet search on a 1,000-card catalog"""
+    optimizer = CreditCardOptimizer(credit_cards=synthetic_cards(1000))
+    spending = synthetic_spending()
+
+    for k in (2, 3, 5):
+        started = time.perf_counter()
+        wallet = optimizer.optimize_wallet(spending, k, period_months=12)
+        ms = (time.perf_counter() - started) * 1000
+        print(f"   k={k}: {wallet['method']}, {wallet['candidates']} undominated cards, "
+              f"{wallet['search_nodes']} nodes, net gain ${wallet['gain_vs_baseline']:.2f}, {ms:.1f}ms")
+        assert ms < 5000
+    print(f"   (brute force over 3-card wallets alone: {len(optimizer.credit_cards) ** 3 // 6:,} combinations)")
+    print("✅ Wallet search stays interactive at 1,000 cards")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Credit Card Optimizer")
+    print("=" * 60)
+
+    test_matrix_matches_loops()
+    test_benchmark_reward_matrix()
+    test_streaming_aggregation()
+    test_wallet_matches_brute_force()
+    test_wallet_annualizes_monthly_spending()
+    test_empty_catalog()
+    test_benchmark_wallet()
+
+    print("=" * 60)
+    print("All credit card optimizer tests passed!")
+    print("=" * 60)
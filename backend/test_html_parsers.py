@@ -0,0 +1,135 @@
+"""
+Test the scraper HTML parsers against saved page fixtures
+Benchmarks on-loop html.parser parsing against the process parse pool (lxml)
+"""
+
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent))
+
+from bs4 import BeautifulSoup
+from agents import html_parsers
+from agents.html_parsers import HTMLParsePool, parse_yahoo_articles, parse_honey, parse_rakuten
+
+FIXTURES = Path(__file__).parent / "test_fixtures" / "html"
+
+
+def load(name: str) -> str:
+    return (FIXTURES / name).read_text()
+
+
+def test_yahoo_articles():
+    """Articles parse with stable ids, absolute links and publish times"""
+    html = load("yahoo_finance_home.html")
+    articles = parse_yahoo_articles(html, "general", 30, True)
+
+    assert len(articles) == 30
+    assert all(a["url"].startswith("https://finance.yahoo.com/") for a in articles)
+    assert all(a["published_time"] != "Unknown" for a in articles)
+    assert [a["id"] for a in articles] == [a["id"] for a in parse_yahoo_articles(html, "general", 30, True)]
+
+    sector = parse_yahoo_articles(load("yahoo_finance_technology.html"), "tech", 20)
+    assert len(sector) == 20
+    assert all(a["id"].startswith("yahoo_tech_") and "published_time" not in a for a in sector)
+    print(f"✅ Yahoo: {len(articles)} general, {len(sector)} sector articles")
+
+
+def test_coupon_pages():
+    """Honey and Rakuten cards parse into coupon records"""
+    honey = parse_honey(load("honey_explore.html"), "https://www.joinhoney.com/explore")
+    rakuten = parse_rakuten(load("rakuten_home.html"), "https://www.rakuten.com/")
+
+    assert len(honey) == 50 and all(c["code"] and c["merchant"] != "Unknown" for c in honey)
+    assert len(rakuten) == 50 and all(c["description"].endswith("% cashback") for c in rakuten)
+    print(f"✅ Coupons: {len(honey)} Honey, {len(rakuten)} Rakuten")
+
+
+def test_parser_backends_agree():
+    """lxml and html.parser extract the same records from the fixtures"""
+    html = load("yahoo_finance_home.html")
+    fast = parse_yahoo_articles(html, "general", 30)
+
+    original = html_parsers.HTML_PARSER
+    html_parsers.HTML_PARSER = "html.parser"
+    try:
+        slow = parse_yahoo_articles(html, "general", 30)
+    finally:
+        html_parsers.HTML_PARSER = original
+
+    assert [a["headline"] for a in fast] == [a["headline"] for a in slow]
+    print(f"✅ {original} matches html.parser")
+
+
+def _legacy_parse(html: str):
+    """The old in-coroutine parse: html.parser on the event loop thread"""
+    soup = BeautifulSoup(html, 'html.parser')
+    return soup.find_all(['article', 'li', 'div'], class_=html_parsers._ARTICLE_RE)[:20]
+
+
+async def _measure(parse_all) -> dict:
+    """Wall time of a parse batch and the worst event loop stall seen meanwhile"""
+    worst_lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal worst_lag
+        while not done:
+            tick = time.perf_counter()
+            await asyncio.sleep(0.005)
+            worst_lag = max(worst_lag, time.perf_counter() - tick - 0.005)
+
+    ticker_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await parse_all()
+    elapsed = time.perf_counter() - started
+    done = True
+    await ticker_task
+    return {"ms": elapsed * 1000, "lag_ms": worst_lag * 1000}
+
+
+def test_benchmark_parse_pool():
+    """A daily-scrape sized batch: legacy on-loop parsing vs the parse pool"""
+    pages = [load("yahoo_finance_home.html"), load("yahoo_finance_technology.html")] * 8
+    pool = HTMLParsePool(workers=4)
+
+    async def legacy():
+        # Each sector coroutine parsed right after its fetch, between awaits
+        for html in pages:
+            _legacy_parse(html)
+            await asyncio.sleep(0)
+
+    async def pooled():
+        await asyncio.gather(*(pool.parse(parse_yahoo_articles, html, "tech", 20) for html in pages))
+
+    async def run():
+        await pool.parse(parse_yahoo_articles, pages[0], "tech", 20)  # start the workers
+        return await _measure(legacy), await _measure(pooled)
+
+    try:
+        before, after = asyncio.run(run())
+    finally:
+        pool.shutdown()
+
+    print(f"   legacy (html.parser on loop): {before['ms']:.1f}ms, worst loop stall {before['lag_ms']:.1f}ms")
+    print(f"   parse pool ({html_parsers.HTML_PARSER}, 4 workers): {after['ms']:.1f}ms, worst loop stall {after['lag_ms']:.1f}ms")
+    assert after["lag_ms"] < before["lag_ms"]
+    print("✅ Parse pool keeps the event loop responsive")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Testing Scraper HTML Parsers")
+    print("=" * 60)
+
+    test_yahoo_articles()
+    test_coupon_pages()
+    test_parser_backends_agree()
+    test_benchmark_parse_pool()
+
+    print("=" * 60)
+    print("All HTML parser tests passed!")
+    print("=" * 60)
@@ -0,0 +1,151 @@
+"""
+Test the LLM provider router with local fake providers
+Injects latency and errors to check hedging, cancellation and circuit breakers
+"""
+
+import asyncio
+import time
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent))
+
+from agents.provider_router import ProviderRouter
+
+
+class FakeProvider:
+    """Local stand-in for an LLM API with configurable latency and failures"""
+
+    def __init__(self, name: str, latency: float = 0.0, fail: bool = False):
+        self.name = name
+        self.latency = latency
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.latency)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise Exception(f"{self.name} unavailable")
+        return f"response from {self.name}"
+
+
+def make_router(**kwargs) -> ProviderRouter:
+    options = {
+        "default_hedge_delay": 0.2,
+        "min_hedge_delay": 0.05,
+        "max_hedge_delay": 1.0,
+        "failure_threshold": 2,
+        "reset_timeout": 60.0
+    }
+    options.update(kwargs)
+    return ProviderRouter(**options)
+
+
+async def _complete(router: ProviderRouter, primary: FakeProvider, secondary: FakeProvider):
+    started = time.perf_counter()
+    result, winner = await router.complete({primary.name: primary, secondary.name: secondary})
+    return result, winner, time.perf_counter() - started
+
+
+def test_fast_primary_wins_without_hedge():
+    router = make_router()
+    primary = FakeProvider("openrouter", latency=0.01)
+    secondary = FakeProvider("gemini", latency=0.01)
+
+    result, winner, _ = asyncio.run(_complete(router, primary, secondary))
+
+    assert winner == "openrouter"
+    assert secondary.calls == 0
+    print(f"✅ Fast primary wins, no hedge fired ({result})")
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    router = make_router()
+    primary = FakeProvider("openrouter", latency=2.0)
+    secondary = FakeProvider("gemini", latency=0.05)
+
+    result, winner, elapsed = asyncio.run(_complete(router, primary, secondary))
+
+    assert winner == "gemini"
+    assert primary.cancelled == 1, "losing request should be cancelled"
+    assert elapsed < 0.5, f"hedge should fire after ~0.2s, took {elapsed:.2f}s"
+    assert router.stats["gemini"]["hedges_fired"] == 1
+    print(f"✅ Slow primary hedged after default delay, loser cancelled ({elapsed:.2f}s)")
+
+
+def test_hedge_delay_follows_p95():
+    router = make_router()
+    for _ in range(50):
+        router.record_success("openrouter", 0.1)
+
+    delay = router.hedge_delay("openrouter")
+    assert delay == 0.1, f"expected p95 bucket 0.1s, got {delay}"
+    print(f"✅ Hedge delay tracks p95 latency ({delay}s)")
+
+
+def test_failing_primary_falls_back_immediately():
+    router = make_router(default_hedge_delay=1.0)
+    primary = FakeProvider("openrouter", latency=0.01, fail=True)
+    secondary = FakeProvider("gemini", latency=0.01)
+
+    _, winner, elapsed = asyncio.run(_complete(router, primary, secondary))
+
+    assert winner == "gemini"
+    assert elapsed < 0.5, "fallback should not wait for the hedge delay"
+    print(f"✅ Failing primary falls back immediately ({elapsed:.2f}s)")
+
+
+def test_circuit_breaker_skips_failing_provider():
+    router = make_router()
+    primary = FakeProvider("openrouter", fail=True)
+    secondary = FakeProvider("gemini")
+
+    for _ in range(2):
+        asyncio.run(_complete(router, primary, secondary))
+    assert router.breakers["openrouter"].state == "open"
+
+    calls_before = primary.calls
+    _, winner, _ = asyncio.run(_complete(router, primary, secondary))
+
+    assert winner == "gemini"
+    assert primary.calls == calls_before, "open circuit should skip the provider"
+    print("✅ Circuit breaker opens and skips the failing provider")
+
+
+def test_all_providers_failing_raises():
+    router = make_router()
+    primary = FakeProvider("openrouter", fail=True)
+    secondary = FakeProvider("gemini", fail=True)
+
+    try:
+        asyncio.run(_complete(router, primary, secondary))
+    except Exception as e:
+        assert "All LLM providers failed" in str(e)
+        print("✅ All providers failing raises a combined error")
+        return
+
+    raise AssertionError("expected an exception")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("Testing LLM Provider Router")
+    print("="*60 + "\n")
+
+    test_fast_primary_wins_without_hedge()
+    test_slow_primary_is_hedged_and_cancelled()
+    test_hedge_delay_follows_p95()
+    test_failing_primary_falls_back_immediately()
+    test_circuit_breaker_skips_failing_provider()
+    test_all_providers_failing_raises()
+
+    print("\n" + "="*60)
+    print("Provider Router Testing Complete!")
+    print("="*60 + "\n")
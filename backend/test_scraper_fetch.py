@@ -0,0 +1,82 @@
+"""
+Test the scraper fetch layer's change detection
+A page only counts as seen once the caller commits it, so a failed parse is retried
+"""
+
+import asyncio
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent))
+
+import httpx
+from http_pool import http_pool
+from agents.scraper_fetch import ScraperFetcher
+
+URL = "https://coupons.example.com/deals"
+PAGE = "<html><body><div class='deal'>20% off</div></body></html>"
+
+
+def _serve(requests):
+    """A client for a server that honours ETags, recording each request's headers"""
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(dict(request.headers))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, text=PAGE, headers={"ETag": '"v1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return lambda url: client
+
+
+def test_failed_parse_is_retried():
+    """A parser that raises leaves the page unseen; committing after success marks it unchanged"""
+    requests = []
+    original = http_pool.get_client
+    http_pool.get_client = _serve(requests)
+
+    def parse(text):
+        raise ValueError("parser blew up")
+
+    async def run():
+        fetcher = ScraperFetcher(Path(tempfile.mkdtemp()))
+
+        page = await fetcher.fetch(URL)
+        assert page.changed
+        try:
+            parse(page.text)
+            fetcher.commit(page)
+        except ValueError:
+            pass
+
+        # Nothing was cached, so no validators are sent and the page is still new
+        retry = await fetcher.fetch(URL)
+        assert retry.changed and "if-none-match" not in requests[-1]
+        fetcher.commit(retry)
+
+        again = await fetcher.fetch(URL)
+        assert not again.changed and again.text == PAGE
+        assert requests[-1].get("if-none-match") == '"v1"'
+        return fetcher.get_stats()
+
+    try:
+        stats = asyncio.run(run())
+    finally:
+        http_pool.get_client = original
+
+    assert stats["changed"] == 2 and stats["not_modified"] == 1
+    print("✅ Failed parse is retried; committed page revalidates with its ETag")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*60)
+    print("Testing Scraper Fetch Layer")
+    print("="*60 + "\n")
+
+    test_failed_parse_is_retried()
+
+    print("\n" + "="*60)
+    print("Scraper Fetch Testing Complete!")
+    print("="*60 + "\n")
@@ -3,8 +3,10 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 import json
 import os
+import hashlib
+import threading
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Any
 
 class VectorDB:
     def __init__(self, db_path='./data/vector_db'):
@@ -37,6 +39,14 @@ class VectorDB:
         else:
             self.budgets = {}
         
+        # Bumped whenever stored transactions are modified in place (appends don't count)
+        self.revision = 0
+        
+        # Memory namespaces (e.g. "coupons") - separate indexes, loaded on first use
+        self.memory_path = os.path.join(db_path, 'memories')
+        self.memories: Dict[str, Dict[str, Any]] = {}
+        self._memory_lock = threading.Lock()
+        
         print(f"Vector DB initialized with {self.index.ntotal} transactions")
     
     def add_transaction(self, transaction: Dict):
@@ -204,3 +214,144 @@ class VectorDB:
         """Save budgets to disk"""
         with open(self.budget_path, 'w') as f:
             json.dump(self.budgets, f, indent=2)
+    
+    # ---------- memory namespaces ----------
+    
+    @staticmethod
+    def _memory_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    def _memory_namespace(self, namespace: str) -> Dict[str, Any]:
+        """Load (or create) a namespace: cosine index keyed by int64 ids plus entry metadata"""
+        ns = self.memories.get(namespace)
+        if ns is not None:
+            return ns
+        
+        index_path = os.path.join(self.memory_path, f'{namespace}.index')
+        entries_path = os.path.join(self.memory_path, f'{namespace}.json')
+        if os.path.exists(index_path) and os.path.exists(entries_path):
+            index = faiss.read_index(index_path)
+            with open(entries_path, 'r') as f:
+                stored = json.load(f)
+            entries, next_id = stored['entries'], stored['next_id']
+        else:
+            index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+            entries, next_id = {}, 0
+        
+        ns = {
+            'index': index,
+            'entries': entries,
+            'by_vector': {entry['vector_id']: memory_id for memory_id, entry in entries.items()},
+            'next_id': next_id,
+            'index_path': index_path,
+            'entries_path': entries_path
+        }
+        self.memories[namespace] = ns
+        return ns
+    
+    def _save_memories(self, ns: Dict[str, Any]):
+        os.makedirs(self.memory_path, exist_ok=True)
+        faiss.write_index(ns['index'], ns['index_path'])
+        with open(ns['entries_path'], 'w') as f:
+            json.dump({'entries': ns['entries'], 'next_id': ns['next_id']}, f)
+    
+    def add_memories(self, namespace: str, items: List[Dict], replace: bool = False) -> Dict[str, int]:
+        """
+        Add or update memories in a namespace in one batch
+        
+        Args:
+            namespace: Memory namespace (kept apart from transactions)
+            items: Dicts with 'text', optional stable 'id' (defaults to the text hash) and 'metadata'
+            replace: Items are the whole namespace - memories not in them are removed
+        
+        Only new or changed texts are embedded; unchanged ones cost a hash comparison
+        """
+        with self._memory_lock:
+            ns = self._memory_namespace(namespace)
+            entries = ns['entries']
+            
+            pending: Dict[str, Dict] = {}
+            seen = set()
+            metadata_updates = 0
+            for item in items:
+                text = item['text']
+                content_hash = self._memory_hash(text)
+                memory_id = str(item.get('id') or content_hash)
+                metadata = item.get('metadata', {})
+                seen.add(memory_id)
+                
+                entry = entries.get(memory_id)
+                if entry and entry['hash'] == content_hash:
+                    if entry['metadata'] != metadata:
+                        entry['metadata'] = metadata
+                        metadata_updates += 1
+                    continue
+                pending[memory_id] = {'text': text, 'hash': content_hash, 'metadata': metadata}
+            
+            stale = set(entries) - seen if replace else set()
+            changed = [memory_id for memory_id in pending if memory_id in entries]
+            
+            removed_vectors = [entries[memory_id]['vector_id'] for memory_id in list(stale) + changed]
+            if removed_vectors:
+                ns['index'].remove_ids(np.array(removed_vectors, dtype='int64'))
+                for memory_id in stale:
+                    ns['by_vector'].pop(entries.pop(memory_id)['vector_id'], None)
+                for memory_id in changed:
+                    ns['by_vector'].pop(entries[memory_id]['vector_id'], None)
+            
+            if pending:
+                embeddings = np.asarray(
+                    self.encoder.encode([p['text'] for p in pending.values()], batch_size=64),
+                    dtype='float32'
+                )
+                faiss.normalize_L2(embeddings)
+                vector_ids = np.arange(ns['next_id'], ns['next_id'] + len(pending), dtype='int64')
+                ns['index'].add_with_ids(embeddings, vector_ids)
+                ns['next_id'] += len(pending)
+                
+                now = datetime.now().isoformat()
+                for (memory_id, entry), vector_id in zip(pending.items(), vector_ids.tolist()):
+                    entry['vector_id'] = vector_id
+                    entry['added_at'] = now
+                    entries[memory_id] = entry
+                    ns['by_vector'][vector_id] = memory_id
+            
+            if pending or stale or metadata_updates:
+                self._save_memories(ns)
+        
+        return {
+            'embedded': len(pending),
+            'updated': metadata_updates,
+            'removed': len(stale),
+            'unchanged': len(seen) - len(pending) - metadata_updates,
+            'total': len(entries)
+        }
+    
+    def search_memories(self, namespace: str, query: str, k: int = 10) -> List[Dict]:
+        """Most similar memories in a namespace (cosine similarity)"""
+        with self._memory_lock:
+            ns = self._memory_namespace(namespace)
+            if ns['index'].ntotal == 0:
+                return []
+            
+            query_embedding = np.asarray(self.encoder.encode([query]), dtype='float32')
+            faiss.normalize_L2(query_embedding)
+            scores, vector_ids = ns['index'].search(query_embedding, min(k, ns['index'].ntotal))
+            
+            results = []
+            for vector_id, score in zip(vector_ids[0].tolist(), scores[0].tolist()):
+                memory_id = ns['by_vector'].get(vector_id)
+                if memory_id is None:
+                    continue
+                entry = ns['entries'][memory_id]
+                results.append({
+                    'id': memory_id,
+                    'text': entry['text'],
+                    'metadata': entry['metadata'],
+                    'similarity_score': float(score)
+                })
+            return results
+    
+    def memory_count(self, namespace: str) -> int:
+        with self._memory_lock:
+            return len(self._memory_namespace(namespace)['entries'])